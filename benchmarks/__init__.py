@@ -0,0 +1,6 @@
+"""
+Throughput benchmarks for the StackExchange parser.
+
+``python -m benchmarks.generate`` writes a synthetic dump and
+``python -m benchmarks.run`` measures every writer and parser engine on it.
+"""
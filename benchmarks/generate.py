@@ -0,0 +1,256 @@
+"""
+Synthetic StackExchange dump generator.
+
+Writes one ``<Table>.xml`` per configured table with values drawn from the
+column types in the DDL files, so every parser engine and writer can be
+benchmarked without downloading a real dump. Output is deterministic for a
+given seed.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, NamedTuple, Optional
+
+from stackexchange_parser.core import load_tables_config, load_column_types, logical_type, StackExchangeParserError
+
+MANIFEST_NAME = "benchmark.json"
+DEFAULT_ROWS = 10000
+DEFAULT_BODY_MEDIAN = 800
+DEFAULT_BODY_SIGMA = 1.0
+
+# Columns holding post-length HTML text, drawn from the Body length distribution
+LONG_TEXT_COLUMNS = {"Body", "Text", "AboutMe"}
+NULL_FRACTION = 0.1
+
+_EPOCH = datetime(2008, 7, 31, 21, 42, 52)
+_SPAN_SECONDS = 16 * 365 * 24 * 3600
+_WORDS = (
+    "the of and to in is you that it for on with as are this be how can not "
+    "value function error file list string using data class object array python "
+    "java javascript query table server client request response method return "
+    "null type index loop thread memory performance parse convert example "
+    "über café naïve déjà 数据 ошибка"
+).split()
+_CODE_LINES = (
+    "for (int i = 0; i < n; i++) {",
+    "    total += values[i] * 2;",
+    "}",
+    "if x < 10 and y > 3:",
+    "    print(\"done\")",
+    "SELECT * FROM Posts WHERE Score > 5;",
+    "let answer = a && b || 'c';",
+)
+_LICENSES = ("CC BY-SA 2.5", "CC BY-SA 3.0", "CC BY-SA 4.0")
+_XML_ESCAPES = str.maketrans({
+    "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "\n": "&#xA;", "\r": "&#xD;", "\t": "&#x9;"
+})
+
+class GenerationOptions(NamedTuple):
+    """Size and shape of a synthetic dump."""
+    rows: int = DEFAULT_ROWS
+    body_median: int = DEFAULT_BODY_MEDIAN
+    body_sigma: float = DEFAULT_BODY_SIGMA
+    seed: int = 0
+    table_rows: Optional[Dict[str, int]] = None
+
+    def rows_for(self, table: str) -> int:
+        if self.table_rows and table in self.table_rows:
+            return self.table_rows[table]
+        return self.rows
+
+def escape_attribute(value: str) -> str:
+    """Escape text for a double-quoted attribute the way the dump files do."""
+    return value.translate(_XML_ESCAPES)
+
+def _max_length(sql_type: Optional[str]) -> Optional[int]:
+    if sql_type and "(" in sql_type:
+        size = sql_type.split("(", 1)[1].rstrip(")").strip()
+        if size.isdigit():
+            return int(size)
+    return None
+
+class _ValueFactory:
+    """Draw column values for one table from a seeded random generator."""
+
+    def __init__(self, rng: random.Random, options: GenerationOptions) -> None:
+        self.rng = rng
+        self.options = options
+        self.mu = math.log(max(options.body_median, 1))
+        self.max_id = max(options.rows, 1)
+
+    def words(self, count: int) -> str:
+        return " ".join(self.rng.choices(_WORDS, k=max(count, 1)))
+
+    def long_text(self, max_length: Optional[int]) -> str:
+        """HTML paragraphs and code blocks with a lognormal total length."""
+        target = int(self.rng.lognormvariate(self.mu, self.options.body_sigma))
+        if max_length:
+            target = min(target, max_length)
+        target = max(target, 1)
+        parts = []
+        length = 0
+        while length < target:
+            if self.rng.random() < 0.2:
+                code = "\n".join(self.rng.choices(_CODE_LINES, k=self.rng.randint(1, 4)))
+                part = f"<pre><code>{code}</code></pre>\n"
+            else:
+                part = f"<p>{self.words(self.rng.randint(5, 40))}</p>\n"
+            parts.append(part)
+            length += len(part)
+        return "".join(parts)[:target]
+
+    def timestamp(self) -> str:
+        moment = _EPOCH + timedelta(seconds=self.rng.randrange(_SPAN_SECONDS))
+        return f"{moment:%Y-%m-%dT%H:%M:%S}.{self.rng.randrange(1000):03d}"
+
+    def string(self, column: str, sql_type: Optional[str]) -> str:
+        max_length = _max_length(sql_type)
+        if column in LONG_TEXT_COLUMNS:
+            return self.long_text(max_length)
+        if column == "ContentLicense":
+            return self.rng.choice(_LICENSES)
+        if sql_type and sql_type.startswith("uniqueidentifier"):
+            return str(uuid.UUID(int=self.rng.getrandbits(128)))
+        if column == "Tags":
+            return "".join(f"<{tag}>" for tag in self.rng.sample(_WORDS[:40], self.rng.randint(1, 5)))
+        if column.endswith("Url"):
+            return f"https://example.com/{self.rng.randrange(10 ** 6)}/{self.rng.choice(_WORDS[:40])}"
+        value = self.words(self.rng.randint(1, 12))
+        return value[:max_length] if max_length else value
+
+    def value(self, column: str, sql_type: Optional[str]) -> Optional[str]:
+        """A value for a non-Id column, or None for an omitted attribute."""
+        kind = logical_type(sql_type)
+        if column.endswith("Id") and kind.startswith("int"):
+            if kind == "int8":
+                return str(self.rng.randint(1, 16))
+            if self.rng.random() < NULL_FRACTION:
+                return None
+            return str(self.rng.randint(1, self.max_id))
+        if kind.startswith("int"):
+            if self.rng.random() < NULL_FRACTION:
+                return None
+            limit = 100 if kind == "int8" else 10 ** 5
+            return str(int(self.rng.paretovariate(1.2)) % limit)
+        if kind == "bool":
+            return "True" if self.rng.random() < 0.5 else "False"
+        if kind == "timestamp":
+            return self.timestamp()
+        if kind == "float64":
+            return repr(round(self.rng.uniform(0, 1000), 3))
+        if column not in LONG_TEXT_COLUMNS and self.rng.random() < NULL_FRACTION:
+            return None
+        return self.string(column, sql_type)
+
+def generate_table(
+    destinationfilename: str,
+    table: str,
+    columns: List[str],
+    column_types: Dict[str, str],
+    options: GenerationOptions = GenerationOptions()
+) -> int:
+    """Write one synthetic table file and return the number of rows written."""
+    # Seed per table so tables can be regenerated independently
+    rng = random.Random(f"{options.seed}:{table}")
+    factory = _ValueFactory(rng, options)
+    rows = options.rows_for(table)
+
+    with open(destinationfilename, "w", encoding="utf-8", newline="\n") as f:
+        f.write(f'<?xml version="1.0" encoding="utf-8"?>\n<{table.lower()}>\n')
+        for row_id in range(1, rows + 1):
+            attributes = []
+            for column in columns:
+                value = str(row_id) if column == "Id" else factory.value(column, column_types.get(column))
+                if value is not None:
+                    attributes.append(f'{column}="{escape_attribute(value)}"')
+            f.write(f'  <row {" ".join(attributes)} />\n')
+        f.write(f"</{table.lower()}>\n")
+    return rows
+
+def generate_dump(
+    outputdir: str,
+    options: GenerationOptions = GenerationOptions(),
+    tables: Optional[List[str]] = None,
+    config_path: Optional[str] = None
+) -> Dict[str, Dict[str, object]]:
+    """
+    Generate a synthetic dump for every configured table, or the given ones.
+
+    A ``benchmark.json`` manifest with the options and the rows and bytes of
+    every file is written next to the XML files and returned.
+    """
+    table_columns = load_tables_config(config_path)
+    column_types = load_column_types(config_path)
+    unknown = [table for table in tables or [] if table not in table_columns]
+    if unknown:
+        raise ValueError(f"Unknown tables: {', '.join(unknown)}")
+
+    os.makedirs(outputdir, exist_ok=True)
+    files = {}
+    for table, columns in table_columns.items():
+        if tables and table not in tables:
+            continue
+        filename = os.path.join(outputdir, f"{table}.xml")
+        rows = generate_table(filename, table, columns, column_types.get(table, {}), options)
+        files[table] = {"file": f"{table}.xml", "rows": rows, "bytes": os.path.getsize(filename)}
+
+    manifest = {"options": options._asdict(), "tables": files}
+    with open(os.path.join(outputdir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def parse_table_rows(values: List[str]) -> Dict[str, int]:
+    """Parse ``Table=rows`` overrides."""
+    table_rows = {}
+    for value in values:
+        table, separator, rows = value.partition("=")
+        if not separator or not rows.isdigit():
+            raise argparse.ArgumentTypeError(f"Expected Table=rows, got '{value}'")
+        table_rows[table] = int(rows)
+    return table_rows
+
+def add_generation_arguments(parser: argparse.ArgumentParser) -> None:
+    """Arguments shared by the generator and the benchmark runner."""
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS,
+                        help=f"Rows per table (default: {DEFAULT_ROWS})")
+    parser.add_argument("--table-rows", nargs="*", default=[], metavar="TABLE=ROWS",
+                        help="Row count overrides for individual tables")
+    parser.add_argument("--body-median", type=int, default=DEFAULT_BODY_MEDIAN,
+                        help=f"Median length in characters of Body, Text and AboutMe (default: {DEFAULT_BODY_MEDIAN})")
+    parser.add_argument("--body-sigma", type=float, default=DEFAULT_BODY_SIGMA,
+                        help=f"Log-normal sigma of the Body length distribution (default: {DEFAULT_BODY_SIGMA})")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--tables", nargs="*", help="Only generate these tables")
+    parser.add_argument("--config", help="Path to a tables configuration file")
+
+def options_from_args(args: argparse.Namespace) -> GenerationOptions:
+    return GenerationOptions(
+        rows=args.rows,
+        body_median=args.body_median,
+        body_sigma=args.body_sigma,
+        seed=args.seed,
+        table_rows=parse_table_rows(args.table_rows) or None
+    )
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic StackExchange dump")
+    parser.add_argument("outputdir", help="Folder the XML files are written to")
+    add_generation_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        manifest = generate_dump(args.outputdir, options_from_args(args), args.tables, args.config)
+    except (ValueError, argparse.ArgumentTypeError, StackExchangeParserError) as e:
+        parser.error(str(e))
+    json.dump(manifest, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,241 @@
+"""
+Benchmark every writer and parser engine combination on a (synthetic) dump.
+
+Each measurement converts one table in a fresh process so peak RSS is per
+run. Results are written as JSON with the commit and library versions, so
+files from different commits can be compared directly. The parquet-tuned
+writer applies the Parquet options of the config, and Parquet output is
+also timed being read back, to compare sizes and scan speed with the
+defaults.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from multiprocessing import get_context
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from stackexchange_parser import __version__, load_tables_config, load_column_types, load_parquet_options
+from stackexchange_parser.core import PARSER_ENGINES
+from stackexchange_parser.metrics import peak_rss_bytes
+from stackexchange_parser.writers import CSVWriter, ParquetWriter, PYARROW_AVAILABLE
+
+from .generate import MANIFEST_NAME, add_generation_arguments, generate_dump, options_from_args
+
+if PYARROW_AVAILABLE:
+    import pyarrow.parquet as pq
+
+WRITERS = {
+    "csv": CSVWriter,
+    "parquet": ParquetWriter,
+    "parquet-tuned": ParquetWriter,
+}
+_ROW_PATTERN = re.compile(rb"<row[\s/>]")
+
+class Measurement(NamedTuple):
+    """Throughput and resource use of converting one table."""
+    writer: str
+    engine: str
+    table: str
+    rows: int
+    input_bytes: int
+    output_bytes: int
+    seconds: float
+    rows_per_second: float
+    mb_per_second: float
+    peak_rss_bytes: Optional[int]
+    scan_seconds: Optional[float] = None
+
+def count_rows(filename: str) -> int:
+    """Count ``<row`` elements in a dump file without parsing it."""
+    count = 0
+    tail = b""
+    with open(filename, "rb") as f:
+        while True:
+            chunk = f.read(1024 * 1024)
+            if not chunk:
+                break
+            data = tail + chunk
+            count += len(_ROW_PATTERN.findall(data))
+            # A match needs five bytes, so the carried four are never counted twice
+            tail = data[-4:]
+    return count
+
+def measure(
+    writer_name: str,
+    engine: str,
+    table: str,
+    columns: List[str],
+    column_types: Dict[str, str],
+    source: str,
+    outputdir: str,
+    rows: int,
+    config_path: Optional[str] = None
+) -> Measurement:
+    """Convert one table with one writer and engine and measure it."""
+    options = {}
+    if writer_name == "parquet-tuned":
+        options["table_options"] = load_parquet_options(config_path)
+    writer = WRITERS[writer_name](progress_indicator_value=10 ** 12, engine=engine, **options)
+    destination = os.path.join(outputdir, f"{table}_{writer_name}_{engine}{writer.file_extension}")
+    input_bytes = os.path.getsize(source)
+
+    start = time.perf_counter()
+    writer.write_from_xml(source, table, columns, destination, "benchmark", column_types=column_types)
+    seconds = time.perf_counter() - start
+
+    output_bytes = sum(os.path.getsize(filename) for filename in writer.output_files(destination))
+    scan_seconds = None
+    if isinstance(writer, ParquetWriter):
+        start = time.perf_counter()
+        for filename in writer.output_files(destination):
+            pq.read_table(filename)
+        scan_seconds = round(time.perf_counter() - start, 4)
+    for filename in writer.output_files(destination):
+        os.remove(filename)
+    return Measurement(
+        writer=writer_name,
+        engine=engine,
+        table=table,
+        rows=rows,
+        input_bytes=input_bytes,
+        output_bytes=output_bytes,
+        seconds=round(seconds, 4),
+        rows_per_second=round(rows / seconds, 1) if seconds else 0.0,
+        mb_per_second=round(input_bytes / seconds / 1e6, 2) if seconds else 0.0,
+        peak_rss_bytes=peak_rss_bytes(),
+        scan_seconds=scan_seconds
+    )
+
+def _measure_isolated(*args: Any) -> Measurement:
+    # A fresh single-use process per measurement keeps peak RSS from leaking
+    # between runs
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+        return executor.submit(measure, *args).result()
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment() -> Dict[str, Any]:
+    """Describe the code and machine a benchmark ran on."""
+    versions = {"stackexchange_parser": __version__}
+    for module in ("lxml", "pyarrow"):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "versions": versions,
+    }
+
+def run_benchmarks(
+    datadir: str,
+    writers: Optional[List[str]] = None,
+    engines: Optional[List[str]] = None,
+    tables: Optional[List[str]] = None,
+    repeat: int = 1,
+    isolate: bool = True,
+    config_path: Optional[str] = None
+) -> List[Measurement]:
+    """
+    Measure every writer, engine and table combination on the dump in datadir.
+
+    With repeat > 1 the fastest run of each combination is kept. Row counts
+    come from the generator manifest when there is one.
+    """
+    writers = writers or [name for name in WRITERS if not name.startswith("parquet") or PYARROW_AVAILABLE]
+    engines = engines or sorted(PARSER_ENGINES)
+    table_columns = load_tables_config(config_path)
+    column_types = load_column_types(config_path)
+
+    manifest_rows = {}
+    manifest_path = os.path.join(datadir, MANIFEST_NAME)
+    if os.path.isfile(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest_rows = {table: info["rows"] for table, info in json.load(f)["tables"].items()}
+
+    sources = []
+    for table, columns in table_columns.items():
+        source = os.path.join(datadir, f"{table}.xml")
+        if (tables and table not in tables) or not os.path.isfile(source):
+            continue
+        rows = manifest_rows[table] if table in manifest_rows else count_rows(source)
+        sources.append((table, columns, source, rows))
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="se_benchmark_") as outputdir:
+        for writer_name in writers:
+            for engine in engines:
+                for table, columns, source, rows in sources:
+                    args = (
+                        writer_name, engine, table, columns, column_types.get(table, {}), source, outputdir, rows,
+                        config_path
+                    )
+                    runs = [(_measure_isolated if isolate else measure)(*args) for _ in range(repeat)]
+                    best = min(runs, key=lambda run: run.seconds)
+                    logging.info(
+                        "%-8s %-8s %-12s %10.0f rows/s %8.2f MB/s",
+                        writer_name, engine, table, best.rows_per_second, best.mb_per_second
+                    )
+                    results.append(best)
+    return results
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmark the StackExchange writers and parser engines on a synthetic dump"
+    )
+    parser.add_argument("-d", "--data", help="Benchmark an existing dump folder instead of generating one")
+    parser.add_argument("-o", "--output", help="Write the JSON results to this file instead of stdout")
+    parser.add_argument("-w", "--writers", nargs="*", choices=sorted(WRITERS), help="Writers to run (default: all)")
+    parser.add_argument("-e", "--engines", nargs="*", choices=sorted(PARSER_ENGINES), help="Engines to run (default: all)")
+    parser.add_argument("-r", "--repeat", type=int, default=1, help="Runs per combination, fastest is kept (default: 1)")
+    add_generation_arguments(parser)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stderr)
+
+    with tempfile.TemporaryDirectory(prefix="se_dump_") as generated:
+        options = None
+        datadir = args.data
+        if datadir is None:
+            options = options_from_args(args)
+            datadir = generated
+            logging.info("Generating synthetic dump with %s rows per table", options.rows)
+            generate_dump(datadir, options, args.tables, args.config)
+        results = run_benchmarks(datadir, args.writers, args.engines, args.tables, args.repeat, config_path=args.config)
+
+    report = {
+        "environment": environment(),
+        "generation": options._asdict() if options else None,
+        "results": [result._asdict() for result in results],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,49 +1,204 @@
 from .core import (
     load_tables_config,
+    load_column_types,
+    load_parquet_options,
+    ParquetOptions,
     setup_logging,
     find_subfolders_with_data,
+    find_archives_with_data,
     ensure_output_directory,
     get_table_files_in_folder,
+    get_table_members_in_archives,
     StackExchangeParserError,
     ConfigurationError,
     ValidationError
 )
-from .writers import CSVWriter, ParquetWriter
+from .writers import CSVWriter, ParquetWriter, SQLiteWriter, PGCopyWriter, ArrowWriter
+from .readers import read_arrow, read_arrow_site, lookup_rows
+from .idindex import IdIndex, IndexEntry
+from .checkpoint import is_converted
+from .fingerprints import FingerprintStore, source_fingerprint
+from .parallel import ConversionUnit, UnitResult, run_units, DEFAULT_SPLIT_MIN_BYTES
+from .metrics import RunResult, TableMetrics
 
 __version__ = "1.0.0"
 __all__ = [
     "load_tables_config",
+    "load_column_types",
+    "load_parquet_options",
+    "ParquetOptions",
     "setup_logging", 
     "find_subfolders_with_data",
+    "find_archives_with_data",
     "ensure_output_directory",
     "get_table_files_in_folder",
     "CSVWriter",
     "ParquetWriter",
+    "SQLiteWriter",
+    "PGCopyWriter",
+    "ArrowWriter",
+    "read_arrow",
+    "read_arrow_site",
+    "lookup_rows",
+    "IdIndex",
+    "IndexEntry",
     "process_stackexchange_data",
+    "convert_dump",
+    "convert_table",
+    "RunResult",
+    "TableMetrics",
+    "ConversionUnit",
+    "UnitResult",
     "StackExchangeParserError",
     "ConfigurationError",
     "ValidationError"
 ]
 
+def convert_table(
+    source, 
+    destination, 
+    writer, 
+    table: str, 
+    config_path: str = None
+) -> None:
+    """
+    Convert a single table between paths or open binary streams.
+    
+    Args:
+        source: XML file path or binary file-like object, e.g. sys.stdin.buffer
+        destination: Output file path or binary file-like object,
+                     e.g. sys.stdout.buffer
+        writer: Writer instance, e.g. CSVWriter or ParquetWriter
+        table: Name of the table in the configuration
+        config_path: Path to YAML config file (optional)
+    """
+    from .core import source_name
+    
+    tables = load_tables_config(config_path)
+    if table not in tables:
+        raise ConfigurationError(f"Unknown table '{table}'. Configured tables: {', '.join(tables)}")
+    column_types = load_column_types(config_path)
+    
+    writer.write_from_xml(
+        source, table, tables[table], destination, source_name(source),
+        column_types=column_types.get(table)
+    )
+    if writer.id_index and isinstance(destination, str):
+        writer.write_id_indexes(destination)
+
 def process_stackexchange_data(
     inputdir: str, 
     outputdir: str, 
     writer, 
     include_meta: bool = False, 
-    config_path: str = None
+    config_path: str = None,
+    jobs: int = 1,
+    split_parts: int = 1,
+    split_min_bytes: int = DEFAULT_SPLIT_MIN_BYTES,
+    resume: bool = False,
+    refresh: bool = False,
+    content_hash: bool = False,
+    metrics_json: str = None,
+    metrics_prometheus: str = None,
+    profile: bool = False,
+    profile_dir: str = None
 ) -> int:
     """
     Main processing function that handles the complete workflow.
     
+    Converts the dump with convert_dump, which takes the same arguments,
+    and raises if any table failed to convert.
+    
+    Args:
+        metrics_json: Write the per-table metrics of the run to this JSON
+                      file, also when tables failed
+        metrics_prometheus: Write the metrics to this file in the Prometheus
+                            text format, for the node exporter's textfile
+                            collector
+        profile: Log the seconds every table spent parsing, transforming,
+                 encoding and writing once the run is done
+        profile_dir: Save a cProfile dump of every (site, table) conversion
+                     to this directory, passed on to convert_dump; implies
+                     profile
+    
+    Returns:
+        Number of new directories created; with resume or refresh, existing
+        site folders that still had tables to convert are counted too
+    """
+    result = convert_dump(
+        inputdir, outputdir, writer, include_meta, config_path, jobs, split_parts, split_min_bytes,
+        resume, refresh, content_hash, profile_dir
+    )
+    if profile or profile_dir:
+        import logging
+        logging.info("Time per stage in seconds:")
+        for line in result.profile_report().splitlines():
+            logging.info("    %s", line)
+    if metrics_json:
+        result.write_json(metrics_json)
+    if metrics_prometheus:
+        result.write_prometheus(metrics_prometheus)
+    
+    if result.failed:
+        summary = ", ".join(f"{table.site}/{table.table}" for table in result.failed)
+        raise StackExchangeParserError(
+            f"{len(result.failed)} of {len(result.tables)} tables failed to convert: {summary}"
+        )
+    return result.directories
+
+def convert_dump(
+    inputdir: str, 
+    outputdir: str, 
+    writer, 
+    include_meta: bool = False, 
+    config_path: str = None,
+    jobs: int = 1,
+    split_parts: int = 1,
+    split_min_bytes: int = DEFAULT_SPLIT_MIN_BYTES,
+    resume: bool = False,
+    refresh: bool = False,
+    content_hash: bool = False,
+    profile_dir: str = None
+) -> RunResult:
+    """
+    Convert a dump and return the metrics of every converted table.
+    
     Args:
-        inputdir: Input directory containing StackExchange XML files
+        inputdir: Input directory containing StackExchange XML files or
+                  .7z dump archives
         outputdir: Output directory for processed files
-        writer: Writer instance (CSVWriter or ParquetWriter)
+        writer: Writer instance, e.g. CSVWriter or ParquetWriter
         include_meta: Whether to include meta sites
         config_path: Path to YAML config file (optional)
+        jobs: Number of worker processes; each (site, table) pair is converted
+              as a separate unit when greater than 1
+        split_parts: Parse source files of at least split_min_bytes as this
+                     many byte ranges, each in its own worker
+        split_min_bytes: Minimum source file size for splitting
+        resume: Also convert into existing site folders: tables that were
+                converted completely are skipped and interrupted ones
+                continue from their last checkpoint
+        refresh: Also convert into existing site folders, but only the tables
+                 whose source file, columns or writer settings changed since
+                 they were last converted, as recorded in the fingerprint
+                 store of the output folder
+        content_hash: Add a sampled content hash to the source fingerprints,
+                      so sources that were extracted again unchanged are
+                      skipped by refresh
+        profile_dir: Run every conversion under cProfile and save its
+                     statistics as <site>_<table>.prof in this directory
+    
+    With a unified writer every table's sites are combined into one dataset
+    in the output folder once converted. Each run adds the new sites to it;
+    their site folders stay behind, empty, to mark them as converted.
+    Writers with one file per site, such as SQLiteWriter, combine the tables
+    of every site once all are converted.
     
     Returns:
-        Number of new directories created
+        RunResult with the number of new directories, as returned by
+        process_stackexchange_data, and the metrics of every (site, table)
+        converted, including those that failed when converting with
+        several jobs
     """
     import os
     import logging
@@ -52,10 +207,21 @@ def process_stackexchange_data(
     start_time = datetime.now()
     dircounter = 0
     
+    if writer.unified and (resume or refresh):
+        raise ConfigurationError("Unified output cannot be resumed or refreshed; each run adds the new sites")
+    
     # Load table configuration
     tables = load_tables_config(config_path)
+    column_types = load_column_types(config_path)
     
     subfolders = find_subfolders_with_data(inputdir, tables, include_meta)
+    # Extracted folders take precedence over archives of the same site
+    extracted = {os.path.basename(subfolder) for subfolder in subfolders}
+    archive_sites = [
+        (site_name, archives)
+        for site_name, archives in find_archives_with_data(inputdir, tables, include_meta)
+        if site_name not in extracted
+    ]
     
     logging.info("Input  folder: %s", inputdir)
     logging.info("Output folder: %s", outputdir)
@@ -66,20 +232,116 @@ def process_stackexchange_data(
     else:
         logging.info("Skipping meta")
     
+    if jobs > 1:
+        logging.info("Using %s worker processes", jobs)
+    
+    if resume:
+        logging.info("Resuming into existing folders")
+    if refresh:
+        logging.info("Refreshing changed tables in existing folders")
+    
+    # Every converted table gets its fingerprint recorded, so later refresh
+    # runs know what its output was made from
+    store = FingerprintStore(outputdir)
+    entries = {}
+    skipped = []
+    
+    def site_units(site_name, table_sources):
+        units = []
+        for source, table_name, columns in table_sources:
+            destination_file = writer.destination(outputdir, site_name, table_name)
+            key = store.key(site_name, table_name)
+            entry = store.entry(
+                source_fingerprint(source, content_hash), columns,
+                column_types.get(table_name), writer.output_settings(table_name)
+            )
+            converted = is_converted(writer, destination_file)
+            if refresh:
+                changes = store.changes(key, entry) if converted else ["no complete output"]
+                if not changes:
+                    logging.info("Skipping:   %s - %s (unchanged)", site_name, table_name)
+                    skipped.append(key)
+                    continue
+                logging.info("Refreshing: %s - %s (%s)", site_name, table_name, ", ".join(changes))
+            elif resume and converted:
+                logging.info("Skipping:   %s - %s (already converted)", site_name, table_name)
+                skipped.append(key)
+                continue
+            entries[destination_file] = (key, entry)
+            units.append(ConversionUnit(
+                source, table_name, columns, destination_file, site_name,
+                column_types=column_types.get(table_name),
+                resume=resume
+            ))
+        return units
+    
+    units = []
+    sites = []
     for subfolder in subfolders:
         subfolder_name = os.path.basename(subfolder)
         
-        if ensure_output_directory(outputdir, subfolder_name):
-            dircounter += 1
-            
-            table_files = get_table_files_in_folder(subfolder, tables)
-            
-            for source_file, table_name, columns in table_files:
-                file_extension = ".csv" if isinstance(writer, CSVWriter) else ".parquet"
-                destination_file = os.path.join(outputdir, subfolder_name, f"{table_name}{file_extension}")
-                writer.write_from_xml(source_file, table_name, columns, destination_file, subfolder_name)
+        created = ensure_output_directory(outputdir, subfolder_name)
+        if created or resume or refresh:
+            sites.append(subfolder_name)
+            pending = site_units(subfolder_name, get_table_files_in_folder(subfolder, tables))
+            if created or pending:
+                dircounter += 1
+            units.extend(pending)
+    
+    for site_name, archives in archive_sites:
+        created = ensure_output_directory(outputdir, site_name)
+        if created or resume or refresh:
+            sites.append(site_name)
+            pending = site_units(site_name, get_table_members_in_archives(archives, tables))
+            if created or pending:
+                dircounter += 1
+            units.extend(pending)
+    
+    results = run_units(writer, units, jobs, split_parts, split_min_bytes, profile_dir)
+    
+    table_metrics = []
+    for result in results:
+        unit = result.unit
+        table_metrics.append(TableMetrics(
+            site=unit.subfolder_name,
+            table=unit.table_name,
+            rows=result.rows,
+            input_bytes=os.path.getsize(unit.source_file) if isinstance(unit.source_file, str) else None,
+            output_bytes=sum(os.path.getsize(filename) for filename in writer.output_files(unit.destination_file)),
+            seconds=result.elapsed,
+            parse_seconds=result.parse_seconds,
+            peak_rss_bytes=result.peak_rss_bytes,
+            error=result.error,
+            stage_seconds=result.stage_seconds
+        ))
+    
+    if writer.unified:
+        converted_sites = {}
+        for result in results:
+            if result.ok:
+                converted_sites.setdefault(result.unit.table_name, []).append(
+                    (result.unit.subfolder_name, result.unit.destination_file)
+                )
+        for table_name, site_destinations in converted_sites.items():
+            writer.combine_sites(outputdir, table_name, site_destinations)
+    for site_name in sites:
+        writer.combine_tables(outputdir, site_name)
+    
+    if results:
+        for result in results:
+            if result.ok:
+                store.update(*entries[result.unit.destination_file])
+        store.save()
+    if skipped:
+        logging.info("Skipped %s tables: %s", len(skipped), ", ".join(skipped))
     
     elapsed_time = datetime.now() - start_time
-    logging.info("Finished processing, exported to %s new folders in %s", dircounter, elapsed_time)
+    if all(result.ok for result in results):
+        logging.info("Finished processing, exported to %s new folders in %s", dircounter, elapsed_time)
     
-    return dircounter
\ No newline at end of file
+    return RunResult(
+        directories=dircounter,
+        tables=table_metrics,
+        skipped=skipped,
+        seconds=elapsed_time.total_seconds()
+    )
\ No newline at end of file
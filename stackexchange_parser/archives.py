@@ -0,0 +1,265 @@
+import os
+import queue
+import shutil
+import subprocess
+import threading
+from typing import Any, BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from .core import ValidationError
+
+try:
+    import py7zr
+    from py7zr.io import Py7zIO, WriterFactory
+    PY7ZR_AVAILABLE = True
+except ImportError:
+    PY7ZR_AVAILABLE = False
+    Py7zIO = WriterFactory = object
+
+ARCHIVE_EXTENSION = ".7z"
+SEVEN_ZIP_EXECUTABLES = ("7z", "7zz", "7za")
+_STREAM_CHUNK_SIZE = 1024 * 1024
+
+class ArchiveMember(NamedTuple):
+    """An XML file inside a StackExchange .7z dump archive."""
+    archive: str
+    member: str
+
+    def __str__(self) -> str:
+        return f"{self.archive}:{self.member}"
+
+def find_7z_executable() -> Optional[str]:
+    """Return the path of a 7-Zip command line executable, if one is installed."""
+    for name in SEVEN_ZIP_EXECUTABLES:
+        path = shutil.which(name)
+        if path:
+            return path
+    return None
+
+def _require_backend() -> Optional[str]:
+    executable = find_7z_executable()
+    if executable is None and not PY7ZR_AVAILABLE:
+        raise ImportError(
+            "Reading .7z archives requires the 7z command line tool or py7zr. "
+            "Install with: pip install py7zr"
+        )
+    return executable
+
+def site_name_from_archive(archive: str, tables: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Derive the site name from a dump archive filename.
+
+    ``math.stackexchange.com.7z`` belongs to ``math.stackexchange.com``; the
+    per-table archives of the largest site, e.g. ``stackoverflow.com-Posts.7z``,
+    belong to ``stackoverflow.com``.
+    """
+    stem = os.path.basename(archive)
+    if stem.lower().endswith(ARCHIVE_EXTENSION):
+        stem = stem[:-len(ARCHIVE_EXTENSION)]
+    site, separator, table = stem.rpartition("-")
+    if separator and site and (tables is None or table in tables):
+        return site
+    return stem
+
+def list_archive_members(archive: str) -> List[Tuple[str, int]]:
+    """Return (name, uncompressed size) for every file in the archive, in archive order."""
+    executable = _require_backend()
+    try:
+        if executable:
+            output = subprocess.run(
+                [executable, "l", "-slt", "-ba", archive],
+                check=True, capture_output=True
+            ).stdout.decode("utf-8", errors="replace")
+            members = []
+            entry: Dict[str, str] = {}
+            for line in output.splitlines() + [""]:
+                if not line.strip():
+                    if "Path" in entry and entry.get("Folder", "-") != "+":
+                        members.append((entry["Path"], int(entry.get("Size") or 0)))
+                    entry = {}
+                    continue
+                key, _, value = line.partition(" = ")
+                entry[key.strip()] = value
+            return members
+
+        with py7zr.SevenZipFile(archive, mode="r") as seven_zip:
+            return [(info.filename, info.uncompressed) for info in seven_zip.list() if info.is_file]
+    except (OSError, subprocess.CalledProcessError) as e:
+        raise ValidationError(f"Cannot list archive {archive}: {e}")
+    except Exception as e:
+        raise ValidationError(f"Invalid archive {archive}: {e}")
+
+class _LimitedReader:
+    """Reads exactly one member's bytes from a concatenated decompression stream."""
+
+    def __init__(self, stream: BinaryIO, size: int, name: str) -> None:
+        self._stream = stream
+        self._remaining = size
+        self.name = name
+
+    def read(self, size: int = -1) -> bytes:
+        if self._remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._stream.read(size)
+        if not data:
+            raise ValidationError(f"Unexpected end of archive stream in {self.name}")
+        self._remaining -= len(data)
+        return data
+
+    def drain(self) -> None:
+        while self._remaining > 0:
+            self.read(_STREAM_CHUNK_SIZE)
+
+def _iter_members_7z(executable: str, archive: str, members: List[str]) -> Iterator[Tuple[str, BinaryIO]]:
+    sizes = dict(list_archive_members(archive))
+    ordered = [name for name in sizes if name in members]
+    process = subprocess.Popen(
+        [executable, "e", "-so", "-bd", archive] + ordered,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=_STREAM_CHUNK_SIZE
+    )
+    try:
+        for name in ordered:
+            reader = _LimitedReader(process.stdout, sizes[name], f"{archive}:{name}")
+            yield name, reader
+            reader.drain()
+        process.stdout.close()
+        if process.wait() != 0:
+            raise ValidationError(f"7z failed extracting {archive}: {process.stderr.read().decode(errors='replace').strip()}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+class _QueueSink(Py7zIO):
+    """py7zr output object that hands decompressed chunks to the consuming thread."""
+
+    def __init__(self, name: str, chunks: "queue.Queue", cancelled: threading.Event) -> None:
+        self.name = name
+        self._chunks = chunks
+        self._cancelled = cancelled
+        self._size = 0
+
+    def write(self, s: bytes) -> int:
+        if self._cancelled.is_set():
+            raise InterruptedError("Archive extraction cancelled")
+        self._chunks.put((self.name, bytes(s)))
+        self._size += len(s)
+        return len(s)
+
+    def read(self, size: Optional[int] = None) -> bytes:
+        return b""
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._size
+
+    def flush(self) -> None:
+        pass
+
+    def size(self) -> int:
+        return self._size
+
+    def close(self) -> None:
+        self._chunks.put((self.name, None))
+
+class _QueueSinkFactory(WriterFactory):
+    def __init__(self, chunks: "queue.Queue", cancelled: threading.Event) -> None:
+        self._chunks = chunks
+        self._cancelled = cancelled
+
+    def create(self, filename: str) -> Py7zIO:
+        return _QueueSink(filename, self._chunks, self._cancelled)
+
+_END_OF_ARCHIVE = ("", None)
+
+class _QueueReader:
+    """File-like view of one member while py7zr decompresses it on another thread."""
+
+    def __init__(self, name: str, first_chunk: bytes, chunks: "queue.Queue", display_name: str) -> None:
+        self.member = name
+        self.name = display_name
+        self._buffer = first_chunk
+        self._chunks = chunks
+        self._finished = False
+
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = _STREAM_CHUNK_SIZE
+        while len(self._buffer) < size and not self._finished:
+            name, chunk = self._chunks.get()
+            if name != self.member:
+                # Extraction stopped before this member was closed; leave the
+                # end marker for the archive loop
+                self._chunks.put((name, chunk))
+                self._finished = True
+            elif chunk is None:
+                self._finished = True
+            else:
+                self._buffer += chunk
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def drain(self) -> None:
+        while not self._finished:
+            self.read(_STREAM_CHUNK_SIZE)
+        self._buffer = b""
+
+def _iter_members_py7zr(archive: str, members: List[str]) -> Iterator[Tuple[str, BinaryIO]]:
+    chunks: "queue.Queue" = queue.Queue(maxsize=64)
+    cancelled = threading.Event()
+    errors: List[BaseException] = []
+
+    def extract() -> None:
+        try:
+            with py7zr.SevenZipFile(archive, mode="r") as seven_zip:
+                seven_zip.extract(targets=members, factory=_QueueSinkFactory(chunks, cancelled))
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            chunks.put(_END_OF_ARCHIVE)
+
+    thread = threading.Thread(target=extract, name=f"7z-{os.path.basename(archive)}", daemon=True)
+    thread.start()
+    try:
+        while True:
+            name, chunk = chunks.get()
+            if (name, chunk) == _END_OF_ARCHIVE:
+                break
+            if chunk is None:
+                # Empty member: its sink was closed without any writes
+                reader = _QueueReader(name, b"", chunks, f"{archive}:{name}")
+                reader._finished = True
+            else:
+                reader = _QueueReader(name, chunk, chunks, f"{archive}:{name}")
+            yield name, reader
+            reader.drain()
+    finally:
+        if thread.is_alive():
+            # The consumer stopped early: abort extraction and unblock the thread
+            cancelled.set()
+            while chunks.get() != _END_OF_ARCHIVE:
+                pass
+        thread.join()
+    if errors and not cancelled.is_set():
+        raise ValidationError(f"Error extracting archive {archive}: {errors[0]}")
+
+def iter_archive_members(archive: str, members: List[str]) -> Iterator[Tuple[str, BinaryIO]]:
+    """
+    Decompress an archive in a single pass, yielding a stream per requested member.
+
+    Members come out in archive order. Each stream is only valid until the
+    next member is requested; whatever was not read is skipped. Uses the 7z
+    command line tool when installed and py7zr otherwise.
+    """
+    executable = _require_backend()
+    if executable:
+        return _iter_members_7z(executable, archive, members)
+    return _iter_members_py7zr(archive, members)
+
+def find_archives(dirname: str) -> List[str]:
+    """Recursively find .7z files below a directory."""
+    archives = []
+    for root, _, files in os.walk(dirname):
+        for file in files:
+            if file.lower().endswith(ARCHIVE_EXTENSION):
+                archives.append(os.path.join(root, file))
+    return sorted(archives)
@@ -0,0 +1,170 @@
+import json
+import logging
+import os
+from typing import Any, BinaryIO, Dict, List, NamedTuple, Optional, Tuple, Union
+from .core import find_next_row_start, find_row_offset, _find_rows_end
+
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+TEMP_SUFFIX = ".partial"
+
+class Checkpoint(NamedTuple):
+    """
+    Progress of one table conversion, stored next to its output.
+
+    files are the committed output files in order, relative to the folder
+    of the destination. rows of the source have been written to them.
+    offset is a source byte offset just past the start of row offset_rows,
+    or 0 before the first row; the rows after it are only counted when
+    resuming, so committing never reads the source. output_bytes is the
+    committed length of a file that is appended to.
+    """
+    source_size: Optional[int]
+    source_mtime_ns: Optional[int]
+    columns: List[str]
+    settings: Dict[str, Any]
+    files: List[str] = []
+    rows: int = 0
+    offset: int = 0
+    offset_rows: int = 0
+    output_bytes: int = 0
+
+    def same_input(self, other: "Checkpoint") -> bool:
+        """Whether both checkpoints convert the same source with the same columns and writer settings."""
+        return self.source_size is not None and self[:4] == other[:4]
+
+def temp_filename(filename: str) -> str:
+    """Name an output file is written under until it is complete."""
+    return filename + TEMP_SUFFIX
+
+def checkpoint_filename(destinationfilename: str) -> str:
+    directory, name = os.path.split(destinationfilename)
+    return os.path.join(directory, f".{name}{CHECKPOINT_SUFFIX}")
+
+def load_checkpoint(destinationfilename: str) -> Optional[Checkpoint]:
+    """Load the checkpoint of a destination, if an unfinished conversion left one."""
+    filename = checkpoint_filename(destinationfilename)
+    try:
+        with open(filename, 'r', encoding="utf-8") as f:
+            return Checkpoint(**json.load(f))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, TypeError) as e:
+        logging.warning("Ignoring unreadable checkpoint %s: %s", filename, e)
+        return None
+
+def save_checkpoint(destinationfilename: str, checkpoint: Checkpoint) -> None:
+    """Write a checkpoint atomically, so a crash leaves either the old or the new one."""
+    filename = checkpoint_filename(destinationfilename)
+    with open(temp_filename(filename), 'w', encoding="utf-8") as f:
+        json.dump(checkpoint._asdict(), f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_filename(filename), filename)
+
+def is_converted(writer: Any, destinationfilename: str) -> bool:
+    """Whether a destination holds complete output: files exist and no conversion is in progress."""
+    return bool(writer.output_files(destinationfilename)) and \
+        not os.path.exists(checkpoint_filename(destinationfilename))
+
+def _source_fingerprint(sourcefilename: Union[str, BinaryIO]) -> Tuple[Optional[int], Optional[int]]:
+    if not isinstance(sourcefilename, (str, os.PathLike)) or not os.path.isfile(sourcefilename):
+        return None, None
+    stat = os.stat(sourcefilename)
+    return stat.st_size, stat.st_mtime_ns
+
+class CheckpointSession:
+    """
+    Record the committed output of one table conversion.
+
+    With resume, an existing checkpoint for the same source, columns and
+    writer settings whose files are all present is continued; otherwise the
+    conversion starts over and the outputs of the earlier attempt are removed
+    when it starts. Sources that are not files on disk are checkpointed too,
+    so their partial output is never mistaken for complete output, but they
+    cannot be resumed.
+    """
+
+    def __init__(
+        self,
+        sourcefilename: Union[str, BinaryIO],
+        destinationfilename: str,
+        columns: List[str],
+        settings: Dict[str, Any],
+        resume: bool = False
+    ) -> None:
+        self.sourcefilename = sourcefilename
+        self.destinationfilename = destinationfilename
+        self.directory = os.path.dirname(destinationfilename)
+        size, mtime_ns = _source_fingerprint(sourcefilename)
+        current = Checkpoint(size, mtime_ns, list(columns), settings)
+        self.previous = load_checkpoint(destinationfilename)
+        self.resumed = bool(
+            resume and self.previous is not None and self.previous.rows > 0
+            and self.previous.same_input(current) and self._files_present(self.previous)
+        )
+        self.checkpoint = self.previous if self.resumed else current
+
+    def _files_present(self, checkpoint: Checkpoint) -> bool:
+        files = self.paths(checkpoint.files)
+        if not all(os.path.isfile(filename) for filename in files):
+            return False
+        return not checkpoint.output_bytes or os.path.getsize(files[-1]) >= checkpoint.output_bytes
+
+    def paths(self, files: List[str]) -> List[str]:
+        return [os.path.join(self.directory, filename) for filename in files]
+
+    @property
+    def files(self) -> List[str]:
+        """Committed output files, as paths."""
+        return self.paths(self.checkpoint.files)
+
+    @property
+    def rows(self) -> int:
+        return self.checkpoint.rows
+
+    @property
+    def output_bytes(self) -> int:
+        return self.checkpoint.output_bytes
+
+    def start(self, existing_outputs: List[str]) -> None:
+        """Save the initial checkpoint, removing outputs of an earlier attempt unless resuming."""
+        if self.resumed:
+            logging.info("Resuming:   %s after %s rows", os.path.basename(self.destinationfilename), self.rows)
+        else:
+            stale = set(existing_outputs)
+            if self.previous is not None:
+                stale.update(self.paths(self.previous.files))
+            for filename in stale:
+                for candidate in (filename, temp_filename(filename)):
+                    if os.path.isfile(candidate):
+                        os.remove(candidate)
+        save_checkpoint(self.destinationfilename, self.checkpoint)
+
+    def remaining_range(self) -> Optional[Tuple[int, int]]:
+        """Byte range of the rows still to convert, or None to parse the whole source."""
+        if not self.resumed:
+            return None
+        checkpoint = self.checkpoint
+        size = os.path.getsize(self.sourcefilename)
+        with open(self.sourcefilename, 'rb') as f:
+            end = _find_rows_end(f, size)
+            offset = find_row_offset(f, checkpoint.offset, checkpoint.rows - checkpoint.offset_rows)
+            start = find_next_row_start(f, offset)
+        # Later commits and resumes count on from here
+        self.checkpoint = checkpoint._replace(offset=offset, offset_rows=checkpoint.rows)
+        if start is None or start >= end:
+            return (end, end)
+        return (start, end)
+
+    def commit(self, rows: int, files: List[str], output_bytes: int = 0) -> None:
+        """Record that rows source rows are in the given complete output files."""
+        self.checkpoint = self.checkpoint._replace(
+            files=[os.path.relpath(filename, self.directory) for filename in files],
+            rows=rows,
+            output_bytes=output_bytes
+        )
+        save_checkpoint(self.destinationfilename, self.checkpoint)
+
+    def finish(self) -> None:
+        """Drop the checkpoint once the output is complete."""
+        os.remove(checkpoint_filename(self.destinationfilename))
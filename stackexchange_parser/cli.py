@@ -1,28 +1,40 @@
 import argparse
+import os
 import sys
 import logging
-from .core import setup_logging, StackExchangeParserError, ConfigurationError, ValidationError
-from .writers import CSVWriter, ParquetWriter
-from . import process_stackexchange_data, __version__
+from .core import (
+    setup_logging, load_parquet_options, StackExchangeParserError, ConfigurationError, ValidationError,
+    PARSER_ENGINES, DEFAULT_ENGINE
+)
+from .writers import (
+    CSVWriter, ParquetWriter, SQLiteWriter, PGCopyWriter, ArrowWriter, ARROW_COMPRESSIONS, CSV_ENCODERS, DEFAULT_CSV_BUFFER_SIZE, DEFAULT_MAX_OPEN_PARTITIONS,
+    PARTITION_LEVELS
+)
+from .compression import COMPRESSION_EXTENSIONS
+from . import process_stackexchange_data, convert_table, __version__
+
+STDIO = "-"
 
 def create_parser():
     """Create the command line argument parser."""
     parser = argparse.ArgumentParser(
-        description="Convert StackExchange XML dumps to CSV or Parquet format"
+        description="Convert StackExchange XML dumps to CSV, Parquet, Arrow, SQLite or PostgreSQL binary COPY format"
     )
     parser.add_argument(
         "inputdir", 
-        help="Location of the StackExchange files or subfolders"
+        help="Location of the StackExchange files, subfolders or .7z archives; "
+             "with --table an XML file, or - to read from stdin"
     )
     parser.add_argument(
         "outputdir", 
-        help="Export destination folder where subfolders will be created"
+        help="Export destination folder where subfolders will be created; "
+             "with --table - writes to stdout"
     )
     parser.add_argument(
         "-f", "--format", 
-        choices=["csv", "parquet"], 
+        choices=["csv", "parquet", "arrow", "sqlite", "pgcopy"], 
         default="csv",
-        help="Output format (default: csv)"
+        help="Output format (default: csv); pgcopy files load with COPY ... FROM STDIN (FORMAT binary)"
     )
     parser.add_argument(
         "-m", "--meta", 
@@ -35,18 +47,172 @@ def create_parser():
         type=int, 
         default=10000000
     )
+    parser.add_argument(
+        "--progress-interval", 
+        help="Also log progress, with percent of the input parsed, MB/s and ETA per table and for "
+             "the whole run, every this many seconds (default: 30)", 
+        type=float, 
+        default=30.0
+    )
     parser.add_argument(
         "-b", "--batchsize", 
         help="Number of rows per parquet file (parquet format only)", 
         type=int, 
         default=1000000
     )
+    parser.add_argument(
+        "--batch-mb", 
+        help="Also write a Parquet batch out once it holds this many MB of data, keeping batches of "
+             "wide text tables within a memory budget; --batchsize stays the row limit (parquet format only)", 
+        type=int, 
+        default=None
+    )
+    parser.add_argument(
+        "--single-file", 
+        help="Stream each table into one Parquet file as row groups instead of one file per batch (parquet format only)", 
+        action="store_true"
+    )
+    parser.add_argument(
+        "--row-group-size", 
+        help="Maximum rows per Parquet row group in single-file mode (default: batch size)", 
+        type=int, 
+        default=None
+    )
+    parser.add_argument(
+        "--max-file-size", 
+        help="In single-file mode, start a new Parquet file once the current one exceeds this many MB", 
+        type=int, 
+        default=None
+    )
+    parser.add_argument(
+        "--partition-by", 
+        choices=list(PARTITION_LEVELS), 
+        default=None,
+        help="Write each table as a Hive-style partitioned dataset, Table/site=.../year=YYYY[/month=MM]/, "
+             "by its CreationDate or Date (parquet format only)"
+    )
+    parser.add_argument(
+        "--max-open-partitions", 
+        help=f"Partition files kept open at a time with --partition-by (default: {DEFAULT_MAX_OPEN_PARTITIONS})", 
+        type=int, 
+        default=DEFAULT_MAX_OPEN_PARTITIONS
+    )
+    parser.add_argument(
+        "--unified", 
+        help="Combine the sites of every table into one Table.parquet dataset, or one stackexchange.sqlite "
+             "database, with a site column (parquet and sqlite formats only)", 
+        action="store_true"
+    )
+    parser.add_argument(
+        "--id-index", 
+        help="Also write an index of every table's Id, and of PostId for Comments, Votes and PostHistory, "
+             "as Table.Column.idx for point lookups with lookup_rows (csv, parquet and arrow formats)", 
+        action="store_true"
+    )
+    parser.add_argument(
+        "-e", "--engine", 
+        choices=list(PARSER_ENGINES), 
+        default=DEFAULT_ENGINE,
+        help="XML parsing engine (default: lxml); scanner and expat are usually faster on tables with short rows"
+    )
+    parser.add_argument(
+        "--csv-encoder", 
+        choices=list(CSV_ENCODERS), 
+        default="python",
+        help="How CSV rows are encoded (csv format only); arrow encodes whole batches with pyarrow "
+             "and writes the same bytes"
+    )
+    parser.add_argument(
+        "--compress", 
+        choices=list(COMPRESSION_EXTENSIONS), 
+        default=None,
+        help="Compress CSV output in parallel blocks (csv format only); the extension becomes "
+             ".csv.gz, .csv.zst or .csv.bz2"
+    )
+    parser.add_argument(
+        "--arrow-compression", 
+        choices=list(ARROW_COMPRESSIONS), 
+        default=None,
+        help="Compress Arrow IPC files (arrow format only); uncompressed files are memory-mapped "
+             "by read_arrow without copying"
+    )
+    parser.add_argument(
+        "--write-buffer", 
+        help="Output buffer size in KB for CSV and PGCOPY files (default: 1024)", 
+        type=int, 
+        default=DEFAULT_CSV_BUFFER_SIZE // 1024
+    )
+    parser.add_argument(
+        "-t", "--table", 
+        help="Convert a single table, e.g. Posts (required when input or output is -)", 
+        type=str, 
+        default=None
+    )
     parser.add_argument(
         "-c", "--config", 
         help="Path to YAML config file with table definitions", 
         type=str, 
         default=None
     )
+    parser.add_argument(
+        "-j", "--jobs", 
+        help="Number of worker processes converting (site, table) pairs in parallel", 
+        type=int, 
+        default=1
+    )
+    parser.add_argument(
+        "-s", "--split", 
+        help="Parse large XML files as this many byte ranges in parallel (use with --jobs)", 
+        type=int, 
+        default=1
+    )
+    parser.add_argument(
+        "--split-min-size", 
+        help="Minimum XML file size in MB before it is split (default: 256)", 
+        type=int, 
+        default=256
+    )
+    parser.add_argument(
+        "--resume", 
+        help="Convert into existing site folders, skipping finished tables and continuing "
+             "interrupted ones from their last checkpoint", 
+        action="store_true"
+    )
+    parser.add_argument(
+        "--refresh", 
+        help="Convert into existing site folders, but only tables whose source file, columns or "
+             "writer settings changed since the last run", 
+        action="store_true"
+    )
+    parser.add_argument(
+        "--content-hash", 
+        help="Also fingerprint sources by a sampled content hash, so re-extracted but unchanged "
+             "files are not reconverted by --refresh", 
+        action="store_true"
+    )
+    parser.add_argument(
+        "--metrics-json", 
+        help="Write rows, bytes, timings and peak memory of every converted table to this JSON file", 
+        type=str, 
+        default=None
+    )
+    parser.add_argument(
+        "--metrics-prometheus", 
+        help="Write the same metrics to this .prom file for the Prometheus node exporter's textfile collector", 
+        type=str, 
+        default=None
+    )
+    parser.add_argument(
+        "--profile", 
+        help="Log the seconds every table spent parsing, transforming, encoding and writing", 
+        action="store_true"
+    )
+    parser.add_argument(
+        "--profile-dir", 
+        help="Save a cProfile dump of every (site, table) conversion to this directory; implies --profile", 
+        type=str, 
+        default=None
+    )
     parser.add_argument(
         "--version",
         action="version",
@@ -65,23 +231,77 @@ def main(args=None):
     try:
         # Create appropriate writer based on format
         if args.format == "csv":
-            writer = CSVWriter()
+            writer = CSVWriter(
+                progress_indicator_value=args.progressindicatorvalue, 
+                progress_interval=args.progress_interval,
+                engine=args.engine,
+                buffer_size=args.write_buffer * 1024,
+                encoder=args.csv_encoder,
+                compression=args.compress,
+                id_index=args.id_index
+            )
         elif args.format == "parquet":
             writer = ParquetWriter(
                 progress_indicator_value=args.progressindicatorvalue, 
-                batch_size=args.batchsize
+                progress_interval=args.progress_interval,
+                batch_size=args.batchsize,
+                batch_bytes=args.batch_mb * 1024 * 1024 if args.batch_mb else None,
+                single_file=args.single_file,
+                row_group_size=args.row_group_size,
+                max_file_bytes=args.max_file_size * 1024 * 1024 if args.max_file_size else None,
+                engine=args.engine,
+                table_options=load_parquet_options(args.config),
+                partition_by=args.partition_by,
+                max_open_partitions=args.max_open_partitions,
+                unified=args.unified,
+                id_index=args.id_index
+            )
+        elif args.format == "arrow":
+            writer = ArrowWriter(
+                progress_indicator_value=args.progressindicatorvalue, 
+                progress_interval=args.progress_interval,
+                engine=args.engine,
+                compression=args.arrow_compression,
+                id_index=args.id_index
+            )
+        elif args.format == "sqlite":
+            writer = SQLiteWriter(
+                progress_indicator_value=args.progressindicatorvalue, 
+                progress_interval=args.progress_interval,
+                engine=args.engine,
+                unified=args.unified
+            )
+        elif args.format == "pgcopy":
+            writer = PGCopyWriter(
+                progress_indicator_value=args.progressindicatorvalue, 
+                progress_interval=args.progress_interval,
+                engine=args.engine,
+                buffer_size=args.write_buffer * 1024
             )
         else:
-            print(f"Error: Unsupported format '{args.format}'. Use 'csv' or 'parquet'.", file=sys.stderr)
+            print(f"Error: Unsupported format '{args.format}'. Use 'csv', 'parquet', 'arrow', 'sqlite' or 'pgcopy'.", file=sys.stderr)
             sys.exit(1)
         
+        if args.table or STDIO in (args.inputdir, args.outputdir):
+            return convert_single_table(args, writer)
+        
         # Process the data
         return process_stackexchange_data(
             inputdir=args.inputdir,
             outputdir=args.outputdir,
             writer=writer,
             include_meta=args.meta,
-            config_path=args.config
+            config_path=args.config,
+            jobs=args.jobs,
+            split_parts=args.split,
+            split_min_bytes=args.split_min_size * 1024 * 1024,
+            resume=args.resume,
+            refresh=args.refresh,
+            content_hash=args.content_hash,
+            metrics_json=args.metrics_json,
+            metrics_prometheus=args.metrics_prometheus,
+            profile=args.profile,
+            profile_dir=args.profile_dir
         )
         
     except ConfigurationError as e:
@@ -102,6 +322,53 @@ def main(args=None):
         print(f"Unexpected Error: {e}", file=sys.stderr)
         sys.exit(1)
 
+def convert_single_table(args, writer) -> None:
+    """
+    Convert one table, using stdin/stdout when input or output is -.
+    
+    A file or directory input is read as the table's XML file; a directory
+    output receives the table's file like in a full conversion. Options that
+    only apply to whole-folder conversions are rejected rather than ignored.
+    """
+    if not args.table:
+        raise ValidationError("--table is required when reading from stdin or writing to stdout")
+    unsupported = [
+        option for option, used in (
+            ("--meta", args.meta),
+            ("--jobs", args.jobs != 1),
+            ("--split", args.split != 1),
+            ("--resume", args.resume),
+            ("--refresh", args.refresh),
+            ("--content-hash", args.content_hash),
+            ("--unified", args.unified),
+            ("--metrics-json", args.metrics_json),
+            ("--metrics-prometheus", args.metrics_prometheus),
+            ("--profile", args.profile),
+            ("--profile-dir", args.profile_dir),
+        ) if used
+    ]
+    if unsupported:
+        raise ValidationError(f"{', '.join(unsupported)} cannot be used when converting a single table")
+    
+    if args.inputdir == STDIO:
+        source = sys.stdin.buffer
+    elif os.path.isdir(args.inputdir):
+        source = os.path.join(args.inputdir, f"{args.table}.xml")
+    else:
+        source = args.inputdir
+    if isinstance(source, str) and not os.path.isfile(source):
+        raise ValidationError(f"Source file does not exist: {source}")
+    
+    if args.outputdir == STDIO:
+        destination = sys.stdout.buffer
+    else:
+        os.makedirs(args.outputdir, exist_ok=True)
+        destination = os.path.join(args.outputdir, f"{args.table}{writer.file_extension}")
+    
+    convert_table(source, destination, writer, args.table, args.config)
+    if destination is sys.stdout.buffer:
+        destination.flush()
+
 def cli_main():
     """Entry point for console script."""
     main()
@@ -0,0 +1,166 @@
+import bz2
+import io
+import os
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Deque, Optional
+from .core import ConfigurationError
+
+try:
+    import zstandard
+    ZSTANDARD_AVAILABLE = True
+except ImportError:
+    ZSTANDARD_AVAILABLE = False
+
+# File extension appended to the output extension for every compression
+COMPRESSION_EXTENSIONS = {
+    "gzip": ".gz",
+    "zstd": ".zst",
+    "bz2": ".bz2",
+}
+COMPRESSION_LEVELS = {
+    "gzip": 6,
+    "zstd": 3,
+    "bz2": 9,
+}
+DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+def validate_compression(compression: Optional[str]) -> Optional[str]:
+    """Check that a compression name is known and its library installed, returning it."""
+    if compression is None:
+        return None
+    if compression not in COMPRESSION_EXTENSIONS:
+        raise ConfigurationError(
+            f"Unknown compression '{compression}'. Choose from: {', '.join(COMPRESSION_EXTENSIONS)}"
+        )
+    if compression == "zstd" and not ZSTANDARD_AVAILABLE:
+        raise ImportError("zstandard is required for zstd compression. Install with: pip install zstandard")
+    return compression
+
+def _compress_gzip(block: bytes) -> bytes:
+    # A complete gzip member with a zero timestamp, so equal input compresses to equal bytes
+    compressor = zlib.compressobj(COMPRESSION_LEVELS["gzip"], zlib.DEFLATED, 31)
+    return compressor.compress(block) + compressor.flush()
+
+def _compress_zstd(block: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=COMPRESSION_LEVELS["zstd"]).compress(block)
+
+def _compress_bz2(block: bytes) -> bytes:
+    return bz2.compress(block, COMPRESSION_LEVELS["bz2"])
+
+def block_compressor(compression: str) -> Callable[[bytes], bytes]:
+    """Function compressing one block into a self-contained gzip member, zstd frame or bz2 stream."""
+    return {
+        "gzip": _compress_gzip,
+        "zstd": _compress_zstd,
+        "bz2": _compress_bz2,
+    }[validate_compression(compression)]
+
+def _decompressor(compression: str) -> Any:
+    if compression == "gzip":
+        return zlib.decompressobj(31)
+    if compression == "zstd":
+        return zstandard.ZstdDecompressor().decompressobj()
+    return bz2.BZ2Decompressor()
+
+def first_member_size(f: BinaryIO, compression: str) -> int:
+    """
+    Compressed size of the first block of a file written by BlockCompressedWriter.
+
+    Reads from the current position and seeks back to it.
+    """
+    start = f.tell()
+    decompressor = _decompressor(compression)
+    consumed = 0
+    while not decompressor.eof:
+        chunk = f.read(io.DEFAULT_BUFFER_SIZE)
+        if not chunk:
+            raise ValueError("Compressed file ends inside its first block")
+        decompressor.decompress(chunk)
+        consumed += len(chunk)
+    f.seek(start)
+    return consumed - len(decompressor.unused_data)
+
+class BlockCompressedWriter(io.BufferedIOBase):
+    """
+    Binary file object that compresses what is written to it in blocks on a thread pool.
+
+    Every block of block_size bytes is compressed on its own into a gzip
+    member, zstd frame or bz2 stream, and the compressed blocks are written
+    to the underlying file in order. Concatenated blocks are a valid file for
+    the standard tools. zlib, bz2 and zstandard release the GIL while
+    compressing, so the blocks are compressed in parallel with parsing.
+
+    flush() ends the current block early and waits until everything written
+    so far is in the underlying file, so the file can later be truncated
+    there and appended to. The underlying file is closed on close() only when
+    owned.
+    """
+
+    def __init__(
+        self,
+        raw: BinaryIO,
+        compression: str,
+        threads: Optional[int] = None,
+        block_size: Optional[int] = None,
+        owned: bool = True
+    ) -> None:
+        super().__init__()
+        self.raw = raw
+        self.compress_block = block_compressor(compression)
+        self.block_size = block_size or DEFAULT_BLOCK_SIZE
+        self.owned = owned
+        self.threads = threads or min(32, os.cpu_count() or 1)
+        self._executor = ThreadPoolExecutor(self.threads)
+        # At most two blocks per thread wait for compression or to be written
+        self._pending: Deque["Future[bytes]"] = deque()
+        self._buffer = bytearray()
+
+    def writable(self) -> bool:
+        return True
+
+    @property
+    def name(self) -> str:
+        return self.raw.name
+
+    def fileno(self) -> int:
+        return self.raw.fileno()
+
+    def write(self, data: Any) -> int:
+        if self.closed:
+            raise ValueError("write to closed file")
+        data = memoryview(data).cast('B')
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[:self.block_size]))
+            del self._buffer[:self.block_size]
+        return len(data)
+
+    def _submit(self, block: bytes) -> None:
+        self._pending.append(self._executor.submit(self.compress_block, block))
+        while len(self._pending) > 2 * self.threads:
+            self.raw.write(self._pending.popleft().result())
+
+    def flush(self) -> None:
+        if self.closed:
+            return
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+        while self._pending:
+            self.raw.write(self._pending.popleft().result())
+        self.raw.flush()
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            for future in self._pending:
+                future.cancel()
+            self._executor.shutdown(wait=True)
+            super().close()
+            if self.owned:
+                self.raw.close()
@@ -1,9 +1,12 @@
 from lxml import etree
 from pathlib import Path
+from xml.parsers import expat
 import os
+import re
 import logging
 import yaml
-from typing import Dict, List, Optional, Tuple, Iterator, Callable, Any, Union
+from itertools import islice
+from typing import BinaryIO, Dict, List, NamedTuple, Optional, Sequence, Tuple, Iterator, Callable, Any, Union
 
 class StackExchangeParserError(Exception):
     """Base exception for StackExchange parser errors."""
@@ -17,10 +20,41 @@ class ValidationError(StackExchangeParserError):
     """Raised when input validation fails."""
     pass
 
-def load_tables_config(config_path: Optional[str] = None) -> Dict[str, List[str]]:
-    """Load table configuration from YAML file with validation."""
+# SQL Server column types used by the DDL in the package's SQLServer/*.sql, mapped to the
+# logical types the writers know how to produce
+SQL_LOGICAL_TYPES = {
+    "bigint": "int64",
+    "int": "int32",
+    "smallint": "int16",
+    "tinyint": "int8",
+    "bit": "bool",
+    "datetime": "timestamp",
+    "datetime2": "timestamp",
+    "date": "timestamp",
+    "float": "float64",
+    "real": "float64",
+    "uniqueidentifier": "string",
+    "char": "string",
+    "nchar": "string",
+    "varchar": "string",
+    "nvarchar": "string",
+    "text": "string",
+    "ntext": "string",
+}
+
+DDL_COLUMN_PATTERN = re.compile(r"^\s*\[?(\w+)\]?\s+(\w+)\s*(?:\(\s*(\w+)\s*\))?", re.IGNORECASE)
+DDL_TABLE_PATTERN = re.compile(r"create\s+table\s+(?:\w+\.)?\[?(\w+)\]?\s*\((.*?)^\s*\)", re.IGNORECASE | re.DOTALL | re.MULTILINE)
+
+def default_config_path() -> str:
+    return os.path.join(os.path.dirname(__file__), "..", "config", "tables.yaml")
+
+def default_ddl_dir() -> str:
+    return os.path.join(os.path.dirname(__file__), "SQLServer")
+
+def _read_config(config_path: Optional[str] = None) -> Dict[str, Any]:
+    """Read a YAML config file and validate its top-level structure."""
     if config_path is None:
-        config_path = os.path.join(os.path.dirname(__file__), "..", "config", "tables.yaml")
+        config_path = default_config_path()
     
     # Validate config file exists
     if not os.path.isfile(config_path):
@@ -41,21 +75,237 @@ def load_tables_config(config_path: Optional[str] = None) -> Dict[str, List[str]
     if 'tables' not in config:
         raise ConfigurationError("Configuration file must contain a 'tables' section")
     
-    tables = config['tables']
-    if not isinstance(tables, dict):
+    if not isinstance(config['tables'], dict):
         raise ConfigurationError("'tables' section must be a dictionary")
     
-    # Validate each table configuration
-    for table_name, columns in tables.items():
-        if not isinstance(columns, list):
-            raise ConfigurationError(f"Table '{table_name}' must have a list of columns, got {type(columns)}")
-        if not columns:
-            raise ConfigurationError(f"Table '{table_name}' must have at least one column")
-        if not all(isinstance(col, str) for col in columns):
+    return config
+
+def _parse_column_entries(table_name: str, columns: Any) -> List[Tuple[str, Optional[str]]]:
+    """
+    Validate the column list of one table.
+    
+    Columns are either plain names or single-key mappings from name to a SQL
+    Server type, e.g. ``- Score: int``.
+    """
+    if not isinstance(columns, list):
+        raise ConfigurationError(f"Table '{table_name}' must have a list of columns, got {type(columns)}")
+    if not columns:
+        raise ConfigurationError(f"Table '{table_name}' must have at least one column")
+    
+    entries = []
+    for col in columns:
+        if isinstance(col, str):
+            entries.append((col, None))
+        elif isinstance(col, dict) and len(col) == 1:
+            name, sql_type = next(iter(col.items()))
+            if not isinstance(name, str) or not isinstance(sql_type, str):
+                raise ConfigurationError(f"Column type declarations in table '{table_name}' must map a name to a type string")
+            entries.append((name, normalize_sql_type(sql_type, f"{table_name}.{name}")))
+        else:
             raise ConfigurationError(f"All columns in table '{table_name}' must be strings")
+    return entries
+
+def load_tables_config(config_path: Optional[str] = None) -> Dict[str, List[str]]:
+    """Load table configuration from YAML file with validation."""
+    config = _read_config(config_path)
+    return {
+        table_name: [name for name, _ in _parse_column_entries(table_name, columns)]
+        for table_name, columns in config['tables'].items()
+    }
+
+def normalize_sql_type(sql_type: str, column: str = "") -> str:
+    """Lower-case a SQL Server type and check that it is supported."""
+    normalized = sql_type.strip().lower()
+    base_type = normalized.split("(", 1)[0].strip()
+    if base_type not in SQL_LOGICAL_TYPES:
+        raise ConfigurationError(f"Unsupported column type '{sql_type}' for {column or 'column'}")
+    return normalized
+
+def logical_type(sql_type: Optional[str]) -> str:
+    """Map a SQL Server type such as ``nvarchar(max)`` to its logical type; untyped columns are strings."""
+    if sql_type is None:
+        return "string"
+    return SQL_LOGICAL_TYPES[sql_type.split("(", 1)[0].strip()]
+
+def parse_ddl_types(sql: str) -> Dict[str, Dict[str, str]]:
+    """Extract column types from ``CREATE TABLE`` statements."""
+    tables = {}
+    for match in DDL_TABLE_PATTERN.finditer(sql):
+        table_name, body = match.group(1), match.group(2)
+        column_types = {}
+        for line in body.split(","):
+            column = DDL_COLUMN_PATTERN.match(line)
+            if not column:
+                continue
+            name, base_type, length = column.groups()
+            if base_type.lower() not in SQL_LOGICAL_TYPES:
+                continue
+            column_types[name] = base_type.lower() + (f"({length.lower()})" if length else "")
+        tables[table_name] = column_types
+    return tables
+
+def load_ddl_types(ddl_dir: Optional[str] = None) -> Dict[str, Dict[str, str]]:
+    """
+    Load column types from every ``*.sql`` file in the DDL directory.
+    
+    The default DDL directory ships inside the package; should it be missing,
+    a warning is logged and columns are typed by the YAML config only. A
+    missing ddl_dir that was passed explicitly is a configuration error.
+    """
+    if ddl_dir is None:
+        ddl_dir = default_ddl_dir()
+        if not os.path.isdir(ddl_dir):
+            logging.warning(f"No DDL directory at {ddl_dir}; using the column types of the config only")
+            return {}
+    if not os.path.isdir(ddl_dir):
+        raise ConfigurationError(f"DDL directory not found: {ddl_dir}")
     
+    tables = {}
+    for filename in sorted(os.listdir(ddl_dir)):
+        if not filename.lower().endswith(".sql"):
+            continue
+        try:
+            with open(os.path.join(ddl_dir, filename), 'r', encoding='utf-8') as f:
+                tables.update(parse_ddl_types(f.read()))
+        except OSError as e:
+            raise ConfigurationError(f"Error reading DDL file {filename}: {e}")
     return tables
 
+def load_column_types(
+    config_path: Optional[str] = None, 
+    ddl_dir: Optional[str] = None
+) -> Dict[str, Dict[str, str]]:
+    """
+    Load the SQL Server type of every configured column.
+    
+    Types come from the DDL files, overridden by types declared in the YAML
+    config. Columns without a known type are left out and written as strings.
+    """
+    config = _read_config(config_path)
+    ddl_types = load_ddl_types(ddl_dir)
+    
+    column_types = {}
+    for table_name, columns in config['tables'].items():
+        table_ddl = ddl_types.get(table_name, {})
+        types = {}
+        for name, sql_type in _parse_column_entries(table_name, columns):
+            if sql_type is None:
+                sql_type = table_ddl.get(name)
+            if sql_type is not None:
+                types[name] = sql_type
+        column_types[table_name] = types
+    return column_types
+
+# Parquet options accepted per column, and per table where they apply to
+# every column of the table
+PARQUET_COLUMN_OPTIONS = {
+    "dictionary": bool,
+    "compression": str,
+    "compression_level": int,
+    "byte_stream_split": bool,
+    "statistics": bool,
+}
+PARQUET_TABLE_OPTIONS = {**PARQUET_COLUMN_OPTIONS, "row_group_size": int}
+PARQUET_COMPRESSIONS = ("none", "snappy", "gzip", "brotli", "lz4", "zstd")
+
+class ParquetOptions(NamedTuple):
+    """
+    Parquet write options of one table from the ``parquet`` config section.
+    
+    table holds the options of the table, including the configured
+    defaults; columns holds per-column options, which take precedence.
+    """
+    table: Dict[str, Any] = {}
+    columns: Dict[str, Dict[str, Any]] = {}
+    
+    def column_option(self, column: str, option: str) -> Any:
+        """Value of an option for one column, or None when it is not configured."""
+        return self.columns.get(column, {}).get(option, self.table.get(option))
+
+def _parse_parquet_options(where: str, options: Any, allowed: Dict[str, type]) -> Dict[str, Any]:
+    """Validate a mapping of Parquet options."""
+    if options is None:
+        return {}
+    if not isinstance(options, dict):
+        raise ConfigurationError(f"Parquet options for {where} must be a dictionary, got {type(options)}")
+    
+    parsed = {}
+    for option, value in options.items():
+        if option not in allowed:
+            raise ConfigurationError(
+                f"Unknown Parquet option '{option}' for {where}. Choose from: {', '.join(allowed)}"
+            )
+        # bool is a subclass of int, so it is excluded from integer options explicitly
+        if not isinstance(value, allowed[option]) or (allowed[option] is int and isinstance(value, bool)):
+            raise ConfigurationError(f"Parquet option '{option}' for {where} must be a {allowed[option].__name__}")
+        if option == "compression":
+            value = value.lower()
+            if value not in PARQUET_COMPRESSIONS:
+                raise ConfigurationError(
+                    f"Unknown Parquet compression '{value}' for {where}. Choose from: {', '.join(PARQUET_COMPRESSIONS)}"
+                )
+        if option == "row_group_size" and value <= 0:
+            raise ConfigurationError(f"Parquet row group size for {where} must be greater than 0")
+        parsed[option] = value
+    return parsed
+
+def load_parquet_options(config_path: Optional[str] = None) -> Dict[str, ParquetOptions]:
+    """
+    Load the Parquet write options of every configured table.
+    
+    The optional ``parquet`` section has ``defaults`` applied to every table
+    and ``tables`` with options per table, whose ``columns`` mapping holds
+    options per column, e.g.::
+    
+        parquet:
+          defaults:
+            compression: zstd
+          tables:
+            Posts:
+              row_group_size: 250000
+              columns:
+                PostTypeId: {dictionary: true}
+                Body: {dictionary: false, compression_level: 9}
+    """
+    config = _read_config(config_path)
+    section = config.get('parquet') or {}
+    if not isinstance(section, dict):
+        raise ConfigurationError("'parquet' section must be a dictionary")
+    unknown = set(section) - {'defaults', 'tables'}
+    if unknown:
+        raise ConfigurationError(f"Unknown keys in 'parquet' section: {', '.join(sorted(unknown))}")
+    
+    defaults = _parse_parquet_options("all tables", section.get('defaults'), PARQUET_TABLE_OPTIONS)
+    table_sections = section.get('tables') or {}
+    if not isinstance(table_sections, dict):
+        raise ConfigurationError("'parquet.tables' section must be a dictionary")
+    for table_name in table_sections:
+        if table_name not in config['tables']:
+            raise ConfigurationError(f"Parquet options given for unknown table '{table_name}'")
+    
+    options = {}
+    for table_name, columns in config['tables'].items():
+        table_section = table_sections.get(table_name) or {}
+        if not isinstance(table_section, dict):
+            raise ConfigurationError(f"Parquet options for table '{table_name}' must be a dictionary")
+        table_options = {k: v for k, v in table_section.items() if k != 'columns'}
+        column_sections = table_section.get('columns') or {}
+        if not isinstance(column_sections, dict):
+            raise ConfigurationError(f"Parquet column options for table '{table_name}' must be a dictionary")
+        
+        names = {name for name, _ in _parse_column_entries(table_name, columns)}
+        column_options = {}
+        for name, column_section in column_sections.items():
+            if name not in names:
+                raise ConfigurationError(f"Parquet options given for unknown column '{table_name}.{name}'")
+            column_options[name] = _parse_parquet_options(f"{table_name}.{name}", column_section, PARQUET_COLUMN_OPTIONS)
+        
+        options[table_name] = ParquetOptions(
+            {**defaults, **_parse_parquet_options(f"table '{table_name}'", table_options, PARQUET_TABLE_OPTIONS)},
+            column_options
+        )
+    return options
+
 def get_stackexchange_files(tables: Dict[str, List[str]]) -> List[str]:
     """Generate list of expected XML files from table configuration."""
     return [f"{table}.xml" for table in tables]
@@ -100,34 +350,488 @@ def transform_column(column: Any) -> Union[int, str]:
     else:
         return column.replace("\r\n","&#xD;&#xA;").replace("\r","&#xD;").replace("\n", "&#xA;")
 
-def parse_xml_rows(
-    sourcefilename: str, 
-    columns: List[str], 
-    progress_callback: Optional[Callable[[int], None]] = None
-) -> Iterator[List[Union[int, str, None]]]:
-    """Parse XML file and yield rows with error handling."""
+def transform_values(values: Sequence[Optional[str]]) -> List[Union[int, str, None]]:
+    """
+    Apply transform_column to a whole column of values at once.
+    
+    The boolean mapping only runs for columns holding "True" or "False", and
+    line breaks are escaped in one pass over all values joined by NUL, which
+    cannot occur in XML text. None stays None.
+    """
+    values = list(values)
+    plain = None not in values
+    if "True" in values or "False" in values:
+        values = [0 if value == "False" else 1 if value == "True" else value for value in values]
+        plain = False
+    
+    strings = values if plain else [value if isinstance(value, str) else "" for value in values]
+    joined = "\0".join(strings)
+    if "\n" not in joined and "\r" not in joined:
+        return values
+    escaped = joined.replace("\r\n","&#xD;&#xA;").replace("\r","&#xD;").replace("\n", "&#xA;").split("\0")
+    if plain:
+        return escaped
+    return [new if isinstance(value, str) else value for value, new in zip(values, escaped)]
+
+ROW_START = b"<row"
+_SCAN_CHUNK_SIZE = 1024 * 1024
+
+def _is_row_start(data: bytes, index: int) -> bool:
+    """Check that a ``<row`` match is followed by whitespace or the tag end."""
+    following = data[index + len(ROW_START):index + len(ROW_START) + 1]
+    return following in (b" ", b"\t", b"\r", b"\n", b"/", b">")
+
+def find_next_row_start(f: Any, offset: int) -> Optional[int]:
+    """Return the byte offset of the first ``<row`` element at or after offset."""
+    f.seek(offset)
+    position = offset
+    tail = b""
+    while True:
+        chunk = f.read(_SCAN_CHUNK_SIZE)
+        if not chunk:
+            return None
+        data = tail + chunk
+        base = position - len(tail)
+        index = data.find(ROW_START)
+        while index != -1:
+            if index + len(ROW_START) >= len(data):
+                break  # need the next chunk to check the following byte
+            if _is_row_start(data, index):
+                return base + index
+            index = data.find(ROW_START, index + 1)
+        position += len(chunk)
+        tail = data[-len(ROW_START):]
+
+_ROW_START_PATTERN = re.compile(re.escape(ROW_START) + rb"[ \t\r\n/>]")
+
+def find_row_offset(f: Any, offset: int, rows: int) -> int:
+    """
+    Return the offset just past the ``rows``-th ``<row`` start at or after offset.
+
+    find_next_row_start on the result gives the row after them, so a
+    conversion that has written ``rows`` rows can continue from there.
+    """
+    if rows <= 0:
+        return offset
+    f.seek(offset)
+    position = offset
+    tail = b""
+    while True:
+        chunk = f.read(_SCAN_CHUNK_SIZE)
+        if not chunk:
+            raise ValidationError(f"Fewer than {rows} rows after offset {offset}")
+        data = tail + chunk
+        base = position - len(tail)
+        for match in _ROW_START_PATTERN.finditer(data):
+            rows -= 1
+            if rows == 0:
+                return base + match.start() + len(ROW_START)
+        position += len(chunk)
+        # A match is one byte longer than the tail, so no row is counted twice
+        tail = data[-len(ROW_START):]
+
+def _find_rows_end(f: Any, size: int) -> int:
+    """Return the offset of the root closing tag, i.e. the end of the last row."""
+    window = min(size, 64 * 1024)
+    f.seek(size - window)
+    data = f.read(window)
+    index = data.rfind(b"</")
+    if index == -1 or data.rfind(b"/>") > index:
+        return size
+    return size - window + index
+
+def split_xml_file(sourcefilename: str, parts: int) -> List[Tuple[int, int]]:
+    """
+    Split an XML dump into at most ``parts`` byte ranges aligned to ``<row`` starts.
+
+    Every StackExchange record is a self-contained ``<row .../>`` element and
+    attribute values never contain a literal ``<``, so each range can be
+    parsed independently with parse_xml_rows(byte_range=...).
+    """
+    if parts < 1:
+        raise ValueError("Number of parts must be at least 1")
     if not os.path.isfile(sourcefilename):
         raise ValidationError(f"Source file does not exist: {sourcefilename}")
     
-    try:
-        context = etree.iterparse(sourcefilename, events=('end',), tag='row')
-        rowcounter = 0
+    size = os.path.getsize(sourcefilename)
+    with open(sourcefilename, 'rb') as f:
+        first = find_next_row_start(f, 0)
+        if first is None:
+            return []
+        end = _find_rows_end(f, size)
         
-        for event, element in context:
-            rowcounter += 1
-            if progress_callback:
-                progress_callback(rowcounter)
-            
-            row = [transform_column(element.attrib[column]) if column in element.attrib else None for column in columns]
-            yield row
-            
-            while element.getprevious() is not None:
-                del element.getparent()[0]
-                
-    except etree.XMLSyntaxError as e:
-        raise ValidationError(f"Invalid XML in file {sourcefilename}: {e}")
+        boundaries = [first]
+        for i in range(1, parts):
+            target = first + (end - first) * i // parts
+            if target <= boundaries[-1]:
+                continue
+            start = find_next_row_start(f, target)
+            if start is None or start >= end:
+                break
+            if start > boundaries[-1]:
+                boundaries.append(start)
+    
+    boundaries.append(end)
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+class XMLRangeReader:
+    """File-like reader exposing one byte range of a dump as a standalone XML document."""
+    
+    def __init__(self, sourcefilename: str, start: int, end: int) -> None:
+        self._file = open(sourcefilename, 'rb')
+        self._file.seek(start)
+        self._remaining = end - start
+        self._pending = b"<rows>"
+        self._closed_root = False
+    
+    def read(self, size: int = -1) -> bytes:
+        if size is None or size < 0:
+            size = _SCAN_CHUNK_SIZE
+        data = self._pending
+        self._pending = b""
+        if len(data) < size and self._remaining > 0:
+            chunk = self._file.read(min(size - len(data), self._remaining))
+            self._remaining -= len(chunk)
+            if not chunk:
+                self._remaining = 0
+            data += chunk
+        if self._remaining <= 0 and not self._closed_root and len(data) < size:
+            self._closed_root = True
+            data += b"</rows>"
+        return data
+    
+    def close(self) -> None:
+        self._file.close()
+
+def source_name(source: Any) -> str:
+    """Describe a file path or binary file-like object in messages."""
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return str(getattr(source, "name", "<stream>"))
+
+class RowScanError(ValueError):
+    """Raised by the scanner engine for malformed row elements."""
+    pass
+
+def _transform_row(row: List[Optional[str]]) -> List[Union[int, str, None]]:
+    return [None if value is None else transform_column(value) for value in row]
+
+def _iter_rows_lxml(source: Union[str, BinaryIO], columns: List[str]) -> Iterator[List[Optional[str]]]:
+    """Full lxml iterparse, pruning finished rows to keep memory flat."""
+    context = etree.iterparse(source, events=('end',), tag='row')
+    for event, element in context:
+        get = element.get
+        yield [get(column) for column in columns]
+        
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+def _iter_rows_expat(source: BinaryIO, columns: List[str]) -> Iterator[List[Optional[str]]]:
+    """pyexpat callbacks; rows are collected per chunk without building elements."""
+    rows = []
+    
+    def start_element(name: str, attrib: Dict[str, str]) -> None:
+        if name == 'row':
+            rows.append([attrib.get(column) for column in columns])
+    
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start_element
+    while True:
+        chunk = source.read(_SCAN_CHUNK_SIZE)
+        parser.Parse(chunk, not chunk)
+        yield from rows
+        rows.clear()
+        if not chunk:
+            break
+
+_XML_ENCODING_PATTERN = re.compile(rb'^\s*<\?xml[^>]*encoding\s*=\s*["\']([^"\']+)')
+_ROW_ATTRIBUTE_PATTERN = re.compile(r'([^\s=/]+)\s*=\s*("[^"]*"|\'[^\']*\')')
+# A start tag up to its first '>' outside a quoted value, with either quote
+_ROW_TAG_PATTERN = re.compile(r'(?:[^"\'>]|"[^"]*"|\'[^\']*\')*>')
+# Attribute names of a row written the way the dumps are: ' Name="value"' pairs
+_CANONICAL_NAMES_PATTERN = re.compile(r'(?: [^\s=\'<>/]+=)*')
+_CANONICAL_TAG_ENDS = (" />", "/>", ">")
+_ROW_START_FOLLOWERS = (" ", "\t", "\r", "\n", "/", ">")
+_ENTITY_PATTERN = re.compile(r'&(#x[0-9a-fA-F]+|#[0-9]+|[A-Za-z]+);|&')
+
+# Expanded characters that would break finding rows and attributes are masked
+# with control characters, which XML does not allow in a document, and only
+# restored once the row is split into values
+_MASKS = (("\x01", "<"), ("\x02", '"'), ("\x03", "'"))
+_MASKED = {char: mask for mask, char in _MASKS}
+_MASKED_PATTERN = re.compile("[\x01\x02\x03]")
+_ENTITIES = {"lt": "\x01", "gt": ">", "amp": "&", "quot": "\x02", "apos": "\x03"}
+# Entities replaced with plain str.replace; &amp; must come last
+_COMMON_ENTITIES = (
+    ("&lt;", "\x01"), ("&gt;", ">"), ("&quot;", "\x02"), ("&apos;", "\x03"),
+    ("&#xA;", "\n"), ("&#xD;", "\r"), ("&#x9;", "\t"),
+)
+
+def _replace_entity(match: "re.Match") -> str:
+    name = match.group(1)
+    if name is None:
+        raise RowScanError("Unescaped '&' in attribute value")
+    if name in _ENTITIES:
+        return _ENTITIES[name]
+    if name.startswith("#"):
+        code = int(name[2:], 16) if name.startswith("#x") else int(name[1:])
+        if code < 0x20 and code not in (0x9, 0xA, 0xD):
+            raise RowScanError(f"Invalid character reference &{name};")
+        char = chr(code)
+        return _MASKED.get(char, char)
+    raise RowScanError(f"Undefined entity &{name};")
+
+def _unescape_text(text: str) -> str:
+    """
+    Normalize a chunk of rows like an XML parser normalizes attribute values.
+    
+    Literal whitespace becomes a space and references are expanded, with
+    '<', '"' and "'" masked (see _unmask).
+    """
+    for mask, _ in _MASKS:
+        if mask in text:
+            raise RowScanError(f"Invalid character {mask!r}")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", " ")
+    if "\n" in text:
+        text = text.replace("\n", " ")
+    if "\t" in text:
+        text = text.replace("\t", " ")
+    if "&" not in text:
+        return text
+    
+    # Fast path for the entities the dumps use: none of the replacements
+    # produces a '&', so the order only matters for &amp;
+    unescaped = text
+    for entity, char in _COMMON_ENTITIES:
+        if entity in unescaped:
+            unescaped = unescaped.replace(entity, char)
+    if unescaped.count("&") == unescaped.count("&amp;"):
+        return unescaped.replace("&amp;", "&")
+    return _ENTITY_PATTERN.sub(_replace_entity, text)
+
+def _unmask(value: str) -> str:
+    for mask, char in _MASKS:
+        if mask in value:
+            value = value.replace(mask, char)
+    return value
+
+def _check_scanner_encoding(head: bytes) -> None:
+    if head.startswith((b"\xff\xfe", b"\xfe\xff")):
+        raise RowScanError("The scanner engine only reads UTF-8 dumps")
+    match = _XML_ENCODING_PATTERN.match(head.lstrip(b"\xef\xbb\xbf"))
+    if match and match.group(1).lower() not in (b"utf-8", b"utf8", b"us-ascii", b"ascii"):
+        raise RowScanError(f"The scanner engine only reads UTF-8 dumps, not {match.group(1).decode()}")
+
+def _parse_row_attributes(piece: str) -> Tuple[List[str], List[str]]:
+    """Find the tag end and attributes of a row written in any layout."""
+    tag = _ROW_TAG_PATTERN.match(piece)
+    end = tag.end() - 1 if tag else -1
+    if end == -1 or piece.find("<", 0, end) != -1:
+        raise RowScanError("Unterminated row element")
+    
+    names, values = [], []
+    for name, value in _ROW_ATTRIBUTE_PATTERN.findall(piece, 0, end):
+        names.append(f" {name}=")
+        values.append(value[1:-1])
+    return names, values
+
+def _scan_rows(text: str, columns: List[str]) -> Iterator[List[Optional[str]]]:
+    """Yield the attributes of every complete row start tag in an unescaped chunk."""
+    keys = [f" {column}=" for column in columns]
+    masked = _MASKED_PATTERN.search(text) is not None
+    pieces = text.split("<row")
+    for piece in pieces[1:]:
+        if not piece.startswith(_ROW_START_FOLLOWERS):
+            continue
+        
+        # Splitting on quotes alternates names and values; the text after
+        # the last value must close the tag
+        parts = piece.split('"')
+        names = parts[0::2]
+        tail = names.pop()
+        if (len(parts) % 2 and tail.startswith(_CANONICAL_TAG_ENDS)
+                and _CANONICAL_NAMES_PATTERN.fullmatch("".join(names))
+                and piece.find("<", 0, len(piece) - len(tail)) == -1):
+            values = parts[1::2]
+        else:
+            names, values = _parse_row_attributes(piece)
+        
+        if masked and _MASKED_PATTERN.search(piece):
+            # Unmask all values at once; NUL never occurs in the text
+            values = _unmask("\0".join(values)).split("\0")
+        get = dict(zip(names, values)).get
+        yield [get(key) for key in keys]
+
+def _iter_rows_scanner(source: BinaryIO, columns: List[str]) -> Iterator[List[Optional[str]]]:
+    """
+    Pull the configured attributes straight out of the text of each row.
+    
+    Relies on the dump format: UTF-8 and self-contained ``<row .../>`` start
+    tags. The rest of the document is not validated. Values are the same
+    as those of the XML parsers.
+    """
+    buffer = b""
+    first = True
+    while True:
+        chunk = source.read(_SCAN_CHUNK_SIZE)
+        if first:
+            _check_scanner_encoding(chunk[:1024])
+            first = False
+        data = buffer + chunk if buffer else chunk
+        
+        # Everything before the last row start holds complete rows; cutting
+        # at a '<' also never splits a UTF-8 sequence
+        cut = data.rfind(ROW_START) if chunk else len(data)
+        if cut == -1:
+            cut = max(0, len(data) - len(ROW_START))
+            if data.find(b"<", cut) == -1:
+                cut = len(data)
+        text = data[:cut].decode("utf-8")
+        if "\0" in text:
+            raise RowScanError("Invalid character '\\x00'")
+        yield from _scan_rows(_unescape_text(text), columns)
+        buffer = data[cut:]
+        
+        if not chunk:
+            break
+
+# Parsing engines by name. Every engine yields the raw values of the configured
+# columns of each row, and must give identical results on valid dumps.
+PARSER_ENGINES = {
+    "lxml": _iter_rows_lxml,
+    "expat": _iter_rows_expat,
+    "scanner": _iter_rows_scanner,
+}
+DEFAULT_ENGINE = "lxml"
+DEFAULT_PARSE_BATCH_ROWS = 65536
+
+def validate_engine(engine: str) -> str:
+    """Check that a parsing engine name is known, returning it."""
+    if engine not in PARSER_ENGINES:
+        raise ConfigurationError(f"Unknown parsing engine '{engine}'. Choose from: {', '.join(PARSER_ENGINES)}")
+    return engine
+
+class _CountingReader:
+    """
+    Binary reader counting the bytes read through it.
+    
+    Engines read in chunks, so the count is a cheap sample of how far
+    parsing got. size is the number of bytes to read, or None for streams.
+    """
+    
+    def __init__(self, raw: Any, size: Optional[int], owned: bool) -> None:
+        self._raw = raw
+        self.size = size
+        self.owned = owned
+        self.position = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self._raw.read(size)
+        self.position += len(data)
+        return data
+    
+    def close(self) -> None:
+        if self.owned:
+            self._raw.close()
+
+def _open_source(
+    sourcefilename: Union[str, BinaryIO],
+    byte_range: Optional[Tuple[int, int]]
+) -> _CountingReader:
+    """Open a path, byte range or stream for the engines."""
+    is_path = isinstance(sourcefilename, (str, os.PathLike))
+    if is_path and not os.path.isfile(sourcefilename):
+        raise ValidationError(f"Source file does not exist: {sourcefilename}")
+    if byte_range and not is_path:
+        raise ValidationError("Byte ranges can only be parsed from files on disk")
+    
+    if byte_range:
+        return _CountingReader(XMLRangeReader(sourcefilename, *byte_range), byte_range[1] - byte_range[0], True)
+    if is_path:
+        return _CountingReader(open(sourcefilename, 'rb'), os.path.getsize(sourcefilename), True)
+    return _CountingReader(sourcefilename, None, False)
+
+def _iter_raw_rows(
+    sourcefilename: Union[str, BinaryIO],
+    columns: List[str],
+    engine: str,
+    source: _CountingReader
+) -> Iterator[List[Optional[str]]]:
+    """Yield the raw rows of an opened source with an engine, wrapping parse errors."""
+    try:
+        yield from PARSER_ENGINES[engine](source, columns)
+    except (etree.XMLSyntaxError, expat.ExpatError, RowScanError) as e:
+        raise ValidationError(f"Invalid XML in file {source_name(sourcefilename)}: {e}")
     except Exception as e:
-        raise ValidationError(f"Error parsing XML file {sourcefilename}: {e}")
+        raise ValidationError(f"Error parsing XML file {source_name(sourcefilename)}: {e}")
+    finally:
+        source.close()
+
+def parse_xml_rows(
+    sourcefilename: Union[str, BinaryIO], 
+    columns: List[str], 
+    progress_callback: Optional[Callable[[int, int, Optional[int]], None]] = None,
+    byte_range: Optional[Tuple[int, int]] = None,
+    engine: str = DEFAULT_ENGINE
+) -> Iterator[List[Union[int, str, None]]]:
+    """
+    Parse XML file and yield rows with error handling.
+    
+    sourcefilename is a path or a binary file-like object, such as an archive
+    member stream. When byte_range is given only the rows between those
+    offsets are parsed; the range must come from split_xml_file. engine is
+    one of PARSER_ENGINES. progress_callback is called for every row, like
+    parse_xml_batches calls it for every batch.
+    """
+    validate_engine(engine)
+    source = _open_source(sourcefilename, byte_range)
+    rowcounter = 0
+    for row in _iter_raw_rows(sourcefilename, columns, engine, source):
+        rowcounter += 1
+        if progress_callback:
+            progress_callback(rowcounter, source.position, source.size)
+        
+        yield _transform_row(row)
+
+def parse_xml_batches(
+    sourcefilename: Union[str, BinaryIO],
+    columns: List[str],
+    batch_size: int = DEFAULT_PARSE_BATCH_ROWS,
+    progress_callback: Optional[Callable[[int, int, Optional[int]], None]] = None,
+    byte_range: Optional[Tuple[int, int]] = None,
+    engine: str = DEFAULT_ENGINE,
+    transform: bool = True
+) -> Iterator[List[List[Union[int, str, None]]]]:
+    """
+    Parse XML file and yield batches of up to batch_size rows as columns.
+    
+    Each batch is a list with one list of values per configured column.
+    Values are transformed with transform_values once per column and batch,
+    so they match parse_xml_rows; with transform=False the raw attribute
+    values are returned for writers that transform columns themselves.
+    progress_callback is called after each batch with the running row count,
+    the bytes read from the source so far and the bytes to read in total:
+    the file size, the length of byte_range or None for streams.
+    """
+    if batch_size < 1:
+        raise ValidationError(f"Batch size must be positive, got {batch_size}")
+    validate_engine(engine)
+    source = _open_source(sourcefilename, byte_range)
+    rows = _iter_raw_rows(sourcefilename, columns, engine, source)
+    rowcounter = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            break
+        rowcounter += len(batch)
+        if progress_callback:
+            progress_callback(rowcounter, source.position, source.size)
+        
+        batch_columns = [list(values) for values in zip(*batch)]
+        if transform:
+            batch_columns = [transform_values(values) for values in batch_columns]
+        yield batch_columns
 
 def setup_logging() -> None:
     """Configure logging with timestamp format."""
@@ -152,7 +856,7 @@ def find_subfolders_with_data(
     valid_subfolders = []
     for subfolder in subfolders:
         if not include_meta:
-            if ".meta." in os.path.basename(subfolder) or os.path.basename(subfolder).startswith("meta."):
+            if _is_meta_site(os.path.basename(subfolder)):
                 continue
         if has_validfiles(subfolder, stackexchangefiles):
             valid_subfolders.append(subfolder)
@@ -162,6 +866,59 @@ def find_subfolders_with_data(
     
     return valid_subfolders
 
+def _is_meta_site(name: str) -> bool:
+    return ".meta." in name or name.startswith("meta.")
+
+def find_archives_with_data(
+    inputdir: str, 
+    tables: Dict[str, List[str]], 
+    include_meta: bool = False
+) -> List[Tuple[str, List[str]]]:
+    """
+    Find StackExchange .7z dump archives, grouped by site.
+    
+    Returns (site name, archive paths) pairs for every site with at least one
+    archive containing a configured table, in site name order.
+    """
+    from .archives import find_archives, list_archive_members, site_name_from_archive
+    
+    if not os.path.isdir(inputdir):
+        raise ValidationError(f"Input directory does not exist: {inputdir}")
+    
+    stackexchangefiles = get_stackexchange_files(tables)
+    sites: Dict[str, List[str]] = {}
+    for archive in find_archives(inputdir):
+        site_name = site_name_from_archive(archive, tables)
+        if not include_meta and _is_meta_site(site_name):
+            continue
+        members = [os.path.basename(name) for name, _ in list_archive_members(archive)]
+        if any(member in stackexchangefiles for member in members):
+            sites.setdefault(site_name, []).append(archive)
+    
+    return sorted(sites.items())
+
+def get_table_members_in_archives(
+    archives: List[str], 
+    tables: Dict[str, List[str]]
+) -> List[Tuple[Any, str, List[str]]]:
+    """Get the table files found inside a site's archives, like get_table_files_in_folder."""
+    from .archives import ArchiveMember, list_archive_members
+    
+    stackexchangefiles = get_stackexchange_files(tables)
+    found = {}
+    for archive in archives:
+        for name, _ in list_archive_members(archive):
+            file = os.path.basename(name)
+            if file in stackexchangefiles and file not in found:
+                found[file] = ArchiveMember(archive, name)
+    
+    found_files = []
+    for file in stackexchangefiles:
+        if file in found:
+            table_name = Path(file).stem
+            found_files.append((found[file], table_name, tables[table_name]))
+    return found_files
+
 def ensure_output_directory(outputdir: str, subfolder_name: str) -> bool:
     """Ensure output directory exists, creating it if necessary."""
     # Validate parent output directory exists
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Dict, List, Optional, Union
+from .archives import ArchiveMember
+from .checkpoint import temp_filename
+
+FINGERPRINT_FILENAME = ".fingerprints.json"
+SAMPLE_BLOCKS = 16
+SAMPLE_BLOCK_SIZE = 64 * 1024
+
+def sample_hash(filename: str) -> str:
+    """
+    Hash evenly spaced blocks of a file together with its size.
+
+    Small files are hashed completely; large dumps are sampled so the hash
+    costs a few megabytes of reads at most.
+    """
+    size = os.path.getsize(filename)
+    digest = hashlib.blake2b(str(size).encode("ascii"), digest_size=16)
+    with open(filename, 'rb') as f:
+        if size <= SAMPLE_BLOCKS * SAMPLE_BLOCK_SIZE:
+            digest.update(f.read())
+        else:
+            step = (size - SAMPLE_BLOCK_SIZE) // (SAMPLE_BLOCKS - 1)
+            for block in range(SAMPLE_BLOCKS):
+                f.seek(block * step)
+                digest.update(f.read(SAMPLE_BLOCK_SIZE))
+    return digest.hexdigest()
+
+def source_fingerprint(source: Union[str, ArchiveMember], content_hash: bool = False) -> Dict[str, Any]:
+    """Fingerprint a source XML file, or the archive holding it, by size, mtime and optionally a sampled hash."""
+    filename = source.archive if isinstance(source, ArchiveMember) else source
+    stat = os.stat(filename)
+    fingerprint: Dict[str, Any] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if isinstance(source, ArchiveMember):
+        fingerprint["member"] = source.member
+    if content_hash:
+        fingerprint["hash"] = sample_hash(filename)
+    return fingerprint
+
+def same_source(stored: Dict[str, Any], current: Dict[str, Any]) -> bool:
+    """
+    Whether two source fingerprints describe the same input.
+
+    When both carry a content hash it decides, so a dump that was extracted
+    again with new modification times still counts as unchanged.
+    """
+    if stored.get("size") != current.get("size") or stored.get("member") != current.get("member"):
+        return False
+    if stored.get("hash") and current.get("hash"):
+        return stored["hash"] == current["hash"]
+    return stored.get("mtime_ns") == current.get("mtime_ns")
+
+class FingerprintStore:
+    """
+    Fingerprints of the inputs every (site, table) output was converted from.
+
+    Kept as a JSON file in the output folder. An entry records the source
+    fingerprint, the columns and their types, and the writer settings, and is
+    only updated after the table converted successfully.
+    """
+
+    def __init__(self, outputdir: str) -> None:
+        self.filename = os.path.join(outputdir, FINGERPRINT_FILENAME)
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.filename, 'r', encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logging.warning("Ignoring unreadable fingerprint file %s: %s", self.filename, e)
+
+    @staticmethod
+    def key(site_name: str, table_name: str) -> str:
+        return f"{site_name}/{table_name}"
+
+    @staticmethod
+    def entry(
+        source: Dict[str, Any],
+        columns: List[str],
+        column_types: Optional[Dict[str, str]],
+        settings: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """Build the entry stored for one converted table."""
+        return {
+            "source": source,
+            "columns": list(columns),
+            "column_types": dict(column_types or {}),
+            "settings": settings,
+        }
+
+    def changes(self, key: str, entry: Dict[str, Any]) -> List[str]:
+        """Describe what changed since the stored entry; empty when nothing did."""
+        stored = self.entries.get(key)
+        if stored is None:
+            return ["not converted before"]
+        changes = []
+        if not same_source(stored.get("source", {}), entry["source"]):
+            changes.append("source changed")
+        if stored.get("columns") != entry["columns"] or stored.get("column_types") != entry["column_types"]:
+            changes.append("columns changed")
+        if stored.get("settings") != entry["settings"]:
+            changes.append("writer settings changed")
+        return changes
+
+    def update(self, key: str, entry: Dict[str, Any]) -> None:
+        self.entries[key] = entry
+
+    def save(self) -> None:
+        """Write the store atomically."""
+        with open(temp_filename(self.filename), 'w', encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(temp_filename(self.filename), self.filename)
@@ -0,0 +1,194 @@
+import bisect
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import islice
+from operator import le
+from typing import Any, Iterable, List, NamedTuple
+from .checkpoint import temp_filename
+from .core import ValidationError
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+INDEX_MAGIC = b"SEIDX\x00\x00\x01"
+INDEX_EXTENSION = ".idx"
+# Columns indexed besides Id, for looking up the rows of a post
+POST_ID_TABLES = ("Comments", "Votes", "PostHistory")
+
+def index_columns(table: str, columns: Iterable[str]) -> List[str]:
+    """Columns of a table that get an index: Id, and PostId for the tables in POST_ID_TABLES."""
+    wanted = ["Id"] + (["PostId"] if table in POST_ID_TABLES else [])
+    columns = set(columns)
+    return [column for column in wanted if column in columns]
+
+def index_filename(destinationfilename: str, column: str) -> str:
+    """Index of a column next to the table's output, e.g. Posts.Id.idx for Posts.csv."""
+    return f"{os.path.splitext(destinationfilename)[0]}.{column}{INDEX_EXTENSION}"
+
+class IndexEntry(NamedTuple):
+    """
+    Where a row is: its output file, and in it the row group (Parquet) or
+    record batch (Arrow) and the row within it, or for CSV the byte offset
+    of its line, with group 0.
+    """
+    file: str
+    group: int
+    offset: int
+
+class IdIndexBuilder:
+    """
+    Collects (key, position) pairs of one column and writes them sorted by key.
+
+    The index file is INDEX_MAGIC, the length of a JSON header and the
+    header, padded to 8 bytes, followed by four arrays in native byte
+    order: int64 keys, int64 offsets, int32 file numbers and int32 groups.
+    Rows with equal keys keep their order in the output.
+    """
+
+    def __init__(self, table: str, column: str) -> None:
+        self.table = table
+        self.column = column
+        self.files: List[str] = []
+        self.keys = array("q")
+        self.offsets = array("q")
+        self.file_numbers = array("i")
+        self.groups = array("i")
+
+    def add_file(self, filename: str) -> int:
+        """Number the positions of another output file are added under."""
+        self.files.append(filename)
+        return len(self.files) - 1
+
+    def add(self, file_number: int, group: int, keys: Iterable[Any], offsets: Iterable[int]) -> None:
+        """Add the positions of rows; rows without a key are left out."""
+        added = 0
+        try:
+            for key, offset in zip(keys, offsets):
+                if key is None or key == "":
+                    continue
+                self.keys.append(int(key))
+                self.offsets.append(offset)
+                added += 1
+        except (ValueError, TypeError, OverflowError) as e:
+            raise ValidationError(f"Cannot index column {self.column} of {self.table}: {e}")
+        self.file_numbers.extend([file_number] * added)
+        self.groups.extend([group] * added)
+
+    def _sort(self) -> None:
+        keys = self.keys
+        if all(map(le, keys, islice(keys, 1, None))):
+            return
+        if NUMPY_AVAILABLE:
+            order = np.argsort(np.frombuffer(keys, dtype=np.int64), kind="stable")
+            for name in ("keys", "offsets", "file_numbers", "groups"):
+                values = getattr(self, name)
+                sorted_values = np.frombuffer(values, dtype=values.typecode)[order]
+                setattr(self, name, array(values.typecode, sorted_values.tobytes()))
+            return
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        for name in ("keys", "offsets", "file_numbers", "groups"):
+            values = getattr(self, name)
+            setattr(self, name, array(values.typecode, [values[index] for index in order]))
+
+    def write(self, filename: str, positions: str) -> None:
+        """Write the index, atomically; positions is "bytes" for CSV offsets and "rows" otherwise."""
+        self._sort()
+        folder = os.path.dirname(filename)
+        header = json.dumps({
+            "table": self.table,
+            "column": self.column,
+            "rows": len(self.keys),
+            "positions": positions,
+            "byteorder": sys.byteorder,
+            "files": [os.path.relpath(name, folder or ".") for name in self.files],
+            "sizes": [os.path.getsize(name) for name in self.files],
+        }).encode("utf-8")
+        header += b" " * (-len(header) % 8)
+        with open(temp_filename(filename), "wb") as f:
+            f.write(INDEX_MAGIC + struct.pack("<q", len(header)) + header)
+            for values in (self.keys, self.offsets, self.file_numbers, self.groups):
+                values.tofile(f)
+        os.replace(temp_filename(filename), filename)
+
+class IdIndex:
+    """
+    A memory-mapped index written by IdIndexBuilder.
+
+    Lookups are binary searches over the mapped keys, so only the few pages
+    they touch are read from disk and opening an index costs the same
+    whatever its size.
+    """
+
+    def __init__(self, filename: str) -> None:
+        self.filename = filename
+        try:
+            with open(filename, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise ValidationError(f"Cannot open index {filename}: {e}")
+        try:
+            if self._map[:len(INDEX_MAGIC)] != INDEX_MAGIC:
+                raise ValidationError(f"{filename} is not an index file")
+            start = len(INDEX_MAGIC) + 8
+            header_size, = struct.unpack_from("<q", self._map, len(INDEX_MAGIC))
+            header = json.loads(self._map[start:start + header_size].decode("utf-8"))
+            if header["byteorder"] != sys.byteorder:
+                raise ValidationError(f"{filename} was written on a {header['byteorder']}-endian machine")
+        except BaseException:
+            self._map.close()
+            raise
+        self.table: str = header["table"]
+        self.column: str = header["column"]
+        self.positions: str = header["positions"]
+        folder = os.path.dirname(filename)
+        self.files: List[str] = [os.path.join(folder, name) for name in header["files"]]
+        self._sizes: List[int] = header["sizes"]
+
+        rows = header["rows"]
+        view = memoryview(self._map)
+        offset = start + header_size
+        self._arrays = []
+        for typecode in ("q", "q", "i", "i"):
+            size = rows * struct.calcsize(typecode)
+            self._arrays.append(view[offset:offset + size].cast(typecode))
+            offset += size
+        self._keys, self._offsets, self._file_numbers, self._groups = self._arrays
+        view.release()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def lookup(self, key: int) -> List[IndexEntry]:
+        """Positions of the rows with a key, in output order; empty when there are none."""
+        first = bisect.bisect_left(self._keys, key)
+        last = bisect.bisect_right(self._keys, key, first)
+        return [
+            IndexEntry(self.files[self._file_numbers[index]], self._groups[index], self._offsets[index])
+            for index in range(first, last)
+        ]
+
+    def stale_files(self) -> List[str]:
+        """Indexed files that were changed or removed since the index was written."""
+        return [
+            filename for filename, size in zip(self.files, self._sizes)
+            if not os.path.isfile(filename) or os.path.getsize(filename) != size
+        ]
+
+    def close(self) -> None:
+        for values in self._arrays:
+            values.release()
+        self._arrays = []
+        self._map.close()
+
+    def __enter__(self) -> "IdIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
@@ -0,0 +1,266 @@
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional
+from .checkpoint import temp_filename
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:
+    RESOURCE_AVAILABLE = False
+
+# Pipeline stages timed for every batch: parsing XML rows into columns,
+# transforming values, encoding them in the output format and writing files
+STAGES = ("parse", "transform", "encode", "write")
+
+PROMETHEUS_PREFIX = "stackexchange_parser"
+# Per-table gauges of the Prometheus report: (metric, attribute, help)
+PROMETHEUS_TABLE_METRICS = (
+    ("rows", "rows", "Rows converted in the last run"),
+    ("input_bytes", "input_bytes", "Size of the source XML file"),
+    ("output_bytes", "output_bytes", "Size of the written output"),
+    ("parse_seconds", "parse_seconds", "Seconds spent parsing XML"),
+    ("write_seconds", "write_seconds", "Seconds spent converting and writing output"),
+    ("rows_per_second", "rows_per_second", "Rows converted per second"),
+    ("peak_rss_bytes", "peak_rss_bytes", "Peak resident set size while converting the table"),
+    ("success", "ok", "Whether the table converted successfully"),
+)
+
+# Linux keeps the peak resident set size as VmHWM, which writing "5" to
+# clear_refs resets to the current size
+PROC_STATUS = "/proc/self/status"
+PROC_CLEAR_REFS = "/proc/self/clear_refs"
+
+def reset_peak_rss() -> bool:
+    """
+    Start measuring the peak resident set size afresh, so peak_rss_bytes
+    reports the peak since this call rather than since the process started.
+
+    Only possible on Linux; returns whether the peak was reset.
+    """
+    try:
+        with open(PROC_CLEAR_REFS, "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_bytes() -> Optional[int]:
+    """
+    Peak resident set size of the current process, where the platform reports it.
+
+    This is the peak since the last reset_peak_rss on Linux, and the peak of
+    the process's whole lifetime elsewhere.
+    """
+    try:
+        with open(PROC_STATUS, "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    if not RESOURCE_AVAILABLE:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class ConversionStats:
+    """
+    Rows parsed and seconds spent in each of STAGES by one write_from_xml call.
+
+    Stages are timed once per batch, so the timers cost next to nothing.
+    Writers time the stages they can tell apart: the csv module writes full
+    buffers while encoding, and pyarrow encodes and compresses Parquet pages
+    while writing them, so those count as encode and write respectively.
+    """
+
+    def __init__(self) -> None:
+        self.rows = 0
+        self.stage_seconds = dict.fromkeys(STAGES, 0.0)
+
+    @property
+    def parse_seconds(self) -> float:
+        return self.stage_seconds["parse"]
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Add the time spent in the block to a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage_seconds[name] += time.perf_counter() - start
+
+    def timed(self, batches: Iterable[List[List[Any]]]) -> Iterator[List[List[Any]]]:
+        """Pass column batches through, counting their rows and the time spent producing them."""
+        iterator = iter(batches)
+        try:
+            while True:
+                start = time.perf_counter()
+                batch = next(iterator, None)
+                self.stage_seconds["parse"] += time.perf_counter() - start
+                if batch is None:
+                    return
+                self.rows += len(batch[0]) if batch else 0
+                yield batch
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+
+class TableMetrics(NamedTuple):
+    """
+    Metrics of one (site, table) conversion.
+
+    seconds is the wall time of the conversion, including merging split
+    ranges; write_seconds is the part of it not spent parsing. stage_seconds
+    breaks it down by STAGES, with the rest (merging, checkpoints, setup) in
+    other_seconds. input_bytes is None for sources read from archives.
+    """
+    site: str
+    table: str
+    rows: int
+    input_bytes: Optional[int]
+    output_bytes: int
+    seconds: float
+    parse_seconds: float
+    peak_rss_bytes: Optional[int] = None
+    error: Optional[str] = None
+    stage_seconds: Optional[Dict[str, float]] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def other_seconds(self) -> float:
+        return max(0.0, self.seconds - sum((self.stage_seconds or {}).values()))
+
+    @property
+    def write_seconds(self) -> float:
+        return max(0.0, self.seconds - self.parse_seconds)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self._asdict(),
+            "stage_seconds": {stage: round(seconds, 4) for stage, seconds in (self.stage_seconds or {}).items()},
+            "other_seconds": round(self.other_seconds, 4),
+            "write_seconds": round(self.write_seconds, 4),
+            "rows_per_second": round(self.rows_per_second, 1),
+        }
+
+class RunResult(NamedTuple):
+    """
+    Outcome of converting a dump.
+
+    directories is the number of site folders created (or, with resume or
+    refresh, continued); tables holds the metrics of every converted table,
+    including failed ones, and skipped the site/table keys that were left
+    as they were.
+    """
+    directories: int
+    tables: List[TableMetrics]
+    skipped: List[str]
+    seconds: float
+
+    @property
+    def failed(self) -> List[TableMetrics]:
+        return [table for table in self.tables if not table.ok]
+
+    @property
+    def rows(self) -> int:
+        return sum(table.rows for table in self.tables)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "directories": self.directories,
+            "seconds": round(self.seconds, 4),
+            "rows": self.rows,
+            "skipped": list(self.skipped),
+            "tables": [table.to_dict() for table in self.tables],
+        }
+
+    def write_json(self, filename: str) -> None:
+        """Write the result as a JSON report, atomically."""
+        with open(temp_filename(filename), 'w', encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=1)
+        os.replace(temp_filename(filename), filename)
+
+    def prometheus_text(self) -> str:
+        """The result in the Prometheus text exposition format."""
+        lines = []
+        for metric, attribute, description in PROMETHEUS_TABLE_METRICS:
+            name = f"{PROMETHEUS_PREFIX}_table_{metric}"
+            samples = [(table, getattr(table, attribute)) for table in self.tables]
+            samples = [(table, value) for table, value in samples if value is not None]
+            if not samples:
+                continue
+            lines.append(f"# HELP {name} {description}")
+            lines.append(f"# TYPE {name} gauge")
+            for table, value in samples:
+                labels = f'site="{_label_value(table.site)}",table="{_label_value(table.table)}"'
+                lines.append(f"{name}{{{labels}}} {_sample_value(value)}")
+        staged = [table for table in self.tables if table.stage_seconds]
+        if staged:
+            name = f"{PROMETHEUS_PREFIX}_table_stage_seconds"
+            lines.append(f"# HELP {name} Seconds spent in each pipeline stage")
+            lines.append(f"# TYPE {name} gauge")
+            for table in staged:
+                for stage, seconds in table.stage_seconds.items():
+                    labels = f'site="{_label_value(table.site)}",table="{_label_value(table.table)}",stage="{stage}"'
+                    lines.append(f"{name}{{{labels}}} {_sample_value(seconds)}")
+        for metric, value, description in (
+            ("run_seconds", self.seconds, "Wall time of the last run"),
+            ("run_tables_converted", len(self.tables) - len(self.failed), "Tables converted in the last run"),
+            ("run_tables_failed", len(self.failed), "Tables that failed to convert in the last run"),
+            ("run_tables_skipped", len(self.skipped), "Tables skipped as already converted or unchanged"),
+            ("run_timestamp_seconds", time.time(), "Time the last run finished"),
+        ):
+            name = f"{PROMETHEUS_PREFIX}_{metric}"
+            lines.extend([f"# HELP {name} {description}", f"# TYPE {name} gauge", f"{name} {_sample_value(value)}"])
+        return "\n".join(lines) + "\n"
+
+    def profile_report(self) -> str:
+        """Per-table seconds spent in every stage, as a plain text table."""
+        header = ["table", "rows", *STAGES, "other", "total"]
+        rows = [
+            [
+                f"{table.site}/{table.table}", str(table.rows),
+                *(f"{(table.stage_seconds or {}).get(stage, 0.0):.3f}" for stage in STAGES),
+                f"{table.other_seconds:.3f}", f"{table.seconds:.3f}"
+            ]
+            for table in self.tables
+        ]
+        widths = [max(len(row[index]) for row in [header, *rows]) for index in range(len(header))]
+        return "\n".join(
+            "  ".join(cell.ljust(width) if index == 0 else cell.rjust(width) for index, (cell, width) in enumerate(zip(row, widths)))
+            for row in [header, *rows]
+        )
+
+    def write_prometheus(self, filename: str) -> None:
+        """
+        Write the result for the node exporter's textfile collector.
+
+        The file is renamed into place, so the collector never reads a
+        partial file; it should end in .prom.
+        """
+        with open(temp_filename(filename), 'w', encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_filename(filename), filename)
+
+def _sample_value(value: Any) -> str:
+    # Integers are written exactly, booleans as 0 or 1
+    if isinstance(value, int):
+        return str(int(value))
+    return repr(float(value))
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
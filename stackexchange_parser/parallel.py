@@ -0,0 +1,341 @@
+import cProfile
+import logging
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+from .archives import ArchiveMember, iter_archive_members
+from .checkpoint import checkpoint_filename
+from .compression import COMPRESSION_EXTENSIONS
+from .core import split_xml_file, ValidationError
+from .metrics import STAGES, peak_rss_bytes, reset_peak_rss
+from .progress import RunProgress, set_run_progress, source_size
+
+DEFAULT_SPLIT_MIN_BYTES = 256 * 1024 * 1024
+
+class ConversionUnit(NamedTuple):
+    """A single (site, table) conversion job, or one byte range of it."""
+    source_file: Union[str, ArchiveMember]
+    table_name: str
+    columns: List[str]
+    destination_file: str
+    subfolder_name: str
+    byte_range: Optional[Tuple[int, int]] = None
+    column_types: Optional[Dict[str, str]] = None
+    resume: bool = False
+
+class UnitResult(NamedTuple):
+    """
+    Outcome of converting one unit, as reported back to the parent process.
+    
+    rows, parse_seconds and stage_seconds are those of this run, so a
+    resumed conversion does not count the rows converted before it was
+    interrupted. peak_rss_bytes is the peak resident set size while it was
+    converted where the platform can reset the peak (Linux), and otherwise
+    the peak of the converting process so far.
+    """
+    unit: ConversionUnit
+    elapsed: float
+    error: Optional[str] = None
+    log_records: Tuple[Tuple[int, str], ...] = ()
+    rows: int = 0
+    parse_seconds: float = 0.0
+    peak_rss_bytes: Optional[int] = None
+    stage_seconds: Optional[Dict[str, float]] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class _BufferingHandler(logging.Handler):
+    """Collect formatted log messages so they can be replayed by the parent."""
+    def __init__(self) -> None:
+        super().__init__()
+        self.records: List[Tuple[int, str]] = []
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.records.append((record.levelno, record.getMessage()))
+
+def _init_worker(run_progress: Optional[RunProgress] = None) -> None:
+    """Replace inherited logging handlers so workers never write to the console, and join the run's progress."""
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(logging.INFO)
+    set_run_progress(run_progress)
+
+def _wait_reporting(future: "Future[List[UnitResult]]", run_progress: RunProgress) -> List[UnitResult]:
+    """Wait for a task's results, reporting the run's progress meanwhile."""
+    while True:
+        try:
+            return future.result(timeout=run_progress.interval)
+        except TimeoutError:
+            run_progress.report()
+
+def profile_filename(profile_dir: str, unit: ConversionUnit) -> str:
+    """cProfile dump of a unit: <site>_<table>.prof, with the byte range of a split unit."""
+    name = f"{unit.subfolder_name}_{unit.table_name}"
+    if unit.byte_range is not None:
+        name += f"_{unit.byte_range[0]}-{unit.byte_range[1]}"
+    return os.path.join(profile_dir, f"{name}.prof")
+
+def convert_unit(
+    writer: Any,
+    unit: ConversionUnit,
+    capture_logs: bool = False,
+    source: Any = None,
+    profile_dir: Optional[str] = None
+) -> UnitResult:
+    """
+    Convert one unit.
+    
+    With capture_logs errors and log messages are returned in the result
+    instead of being raised and logged. source overrides the unit's source
+    file, e.g. with an already opened archive member stream. With
+    profile_dir the conversion runs under cProfile and its statistics are
+    saved there for pstats, snakeviz or flamegraph tools. A writer with
+    id_index indexes the table once it is written; byte ranges are indexed
+    once merged.
+    """
+    handler = None
+    if capture_logs:
+        handler = _BufferingHandler()
+        logging.getLogger().addHandler(handler)
+
+    profiler = cProfile.Profile() if profile_dir else None
+    reset_peak_rss()
+    start = time.perf_counter()
+    error = None
+    stats = None
+    try:
+        if profiler is not None:
+            profiler.enable()
+        stats = writer.write_from_xml(
+            unit.source_file if source is None else source,
+            unit.table_name,
+            unit.columns,
+            unit.destination_file,
+            unit.subfolder_name,
+            byte_range=unit.byte_range,
+            column_types=unit.column_types,
+            resume=unit.resume
+        )
+        if writer.id_index and unit.byte_range is None:
+            writer.write_id_indexes(unit.destination_file)
+    except Exception as e:
+        if not capture_logs:
+            raise
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(profile_dir, exist_ok=True)
+            profiler.dump_stats(profile_filename(profile_dir, unit))
+        if handler is not None:
+            logging.getLogger().removeHandler(handler)
+
+    return UnitResult(
+        unit=unit,
+        elapsed=time.perf_counter() - start,
+        error=error,
+        log_records=tuple(handler.records) if handler else (),
+        rows=stats.rows if stats is not None else 0,
+        parse_seconds=stats.parse_seconds if stats is not None else 0.0,
+        peak_rss_bytes=peak_rss_bytes(),
+        stage_seconds=dict(stats.stage_seconds) if stats is not None else None
+    )
+
+def convert_archive_units(
+    writer: Any,
+    units: List[ConversionUnit],
+    capture_logs: bool = False,
+    profile_dir: Optional[str] = None
+) -> List[UnitResult]:
+    """
+    Convert all units reading from one archive in a single decompression pass.
+    
+    Results are returned in the order of the given units.
+    """
+    archive = units[0].source_file.archive
+    by_member = {unit.source_file.member: unit for unit in units}
+    results: Dict[str, UnitResult] = {}
+    try:
+        for member, stream in iter_archive_members(archive, list(by_member)):
+            results[member] = convert_unit(
+                writer, by_member[member], capture_logs, source=stream, profile_dir=profile_dir
+            )
+    except Exception as e:
+        if not capture_logs:
+            raise
+        error = f"{type(e).__name__}: {e}"
+        for member, unit in by_member.items():
+            results.setdefault(member, UnitResult(unit=unit, elapsed=0.0, error=error))
+    
+    missing = [member for member in by_member if member not in results]
+    if missing and not capture_logs:
+        raise ValidationError(f"Members not found in archive {archive}: {', '.join(missing)}")
+    for member in missing:
+        results[member] = UnitResult(unit=by_member[member], elapsed=0.0, error=f"Member not found in archive {archive}")
+    
+    return [results[unit.source_file.member] for unit in units]
+
+def _run_task(
+    writer: Any,
+    task: List[ConversionUnit],
+    capture_logs: bool = False,
+    profile_dir: Optional[str] = None
+) -> List[UnitResult]:
+    """Run a task: one unit or byte range, or all units of one archive."""
+    if isinstance(task[0].source_file, ArchiveMember):
+        return convert_archive_units(writer, task, capture_logs, profile_dir)
+    return [convert_unit(writer, unit, capture_logs, profile_dir=profile_dir) for unit in task]
+
+def _run_task_in_worker(writer: Any, task: List[ConversionUnit], profile_dir: Optional[str] = None) -> List[UnitResult]:
+    return _run_task(writer, task, capture_logs=True, profile_dir=profile_dir)
+
+def split_unit(unit: ConversionUnit, parts: int, min_bytes: int = DEFAULT_SPLIT_MIN_BYTES) -> List[ConversionUnit]:
+    """
+    Split a unit into byte-range units when its source file is large enough.
+
+    Each range writes to its own ``_rangeNNNN`` destination; the writer's
+    merge_parts combines them in order once all ranges are done. A unit
+    resuming from a checkpoint is never split.
+    """
+    if parts <= 1 or not isinstance(unit.source_file, str) or not os.path.isfile(unit.source_file):
+        return [unit]
+    if unit.resume and os.path.exists(checkpoint_filename(unit.destination_file)):
+        return [unit]
+    if os.path.getsize(unit.source_file) < min_bytes:
+        return [unit]
+    
+    ranges = split_xml_file(unit.source_file, parts)
+    if len(ranges) <= 1:
+        return [unit]
+    
+    logging.info("Splitting:  %s - %s into %s ranges", unit.subfolder_name, unit.table_name, len(ranges))
+    base, extension = os.path.splitext(unit.destination_file)
+    if extension in COMPRESSION_EXTENSIONS.values():
+        base, inner = os.path.splitext(base)
+        extension = inner + extension
+    return [
+        unit._replace(destination_file=f"{base}_range{number:04d}{extension}", byte_range=byte_range)
+        for number, byte_range in enumerate(ranges, start=1)
+    ]
+
+def _finish_unit(
+    writer: Any,
+    unit: ConversionUnit,
+    tasks: List[ConversionUnit],
+    task_results: List[UnitResult],
+    capture_errors: bool
+) -> UnitResult:
+    """Merge range outputs of a split unit, index them, and fold their results into one."""
+    if len(tasks) == 1 and tasks[0] is unit:
+        return task_results[0]
+    
+    elapsed = sum(r.elapsed for r in task_results)
+    log_records = tuple(record for r in task_results for record in r.log_records)
+    totals = {
+        "rows": sum(r.rows for r in task_results),
+        "parse_seconds": sum(r.parse_seconds for r in task_results),
+        "peak_rss_bytes": max((r.peak_rss_bytes for r in task_results if r.peak_rss_bytes is not None), default=None),
+        "stage_seconds": {
+            stage: sum((r.stage_seconds or {}).get(stage, 0.0) for r in task_results) for stage in STAGES
+        },
+    }
+    errors = [r.error for r in task_results if not r.ok]
+    if errors:
+        return UnitResult(unit=unit, elapsed=elapsed, error="; ".join(errors), log_records=log_records, **totals)
+    
+    start = time.perf_counter()
+    try:
+        writer.merge_parts([task.destination_file for task in tasks], unit.destination_file)
+        if writer.id_index:
+            writer.write_id_indexes(unit.destination_file)
+    except Exception as e:
+        if not capture_errors:
+            raise
+        return UnitResult(
+            unit=unit, elapsed=elapsed, error=f"{type(e).__name__}: {e}", log_records=log_records, **totals
+        )
+    
+    return UnitResult(unit=unit, elapsed=elapsed + time.perf_counter() - start, log_records=log_records, **totals)
+
+def run_units(
+    writer: Any,
+    units: List[ConversionUnit],
+    jobs: int = 1,
+    split_parts: int = 1,
+    split_min_bytes: int = DEFAULT_SPLIT_MIN_BYTES,
+    profile_dir: Optional[str] = None
+) -> List[UnitResult]:
+    """
+    Convert units, optionally on a process pool.
+
+    With jobs > 1 every unit runs in a worker process. Worker log output is
+    buffered and replayed by the parent in unit order, so logs and results
+    are deterministic regardless of completion order. Source files of at
+    least split_min_bytes are parsed as split_parts byte ranges. With
+    profile_dir a cProfile dump of every unit or range is saved there.
+    
+    Progress of the whole run, as the share of the input bytes of all files
+    on disk parsed so far, is logged every writer.progress_interval seconds.
+    """
+    if jobs < 1:
+        raise ValueError("Number of jobs must be at least 1")
+    
+    # Each task runs in one worker. Units of the same archive share a task so
+    # the archive is decompressed once; split units get one task per range.
+    plans = [split_unit(unit, split_parts, split_min_bytes) for unit in units]
+    tasks: List[List[ConversionUnit]] = []
+    placements: List[List[Tuple[int, int]]] = []
+    archive_tasks: Dict[str, int] = {}
+    for unit, parts in zip(units, plans):
+        if isinstance(unit.source_file, ArchiveMember):
+            archive = unit.source_file.archive
+            if archive not in archive_tasks:
+                archive_tasks[archive] = len(tasks)
+                tasks.append([])
+            task_index = archive_tasks[archive]
+            tasks[task_index].append(unit)
+            placements.append([(task_index, len(tasks[task_index]) - 1)])
+        else:
+            placements.append([(len(tasks) + n, 0) for n in range(len(parts))])
+            tasks.extend([part] for part in parts)
+    
+    sizes = [source_size(unit.source_file, unit.byte_range) for task in tasks for unit in task]
+    run_progress = RunProgress(sum(size for size in sizes if size is not None), writer.progress_interval)
+    if jobs == 1 or len(tasks) <= 1:
+        set_run_progress(run_progress)
+        try:
+            task_results = [_run_task(writer, task, profile_dir=profile_dir) for task in tasks]
+        finally:
+            set_run_progress(None)
+        return [
+            _finish_unit(writer, unit, parts, [task_results[t][p] for t, p in placement], False)
+            for unit, parts, placement in zip(units, plans, placements)
+        ]
+    
+    results = []
+    with ProcessPoolExecutor(
+        max_workers=min(jobs, len(tasks)), initializer=_init_worker, initargs=(run_progress,)
+    ) as executor:
+        futures = [executor.submit(_run_task_in_worker, writer, task, profile_dir) for task in tasks]
+        for unit, parts, placement in zip(units, plans, placements):
+            part_results = []
+            for part, (task_index, position) in zip(parts, placement):
+                try:
+                    part_result = _wait_reporting(futures[task_index], run_progress)[position]
+                except Exception as e:
+                    # The worker itself died (e.g. killed or unpicklable result)
+                    part_result = UnitResult(unit=part, elapsed=0.0, error=f"{type(e).__name__}: {e}")
+                for levelno, message in part_result.log_records:
+                    logging.log(levelno, message)
+                part_results.append(part_result)
+            
+            result = _finish_unit(writer, unit, parts, part_results, True)
+            if not result.ok:
+                logging.error("Failed:     %s - %s: %s", unit.subfolder_name, unit.table_name, result.error)
+            results.append(result)
+    
+    return results
@@ -0,0 +1,119 @@
+import logging
+import multiprocessing
+import os
+import time
+from datetime import timedelta
+from typing import Any, Optional, Tuple
+
+DEFAULT_PROGRESS_INTERVAL = 30.0
+
+def format_bytes(size: float) -> str:
+    """Size in the largest unit that keeps it at least 1, e.g. 97.6 MB."""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1000:
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1000
+    return f"{size:.1f} TB"
+
+def progress_message(done_bytes: int, total_bytes: Optional[int], seconds: float) -> str:
+    """
+    Describe how far parsing got, e.g. 42.0% of 97.6 MB at 35.1 MB/s, ETA 0:00:02.
+
+    Without a total, e.g. for archive streams, only the bytes read and the
+    rate are given.
+    """
+    rate = done_bytes / seconds if seconds > 0 else 0.0
+    speed = f"{rate / 1e6:.1f} MB/s"
+    if not total_bytes:
+        return f"{format_bytes(done_bytes)} at {speed}"
+    done_bytes = min(done_bytes, total_bytes)
+    eta = timedelta(seconds=round((total_bytes - done_bytes) / rate)) if rate else "unknown"
+    return f"{100 * done_bytes / total_bytes:.1f}% of {format_bytes(total_bytes)} at {speed}, ETA {eta}"
+
+class RunProgress:
+    """
+    Input bytes parsed by all units of a run, reported with percent complete, rate and ETA.
+
+    The count is shared with worker processes, which get a copy of this
+    object when they start; only the process that created it reports.
+    """
+
+    def __init__(self, total_bytes: int, interval: float = DEFAULT_PROGRESS_INTERVAL) -> None:
+        self.total_bytes = total_bytes
+        self.interval = interval
+        self._owner = os.getpid()
+        self._parsed = multiprocessing.Value("q", 0)
+        self._start = time.monotonic()
+        self._reported = self._start
+
+    @property
+    def parsed_bytes(self) -> int:
+        return self._parsed.value
+
+    def add(self, size: int) -> None:
+        with self._parsed.get_lock():
+            self._parsed.value += size
+
+    def report(self) -> None:
+        now = time.monotonic()
+        self._reported = now
+        logging.info("Progress:   %s", progress_message(self.parsed_bytes, self.total_bytes, now - self._start))
+
+    def report_due(self) -> None:
+        """Report when interval seconds have passed since the last report."""
+        if os.getpid() == self._owner and time.monotonic() - self._reported >= self.interval:
+            self.report()
+
+# The run the units of this process belong to, if any
+_run_progress: Optional[RunProgress] = None
+
+def set_run_progress(run_progress: Optional[RunProgress]) -> None:
+    global _run_progress
+    _run_progress = run_progress
+
+class TableProgress:
+    """
+    Progress callback of one table for parse_xml_batches.
+
+    Called once per parsed batch with the byte position of the source, so
+    it costs nothing per row. Logs rows, percent complete, rate and ETA every
+    interval seconds and whenever a multiple of row_interval rows is passed,
+    and adds the bytes parsed to the run's progress.
+    """
+
+    def __init__(self, table: str, subfolder_name: str, interval: float, row_interval: int) -> None:
+        self.table = table
+        self.subfolder_name = subfolder_name
+        self.interval = interval
+        self.row_interval = row_interval
+        self._rows = 0
+        self._position = 0
+        self._start = time.monotonic()
+        self._reported = self._start
+
+    def __call__(self, rows: int, position: int, total_bytes: Optional[int]) -> None:
+        run = _run_progress
+        if run is not None and total_bytes is not None:
+            # Streams are not part of the run's total, so they are not counted either
+            run.add(position - self._position)
+        milestone = rows // self.row_interval > self._rows // self.row_interval
+        self._rows = rows
+        self._position = position
+
+        now = time.monotonic()
+        if milestone or now - self._reported >= self.interval:
+            self._reported = now
+            logging.info(
+                "            Exported %s rows for %s in %s, %s", rows, self.table, self.subfolder_name,
+                progress_message(position, total_bytes, now - self._start)
+            )
+        if run is not None:
+            run.report_due()
+
+def source_size(source: Any, byte_range: Optional[Tuple[int, int]] = None) -> Optional[int]:
+    """Bytes a unit parses: the length of its byte range or its file size; None for archive members."""
+    if byte_range is not None:
+        return byte_range[1] - byte_range[0]
+    if isinstance(source, (str, os.PathLike)) and os.path.isfile(source):
+        return os.path.getsize(source)
+    return None
@@ -0,0 +1,98 @@
+import csv
+import glob
+import os
+from typing import Any, Dict, List, Optional
+from .core import ValidationError
+from .idindex import INDEX_EXTENSION, IdIndex, IndexEntry
+from .writers import ArrowWriter
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+def read_arrow(filename: str, columns: Optional[List[str]] = None) -> "pa.Table":
+    """
+    Read an Arrow IPC file written by ArrowWriter, memory-mapped.
+
+    Columns of uncompressed files point into the mapped file, so nothing is
+    copied or decoded and only the pages that are used are read from disk;
+    opening a file takes about as long whatever its size. Compressed files
+    are decompressed into memory.
+
+    Args:
+        filename: Path of the .arrow file
+        columns: Columns to return (default: all)
+    """
+    if not PYARROW_AVAILABLE:
+        raise ImportError("pyarrow is required to read Arrow files. Install with: pip install pyarrow")
+    try:
+        # Buffers keep the mapping alive after the file is closed
+        with pa.memory_map(filename) as source:
+            table = pa.ipc.open_file(source).read_all()
+        return table.select(columns) if columns is not None else table
+    except (OSError, pa.ArrowException, KeyError) as e:
+        raise ValidationError(f"Error reading Arrow file {filename}: {e}")
+
+def read_arrow_site(site_folder: str, tables: Optional[List[str]] = None) -> Dict[str, "pa.Table"]:
+    """Memory-map the Arrow files of a converted site folder by table name, e.g. {"Posts": ...}."""
+    if not os.path.isdir(site_folder):
+        raise ValidationError(f"Site folder does not exist: {site_folder}")
+    filenames = sorted(glob.glob(os.path.join(glob.escape(site_folder), f"*{ArrowWriter.file_extension}")))
+    found = {os.path.splitext(os.path.basename(filename))[0]: filename for filename in filenames}
+    if tables is None:
+        return {table: read_arrow(filename) for table, filename in found.items()}
+    missing = [table for table in tables if table not in found]
+    if missing:
+        raise ValidationError(f"No Arrow file for {', '.join(missing)} in {site_folder}")
+    return {table: read_arrow(found[table]) for table in tables}
+
+def read_indexed_row(entry: IndexEntry) -> Dict[str, Any]:
+    """
+    Read the row at an IdIndex position, by column name.
+
+    CSV values are returned as the strings written; a Parquet lookup reads
+    the whole row group holding the row.
+    """
+    extension = os.path.splitext(entry.file)[1]
+    try:
+        if extension == ".csv":
+            with open(entry.file, 'rb') as f:
+                header = next(csv.reader([f.readline().decode("utf-8")]))
+                f.seek(entry.offset)
+                values = next(csv.reader([f.readline().decode("utf-8")]))
+            return dict(zip(header, values))
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required to read Parquet and Arrow files. Install with: pip install pyarrow")
+        if extension == ".parquet":
+            group = pq.ParquetFile(entry.file).read_row_group(entry.group)
+        elif extension == ArrowWriter.file_extension:
+            with pa.memory_map(entry.file) as source:
+                group = pa.ipc.open_file(source).get_batch(entry.group)
+        else:
+            raise ValidationError(f"Cannot read indexed rows of {entry.file}")
+        return group.slice(entry.offset, 1).to_pylist()[0]
+    except (OSError, ValueError, IndexError, StopIteration) as e:
+        raise ValidationError(f"Error reading row at {entry}: {e}")
+
+def lookup_rows(site_folder: str, table: str, key: int, column: str = "Id") -> List[Dict[str, Any]]:
+    """
+    Rows of a converted table whose column equals key, found through its index.
+
+    The table must have been converted with id_index, which indexes Id
+    and, for Comments, Votes and PostHistory, PostId; e.g.
+    lookup_rows("out/stackoverflow.com", "Comments", 12345, "PostId").
+    Raises ValidationError when there is no index or the table was
+    converted again without updating it.
+    """
+    filename = os.path.join(site_folder, f"{table}.{column}{INDEX_EXTENSION}")
+    if not os.path.isfile(filename):
+        raise ValidationError(f"No {column} index of {table} in {site_folder}; convert with id_index")
+    with IdIndex(filename) as index:
+        stale = index.stale_files()
+        if stale:
+            raise ValidationError(f"Index {filename} is out of date with {', '.join(stale)}")
+        entries = index.lookup(key)
+    return [read_indexed_row(entry) for entry in entries]
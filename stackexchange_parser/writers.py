@@ -1,148 +1,2046 @@
 import csv
+import glob
+import io
+import math
 import os
+import re
+import shutil
+import struct
 import logging
 from abc import ABC, abstractmethod
-from typing import List, Union
-from .core import parse_xml_rows, ValidationError
+from collections import OrderedDict
+from datetime import datetime
+from itertools import accumulate, chain, islice, repeat
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple, Union
+from .core import (
+    parse_xml_batches, transform_values, logical_type, source_name, validate_engine,
+    DEFAULT_ENGINE, DEFAULT_PARSE_BATCH_ROWS, ConfigurationError, ParquetOptions, ValidationError
+)
+from .checkpoint import CheckpointSession, temp_filename
+from .compression import COMPRESSION_EXTENSIONS, BlockCompressedWriter, first_member_size, validate_compression
+from .idindex import IdIndexBuilder, index_columns, index_filename
+from .metrics import ConversionStats
+from .progress import DEFAULT_PROGRESS_INTERVAL, TableProgress
 
 try:
-    import pandas as pd
-    PANDAS_AVAILABLE = True
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
 except ImportError:
-    PANDAS_AVAILABLE = False
+    PYARROW_AVAILABLE = False
+
+try:
+    import sqlite3
+    SQLITE_AVAILABLE = True
+except ImportError:
+    SQLITE_AVAILABLE = False
+
+CSV_ENCODERS = ("python", "arrow")
+DEFAULT_CSV_BUFFER_SIZE = 1024 * 1024
+
+# Partition levels, coarsest first, and the date columns partitions are taken from
+PARTITION_LEVELS = ("year", "month")
+PARTITION_DATE_COLUMNS = ("CreationDate", "Date")
+# Hive's name for the partition of rows without a (valid) date
+HIVE_NULL_PARTITION = "__HIVE_DEFAULT_PARTITION__"
+DEFAULT_MAX_OPEN_PARTITIONS = 32
+# Column naming the site of every row in unified output
+SITE_COLUMN = "site"
+
+# SQLite column types of the logical types; timestamps keep the ISO 8601 text
+# of the dump, which the SQLite date and time functions read
+SQLITE_TYPES = {
+    "int64": "INTEGER",
+    "int32": "INTEGER",
+    "int16": "INTEGER",
+    "int8": "INTEGER",
+    "bool": "INTEGER",
+    "timestamp": "TEXT",
+    "float64": "REAL",
+    "string": "TEXT",
+}
+DEFAULT_SQLITE_PAGE_SIZE = 16384
+# Name of the database of a whole run with unified SQLite output
+UNIFIED_SQLITE_DATABASE = "stackexchange"
+
+# Buffer compression codecs of Arrow IPC files; uncompressed files are read without copying
+ARROW_COMPRESSIONS = ("lz4", "zstd")
+
+# PostgreSQL binary COPY format: signature, flags and header extension length,
+# and the field count of -1 that ends the data
+PGCOPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+PGCOPY_TRAILER = struct.pack(">h", -1)
+PGCOPY_NULL = struct.pack(">i", -1)
+# PostgreSQL column types of the logical types; PostgreSQL has no one-byte integer
+POSTGRES_TYPES = {
+    "int64": "bigint",
+    "int32": "integer",
+    "int16": "smallint",
+    "int8": "smallint",
+    "bool": "boolean",
+    "timestamp": "timestamp",
+    "float64": "double precision",
+    "string": "text",
+}
+# Binary timestamps count microseconds from this moment
+POSTGRES_EPOCH = datetime(2000, 1, 1)
+
+def arrow_type(sql_type: Optional[str]) -> "pa.DataType":
+    """Return the Arrow type written for a SQL Server column type."""
+    return {
+        "int64": pa.int64,
+        "int32": pa.int32,
+        "int16": pa.int16,
+        "int8": pa.int8,
+        "bool": pa.bool_,
+        "timestamp": lambda: pa.timestamp("ms"),
+        "float64": pa.float64,
+        "string": pa.string,
+    }[logical_type(sql_type)]()
+
+def arrow_column(values: List[Optional[str]], target: Optional["pa.DataType"] = None) -> "pa.Array":
+    """
+    Build an Arrow array from raw attribute values, transformed like transform_values.
+    
+    Line breaks are escaped when the result is a string column and
+    "True"/"False" become 1/0: as strings for typed columns, which are then
+    cast to target, and as integers for untyped all-boolean columns. Raises
+    pa.ArrowInvalid for untyped columns mixing booleans and other strings.
+    """
+    array = pa.array(values, type=pa.string())
+    if target is None or pa.types.is_string(target):
+        array = pc.replace_substring(pc.replace_substring(array, "\r", "&#xD;"), "\n", "&#xA;")
+    is_true = pc.equal(array, "True")
+    is_false = pc.equal(array, "False")
+    booleans = pc.or_(is_true, is_false)
+    if pc.any(booleans).as_py():
+        if target is not None:
+            array = pc.if_else(is_true, "1", pc.if_else(is_false, "0", array))
+        elif pc.all(booleans).as_py():
+            array = pc.if_else(is_true, 1, 0)
+        else:
+            raise pa.ArrowInvalid("column mixes booleans and strings")
+    if target is not None and not array.type.equals(target):
+        array = array.cast(target)
+    return array
+
+def arrow_table(
+    chunk: List[List[Optional[str]]], 
+    columns: List[str], 
+    column_types: Optional[Dict[str, str]] = None
+) -> "pa.Table":
+    """
+    Convert a chunk of raw column values to an Arrow table.
+    
+    Every column is transformed with Arrow compute kernels by
+    arrow_column and cast to the Arrow type of its SQL Server type in one
+    vectorized step. Untyped columns stay strings, except boolean columns
+    whose 0/1 values keep an inferred integer type.
+    """
+    arrays = []
+    for name, values in zip(columns, chunk):
+        target = arrow_type(column_types[name]) if column_types and name in column_types else None
+        try:
+            array = arrow_column(values, target)
+        except (pa.ArrowTypeError, pa.ArrowInvalid) as e:
+            expected = column_types[name] if target is not None else "a single type"
+            raise ValidationError(f"Cannot convert column {name} to {expected}: {e}")
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, names=columns)
+
+def encode_csv_lines(arrays: List["pa.Array"]) -> "pa.Buffer":
+    """
+    Encode string columns as CSV lines, byte for byte as csv.writer does with QUOTE_MINIMAL.
+    
+    Values holding a delimiter, quote or line break are quoted with quotes
+    doubled, nulls are written empty and a line of one empty field is
+    written as "". Lines end with \r\n.
+    """
+    fields = []
+    for array in arrays:
+        array = array.fill_null("")
+        needs_quotes = pc.match_substring_regex(array, '[,"\r\n]')
+        if len(arrays) == 1:
+            needs_quotes = pc.or_(needs_quotes, pc.equal(array, ""))
+        if pc.any(needs_quotes).as_py():
+            quoted = pc.binary_join_element_wise('"', pc.replace_substring(array, '"', '""'), '"', "")
+            array = pc.if_else(needs_quotes, quoted, array)
+        fields.append(array)
+    lines = pc.binary_join_element_wise(pc.binary_join_element_wise(*fields, ","), "\r\n", "")
+    # The encoded lines are the stretch of the data buffer between the first and last offsets
+    validity, offsets, data = lines.buffers()
+    offsets = pa.Array.from_buffers(pa.int32(), len(lines) + 1, [None, offsets], offset=lines.offset)
+    return data[offsets[0].as_py():offsets[-1].as_py()]
+
+def parquet_write_options(options: Optional[ParquetOptions], columns: List[str]) -> Dict[str, Any]:
+    """
+    Keyword arguments for pq.write_table and pq.ParquetWriter from a table's ParquetOptions.
+    
+    Options that are not configured for any column keep the pyarrow defaults.
+    """
+    if options is None:
+        return {}
+    kwargs: Dict[str, Any] = {}
+    for option, argument, default in (
+        ("dictionary", "use_dictionary", True),
+        ("statistics", "write_statistics", True),
+        ("byte_stream_split", "use_byte_stream_split", False),
+    ):
+        values = {column: options.column_option(column, option) for column in columns}
+        if any(value is not None for value in values.values()):
+            kwargs[argument] = [column for column, value in values.items() if (default if value is None else value)]
+    
+    codecs = {column: options.column_option(column, "compression") for column in columns}
+    if any(codecs.values()):
+        kwargs["compression"] = {column: codec or "snappy" for column, codec in codecs.items()}
+    levels = {column: options.column_option(column, "compression_level") for column in columns}
+    levels = {column: level for column, level in levels.items() if level is not None}
+    if levels:
+        kwargs["compression_level"] = levels
+    return kwargs
+
+def is_stream(destination: Union[str, BinaryIO]) -> bool:
+    """Whether a source or destination is an open file-like object rather than a path."""
+    return not isinstance(destination, (str, os.PathLike))
+
+def _validate_destination_dir(destinationfilename: Union[str, BinaryIO]) -> None:
+    if is_stream(destinationfilename):
+        return
+    dest_dir = os.path.dirname(destinationfilename)
+    if dest_dir and not os.path.isdir(dest_dir):
+        raise ValidationError(f"Destination directory does not exist: {dest_dir}")
+
+def _remove_uncommitted(directory: str, committed: List[str]) -> None:
+    """Remove every file below a folder that is not committed, and the folders left empty."""
+    keep = {os.path.normpath(filename) for filename in committed}
+    for folder, _, filenames in os.walk(directory, topdown=False):
+        for filename in filenames:
+            path = os.path.join(folder, filename)
+            if os.path.normpath(path) not in keep:
+                os.remove(path)
+        if folder != directory and not os.listdir(folder):
+            os.rmdir(folder)
+
+def _part_filename(destinationfilename: str, filenumber: int) -> str:
+    """The name of a numbered part of an output, e.g. Posts.parquet -> Posts_part0002.parquet."""
+    stem, extension = os.path.splitext(destinationfilename)
+    return f"{stem}_part{filenumber:04d}{extension}"
 
 class BaseWriter(ABC):
-    def __init__(self, progress_indicator_value: int = 10000000) -> None:
+    file_extension = ""
+    unified = False
+    id_index = False
+    # What the offsets of IdIndex entries count: rows within a group, or bytes
+    index_positions = "rows"
+    
+    def __init__(
+        self, 
+        progress_indicator_value: int = 10000000, 
+        engine: str = DEFAULT_ENGINE, 
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL
+    ) -> None:
         self.progress_indicator_value = progress_indicator_value
+        self.engine = validate_engine(engine)
+        if progress_interval <= 0:
+            raise ValueError("Progress interval must be greater than 0")
+        self.progress_interval = progress_interval
     
     @abstractmethod
     def write_from_xml(
         self, 
-        sourcefilename: str, 
+        sourcefilename: Union[str, BinaryIO], 
         table: str, 
         columns: List[str], 
-        destinationfilename: str, 
-        subfolder_name: str
-    ) -> None:
-        pass
+        destinationfilename: Union[str, BinaryIO], 
+        subfolder_name: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        column_types: Optional[Dict[str, str]] = None,
+        resume: bool = False
+    ) -> ConversionStats:
+        """Convert a table, returning the rows parsed and the time spent parsing them."""
+    
+    def destination(self, outputdir: str, site_name: str, table: str) -> str:
+        """Destination of one table of a site in a full conversion."""
+        return os.path.join(outputdir, site_name, f"{table}{self.file_extension}")
+    
+    def output_files(self, destinationfilename: str) -> List[str]:
+        """Return the files written for a destination, in order."""
+        return [destinationfilename] if os.path.isfile(destinationfilename) else []
+    
+    def merge_parts(self, part_destinations: List[str], destinationfilename: str) -> None:
+        """Combine outputs written for consecutive byte ranges into the final destination."""
+        raise NotImplementedError(f"{type(self).__name__} does not support split input files")
+    
+    def combine_sites(self, outputdir: str, table: str, site_destinations: List[Tuple[str, str]]) -> None:
+        """Combine the outputs of a table converted for (site, destination) pairs; only unified writers do."""
+        raise NotImplementedError(f"{type(self).__name__} does not support unified output")
+    
+    def combine_tables(self, outputdir: str, site_name: str) -> None:
+        """Combine the converted tables of a site once a run is done; only writers with one file per site do."""
     
-    def _create_progress_callback(self, table: str, subfolder_name: str):
-        def progress_callback(rowcounter: int) -> None:
-            if (rowcounter % self.progress_indicator_value == 0):
-                logging.info("            Exported %s rows for %s in %s", rowcounter, table, subfolder_name)
-        return progress_callback
+    def output_settings(self, table: Optional[str] = None) -> Dict[str, Any]:
+        """Settings that shape the written files of a table; a checkpoint is only resumed with the same ones."""
+        if self.id_index:
+            return {"writer": type(self).__name__, "id_index": True}
+        return {"writer": type(self).__name__}
+    
+    def write_id_indexes(self, destinationfilename: str) -> List[str]:
+        """
+        Index the Id column of a converted table, and PostId of the tables in POST_ID_TABLES.
+        
+        Every index, e.g. Posts.Id.idx next to Posts.csv, maps the keys to
+        the positions of their rows in the output files; see IdIndex.
+        Returns the index files written.
+        """
+        table = os.path.basename(destinationfilename)[:-len(self.file_extension)]
+        files = self.output_files(destinationfilename)
+        if not files:
+            return []
+        written = []
+        for column in index_columns(table, self._output_columns(files[0])):
+            builder = IdIndexBuilder(table, column)
+            for filename in files:
+                file_number = builder.add_file(filename)
+                for group, keys, offsets in self._index_positions(filename, column):
+                    builder.add(file_number, group, keys, offsets)
+            written.append(index_filename(destinationfilename, column))
+            builder.write(written[-1], self.index_positions)
+            logging.info("Indexed:    %s (%s rows)", os.path.basename(written[-1]), len(builder.keys))
+        return written
+    
+    def _output_columns(self, filename: str) -> List[str]:
+        """Column names of an output file."""
+        raise NotImplementedError(f"{type(self).__name__} does not support Id indexes")
+    
+    def _index_positions(self, filename: str, column: str) -> Iterator[Tuple[int, List[Any], Iterable[int]]]:
+        """(group, keys, offsets) of the rows of an output file, in order."""
+        raise NotImplementedError(f"{type(self).__name__} does not support Id indexes")
+    
+    def _start_checkpoint(
+        self, 
+        sourcefilename: Union[str, BinaryIO], 
+        destinationfilename: Union[str, BinaryIO], 
+        columns: List[str], 
+        byte_range: Optional[Tuple[int, int]], 
+        resume: bool,
+        table: Optional[str] = None
+    ) -> Optional[CheckpointSession]:
+        """Start checkpointing a whole-table conversion to a file on disk."""
+        if is_stream(destinationfilename) or byte_range is not None:
+            return None
+        checkpoint = CheckpointSession(
+            sourcefilename, destinationfilename, columns, self.output_settings(table), resume
+        )
+        checkpoint.start(self.output_files(destinationfilename))
+        return checkpoint
+    
+    def _create_progress_callback(self, table: str, subfolder_name: str) -> TableProgress:
+        return TableProgress(table, subfolder_name, self.progress_interval, self.progress_indicator_value)
 
 class CSVWriter(BaseWriter):
+    file_extension = ".csv"
+    index_positions = "bytes"
+    PARSE_BATCH_ROWS = DEFAULT_PARSE_BATCH_ROWS
+    
+    def __init__(
+        self, 
+        progress_indicator_value: int = 10000000, 
+        engine: str = DEFAULT_ENGINE, 
+        checkpoint_rows: int = 1000000,
+        buffer_size: int = DEFAULT_CSV_BUFFER_SIZE,
+        encoder: str = "python",
+        compression: Optional[str] = None,
+        compression_threads: Optional[int] = None,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        id_index: bool = False
+    ) -> None:
+        """
+        Args:
+            progress_indicator_value: Log progress every this many rows
+            engine: XML parsing engine, one of PARSER_ENGINES
+            checkpoint_rows: Record a checkpoint every this many rows, from
+                             which an interrupted conversion is resumed
+            buffer_size: Bytes buffered before output files are written to
+            encoder: One of CSV_ENCODERS; "python" encodes rows with the csv
+                     module, "arrow" encodes whole batches with pyarrow
+                     compute kernels. Both write identical bytes.
+            compression: Compress output with "gzip", "zstd" or "bz2"; the
+                         extension is appended to file_extension
+            compression_threads: Threads compressing blocks in parallel
+                                 (default: one per CPU)
+            progress_interval: Also log progress, with percent of the input
+                               parsed and ETA, every this many seconds
+            id_index: Index every table by Id (and PostId) once written,
+                      mapping keys to byte offsets of lines; see
+                      write_id_indexes. Needs uncompressed output.
+        """
+        super().__init__(progress_indicator_value, engine, progress_interval)
+        if checkpoint_rows <= 0:
+            raise ValueError("Checkpoint interval must be greater than 0")
+        self.checkpoint_rows = checkpoint_rows
+        if buffer_size <= 0:
+            raise ValueError("Buffer size must be greater than 0")
+        self.buffer_size = buffer_size
+        if encoder not in CSV_ENCODERS:
+            raise ConfigurationError(f"Unknown CSV encoder '{encoder}'. Choose from: {', '.join(CSV_ENCODERS)}")
+        if encoder == "arrow" and not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for the arrow CSV encoder. Install with: pip install pyarrow")
+        self.encoder = encoder
+        self.compression = validate_compression(compression)
+        self.compression_threads = compression_threads
+        if self.compression:
+            self.file_extension = CSVWriter.file_extension + COMPRESSION_EXTENSIONS[self.compression]
+        if id_index and self.compression:
+            raise ValueError("Id indexes need uncompressed CSV output")
+        self.id_index = id_index
+    
     def write_from_xml(
         self, 
-        sourcefilename: str, 
+        sourcefilename: Union[str, BinaryIO], 
         table: str, 
         columns: List[str], 
-        destinationfilename: str, 
-        subfolder_name: str
-    ) -> None:
-        logging.info("Exporting:  %s - %s.csv", subfolder_name, table)
+        destinationfilename: Union[str, BinaryIO], 
+        subfolder_name: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        column_types: Optional[Dict[str, str]] = None,
+        resume: bool = False
+    ) -> ConversionStats:
+        logging.info("Exporting:  %s - %s%s", subfolder_name, table, self.file_extension)
+        stats = ConversionStats()
         
         progress_callback = self._create_progress_callback(table, subfolder_name)
         
         # Validate destination directory exists
-        dest_dir = os.path.dirname(destinationfilename)
-        if dest_dir and not os.path.isdir(dest_dir):
-            raise ValidationError(f"Destination directory does not exist: {dest_dir}")
+        _validate_destination_dir(destinationfilename)
         
         try:
-            with open(destinationfilename, 'w', newline='', encoding="utf-8") as f:
-                writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
-                writer.writerow(columns)
-                
-                for row in parse_xml_rows(sourcefilename, columns, progress_callback):
-                    # Convert None to empty string for CSV compatibility
-                    csv_row = ['' if cell is None else cell for cell in row]
-                    writer.writerow(csv_row)
+            if is_stream(destinationfilename):
+                # Wrap the binary stream without taking ownership; the caller closes it
+                binary = self._compressed(destinationfilename, owned=False) if self.compression else destinationfilename
+                f = io.TextIOWrapper(binary, encoding="utf-8", newline='')
+                try:
+                    self._write_rows(f, sourcefilename, columns, progress_callback, byte_range, stats)
+                finally:
+                    f.flush()
+                    f.detach()
+                    if binary is not destinationfilename:
+                        binary.close()
+            else:
+                self._write_file(sourcefilename, columns, destinationfilename, progress_callback, byte_range, resume, stats)
         except PermissionError:
-            raise ValidationError(f"Permission denied writing to file: {destinationfilename}")
+            raise ValidationError(f"Permission denied writing to file: {source_name(destinationfilename)}")
         except Exception as e:
-            raise ValidationError(f"Error writing CSV file {destinationfilename}: {e}")
+            raise ValidationError(f"Error writing CSV file {source_name(destinationfilename)}: {e}")
+        return stats
+    
+    def _write_file(
+        self, 
+        sourcefilename: Union[str, BinaryIO], 
+        columns: List[str], 
+        destinationfilename: str, 
+        progress_callback: TableProgress, 
+        byte_range: Optional[Tuple[int, int]], 
+        resume: bool,
+        stats: ConversionStats
+    ) -> None:
+        """Write to a temporary file that is renamed into place once complete."""
+        checkpoint = self._start_checkpoint(sourcefilename, destinationfilename, columns, byte_range, resume)
+        temp_file = temp_filename(destinationfilename)
+        mode = 'w'
+        if checkpoint is not None and checkpoint.resumed:
+            # Drop rows written after the last checkpoint and append from there
+            with open(temp_file, 'r+b') as f:
+                f.truncate(checkpoint.output_bytes)
+            mode = 'a'
+            byte_range = checkpoint.remaining_range()
+        
+        if self.compression:
+            f = io.TextIOWrapper(
+                self._compressed(open(temp_file, mode + 'b', buffering=self.buffer_size)), encoding="utf-8", newline=''
+            )
+        else:
+            f = open(temp_file, mode, buffering=self.buffer_size, newline='', encoding="utf-8")
+        with f:
+            self._write_rows(f, sourcefilename, columns, progress_callback, byte_range, stats, checkpoint)
+        os.replace(temp_file, destinationfilename)
+        if checkpoint is not None:
+            checkpoint.finish()
+    
+    def _write_rows(
+        self, 
+        f: TextIO, 
+        sourcefilename: Union[str, BinaryIO], 
+        columns: List[str], 
+        progress_callback: TableProgress, 
+        byte_range: Optional[Tuple[int, int]], 
+        stats: ConversionStats,
+        checkpoint: Optional[CheckpointSession] = None
+    ) -> None:
+        rowcounter = 0
+        if checkpoint is not None and checkpoint.resumed:
+            rowcounter = checkpoint.rows
+        
+        if self.encoder == "arrow":
+            # Encoded batches go straight to the byte buffer under the text layer
+            f.flush()
+            def write_batch(batch: List[List[Optional[str]]]) -> None:
+                with stats.stage("transform"):
+                    arrays = [arrow_column(values, pa.string()) for values in batch]
+                with stats.stage("encode"):
+                    lines = encode_csv_lines(arrays)
+                with stats.stage("write"):
+                    f.buffer.write(lines)
+        else:
+            writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+            def write_batch(batch: List[List[Optional[str]]]) -> None:
+                with stats.stage("transform"):
+                    batch = [transform_values(values) for values in batch]
+                # csv writes None as an empty string, and full buffers while encoding
+                with stats.stage("encode"):
+                    writer.writerows(zip(*batch))
+        if not rowcounter:
+            write_batch([[column] for column in columns])
+            # Compressed, the header is a block of its own that merge_parts can skip
+            f.flush()
+        
+        # Checkpoints are taken after the batch that reaches each interval
+        batch_size = min(self.PARSE_BATCH_ROWS, self.checkpoint_rows)
+        for batch in stats.timed(parse_xml_batches(
+            sourcefilename, columns, batch_size, progress_callback, byte_range, self.engine,
+            transform=False
+        )):
+            write_batch(batch)
+            previous = rowcounter
+            rowcounter += len(batch[0])
+            if checkpoint is not None and rowcounter // self.checkpoint_rows > previous // self.checkpoint_rows:
+                with stats.stage("write"):
+                    f.flush()
+                checkpoint.commit(rowcounter, [f.name], os.fstat(f.fileno()).st_size)
+    
+    def _compressed(self, raw: BinaryIO, owned: bool = True) -> BlockCompressedWriter:
+        return BlockCompressedWriter(raw, self.compression, self.compression_threads, owned=owned)
+    
+    def output_settings(self, table: Optional[str] = None) -> Dict[str, Any]:
+        if self.compression:
+            return {**super().output_settings(table), "compression": self.compression}
+        return super().output_settings(table)
+    
+    def _output_columns(self, filename: str) -> List[str]:
+        with open(filename, 'r', newline='', encoding="utf-8") as f:
+            return next(csv.reader(f), [])
+    
+    def _index_positions(self, filename: str, column: str) -> Iterator[Tuple[int, List[Any], Iterable[int]]]:
+        """Keys and line offsets; every row is one line, as line breaks in values are escaped."""
+        with open(filename, 'rb') as f:
+            position = next(csv.reader([f.readline().decode("utf-8")])).index(column)
+            offset = f.tell()
+            while True:
+                lines = list(islice(f, self.PARSE_BATCH_ROWS))
+                if not lines:
+                    return
+                offsets = list(accumulate(map(len, lines), initial=offset))
+                offset = offsets.pop()
+                keys = [row[position] for row in csv.reader([line.decode("utf-8") for line in lines])]
+                yield 0, keys, offsets
+    
+    def merge_parts(self, part_destinations: List[str], destinationfilename: str) -> None:
+        """Concatenate part files, keeping only the header of the first one."""
+        try:
+            with open(temp_filename(destinationfilename), 'wb') as out:
+                for index, part in enumerate(part_destinations):
+                    with open(part, 'rb') as f:
+                        if index > 0 and self.compression:
+                            f.seek(first_member_size(f, self.compression))
+                        elif index > 0:
+                            f.readline()
+                        shutil.copyfileobj(f, out, 16 * 1024 * 1024)
+            os.replace(temp_filename(destinationfilename), destinationfilename)
+        except Exception as e:
+            raise ValidationError(f"Error merging CSV parts into {destinationfilename}: {e}")
+        
+        for part in part_destinations:
+            os.remove(part)
+
+class _ParquetFileSequence:
+    """
+    Streams tables into one open Parquet file as row groups.
+    
+    Each file is written under a temporary name and renamed once closed.
+    When max_file_bytes is set and the current file grows past it, the file is
+    closed as _partNNNN, recorded in the checkpoint if there is one, and
+    writing continues in the next part; a sequence of a single file takes
+    the destination name, so a table never mixes naming schemes. A stream
+    destination receives a single file and never rolls over.
+    """
+    
+    def __init__(
+        self, 
+        destinationfilename: Union[str, BinaryIO], 
+        row_group_size: int, 
+        max_file_bytes: Optional[int] = None, 
+        checkpoint: Optional[CheckpointSession] = None,
+        write_options: Optional[Dict[str, Any]] = None
+    ) -> None:
+        self.destinationfilename = destinationfilename
+        self.row_group_size = row_group_size
+        self.write_options = write_options or {}
+        self.max_file_bytes = max_file_bytes
+        self.checkpoint = checkpoint
+        self.files: List[str] = []
+        self.rows = 0
+        if checkpoint is not None and checkpoint.resumed:
+            self.files = checkpoint.files
+            self.rows = checkpoint.rows
+        self._schema = None
+        self._writer = None
+    
+    def _open_next_file(self) -> None:
+        if is_stream(self.destinationfilename):
+            self.files.append(source_name(self.destinationfilename))
+            self._writer = pq.ParquetWriter(self.destinationfilename, self._schema, **self.write_options)
+            return
+        filename = _part_filename(self.destinationfilename, len(self.files) + 1)
+        self.files.append(filename)
+        self._writer = pq.ParquetWriter(temp_filename(filename), self._schema, **self.write_options)
+    
+    def _close_file(self) -> None:
+        self._writer.close()
+        self._writer = None
+        if not is_stream(self.destinationfilename):
+            os.replace(temp_filename(self.files[-1]), self.files[-1])
+    
+    def write(self, table: "pa.Table") -> None:
+        if self._schema is None:
+            self._schema = table.schema
+        elif not table.schema.equals(self._schema):
+            table = table.cast(self._schema)
+        
+        for offset in range(0, table.num_rows, self.row_group_size):
+            if self._writer is None:
+                self._open_next_file()
+            row_group = table.slice(offset, self.row_group_size)
+            self._writer.write_table(row_group, row_group_size=self.row_group_size)
+            self.rows += row_group.num_rows
+            if self.max_file_bytes and not is_stream(self.destinationfilename) \
+                    and os.path.getsize(temp_filename(self.files[-1])) >= self.max_file_bytes:
+                self._close_file()
+                if self.checkpoint is not None:
+                    self.checkpoint.commit(self.rows, self.files)
+    
+    def close(self) -> List[str]:
+        if self._writer is not None:
+            self._close_file()
+        if len(self.files) == 1 and not is_stream(self.destinationfilename):
+            os.replace(self.files[0], self.destinationfilename)
+            self.files[0] = self.destinationfilename
+        return self.files
+    
+    def abort(self) -> None:
+        """Close after an error, discarding the file being written."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            if not is_stream(self.destinationfilename):
+                os.remove(temp_filename(self.files.pop()))
+
+class _ParquetPartitionSet:
+    """
+    Streams tables into Hive-style partition folders below a destination folder.
+    
+    Every partition folder, e.g. year=2020/month=05, is written as files
+    named part-NNNNN.parquet, numbered across the whole destination. At most
+    max_open files are open at a time: when another partition is written to,
+    the least recently written file is closed, and the partition continues
+    in a new file if it receives rows again. Files are written under a
+    temporary name and renamed once closed.
+    """
+    
+    def __init__(
+        self, 
+        directory: str, 
+        max_open: int, 
+        row_group_size: int, 
+        write_options: Optional[Dict[str, Any]] = None,
+        files: Optional[List[str]] = None
+    ) -> None:
+        self.directory = directory
+        self.max_open = max_open
+        self.row_group_size = row_group_size
+        self.write_options = write_options or {}
+        self.files = list(files or [])
+        self._schema = None
+        self._open: "OrderedDict[str, Tuple[str, pq.ParquetWriter]]" = OrderedDict()
+    
+    def write(self, partition: str, table: "pa.Table") -> None:
+        if self._schema is None:
+            self._schema = table.schema
+        elif not table.schema.equals(self._schema):
+            table = table.cast(self._schema)
+        
+        if partition in self._open:
+            self._open.move_to_end(partition)
+        else:
+            if len(self._open) >= self.max_open:
+                self._close(*self._open.popitem(last=False)[1])
+            folder = os.path.join(self.directory, partition)
+            os.makedirs(folder, exist_ok=True)
+            filename = os.path.join(folder, f"part-{len(self.files) + 1:05d}.parquet")
+            self.files.append(filename)
+            self._open[partition] = (filename, pq.ParquetWriter(temp_filename(filename), self._schema, **self.write_options))
+        self._open[partition][1].write_table(table, row_group_size=self.row_group_size)
+    
+    @staticmethod
+    def _close(filename: str, writer: "pq.ParquetWriter") -> None:
+        writer.close()
+        os.replace(temp_filename(filename), filename)
+    
+    def open_bytes(self) -> int:
+        """Bytes written so far to the files that are open."""
+        return sum(os.path.getsize(temp_filename(filename)) for filename, _ in self._open.values())
+    
+    def close_all(self) -> List[str]:
+        """Close every open file, returning all files written so far."""
+        while self._open:
+            self._close(*self._open.popitem(last=False)[1])
+        return list(self.files)
+    
+    def abort(self) -> None:
+        """Close after an error, discarding the files being written."""
+        while self._open:
+            filename, writer = self._open.popitem(last=False)[1]
+            writer.close()
+            os.remove(temp_filename(filename))
+            self.files.remove(filename)
 
 class ParquetWriter(BaseWriter):
-    def __init__(self, progress_indicator_value: int = 10000000, batch_size: int = 1000000) -> None:
-        super().__init__(progress_indicator_value)
+    file_extension = ".parquet"
+    ARROW_CHUNK_ROWS = 65536
+    # Partitioned output closes its open files to record a checkpoint once
+    # they hold this many bytes, so partitions are not split into small files
+    PARTITION_CHECKPOINT_BYTES = 256 * 1024 * 1024
+    
+    def __init__(
+        self, 
+        progress_indicator_value: int = 10000000, 
+        batch_size: int = 1000000,
+        single_file: bool = False,
+        row_group_size: Optional[int] = None,
+        max_file_bytes: Optional[int] = None,
+        engine: str = DEFAULT_ENGINE,
+        table_options: Optional[Dict[str, ParquetOptions]] = None,
+        batch_bytes: Optional[int] = None,
+        partition_by: Optional[str] = None,
+        max_open_partitions: int = DEFAULT_MAX_OPEN_PARTITIONS,
+        unified: bool = False,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        id_index: bool = False
+    ) -> None:
+        """
+        Args:
+            progress_indicator_value: Log progress every this many rows
+            batch_size: Rows buffered before they are written out; in the
+                        default mode every batch becomes its own _partNNNN file
+            single_file: Keep one Parquet file open per table and stream each
+                         batch into it as row groups; always the case when
+                         writing to a stream
+            row_group_size: Maximum rows per row group in single-file mode
+                            (default: batch_size)
+            max_file_bytes: In single-file mode, roll over to a new _partNNNN
+                            file once the current one exceeds this size
+            engine: XML parsing engine, one of PARSER_ENGINES
+            table_options: Encoding, compression, statistics and row group
+                           size per table and column, as returned by
+                           load_parquet_options; a table's row group size
+                           takes precedence over row_group_size
+            batch_bytes: Also write a batch out once its Arrow data reaches
+                         this many bytes, so batches of wide text tables stay
+                         within a memory budget while batch_size bounds the
+                         rows of narrow ones
+            partition_by: "year" or "month" to write every table of a site
+                          as a Hive-style partitioned folder,
+                          Table/site=.../year=YYYY[/month=MM]/, by its
+                          CreationDate or Date column
+            max_open_partitions: Partition files kept open at a time when
+                                 partitioning
+            unified: Combine the sites of every table into one dataset,
+                     Table.parquet (or its _partNNNN files with
+                     max_file_bytes), with a dictionary-encoded site column;
+                     see combine_sites
+            progress_interval: Also log progress, with percent of the input
+                               parsed and ETA, every this many seconds
+            id_index: Index every table by Id (and PostId) once written,
+                      mapping keys to their file, row group and row; see
+                      write_id_indexes. Lookups read a whole row group, so
+                      smaller row groups make them faster.
+        """
+        super().__init__(progress_indicator_value, engine, progress_interval)
         
         if batch_size <= 0:
             raise ValueError("Batch size must be greater than 0")
         self.batch_size = batch_size
+        if batch_bytes is not None and batch_bytes <= 0:
+            raise ValueError("Batch byte size must be greater than 0")
+        self.batch_bytes = batch_bytes
         
-        if not PANDAS_AVAILABLE:
-            raise ImportError("pandas and pyarrow are required for Parquet output. Install with: pip install pandas pyarrow")
+        if row_group_size is not None and row_group_size <= 0:
+            raise ValueError("Row group size must be greater than 0")
+        if max_file_bytes is not None and max_file_bytes <= 0:
+            raise ValueError("Maximum file size must be greater than 0")
+        self.single_file = single_file
+        self.row_group_size = row_group_size or batch_size
+        self.max_file_bytes = max_file_bytes
+        self.table_options = table_options or {}
         
-        # Check if pyarrow is available
-        try:
-            import pyarrow
-        except ImportError:
+        if partition_by is not None and partition_by not in PARTITION_LEVELS:
+            raise ConfigurationError(
+                f"Unknown partitioning '{partition_by}'. Choose from: {', '.join(PARTITION_LEVELS)}"
+            )
+        if partition_by is not None and single_file:
+            raise ValueError("Partitioned output cannot be combined with single-file mode")
+        if max_open_partitions <= 0:
+            raise ValueError("Maximum open partitions must be greater than 0")
+        self.partition_by = partition_by
+        self.max_open_partitions = max_open_partitions
+        if unified and partition_by is not None:
+            raise ValueError("Unified output cannot be combined with partitioned output")
+        self.unified = unified
+        if id_index and (unified or partition_by is not None):
+            raise ValueError("Id indexes cannot be combined with unified or partitioned output")
+        self.id_index = id_index
+        
+        if not PYARROW_AVAILABLE:
             raise ImportError("pyarrow is required for Parquet output. Install with: pip install pyarrow")
     
     def write_from_xml(
         self, 
-        sourcefilename: str, 
+        sourcefilename: Union[str, BinaryIO], 
         table: str, 
         columns: List[str], 
-        destinationfilename: str, 
-        subfolder_name: str
-    ) -> None:
-        logging.info("Exporting:  %s - %s.parquet (batch size: %s)", subfolder_name, table, self.batch_size)
+        destinationfilename: Union[str, BinaryIO], 
+        subfolder_name: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        column_types: Optional[Dict[str, str]] = None,
+        resume: bool = False
+    ) -> ConversionStats:
+        if self.partition_by:
+            return self._write_partitioned(
+                sourcefilename, table, columns, destinationfilename, subfolder_name, byte_range, column_types, resume
+            )
+        logging.info(
+            "Exporting:  %s - %s.parquet (batch size: %s%s)", subfolder_name, table, self.batch_size,
+            f" rows or {self.batch_bytes} bytes" if self.batch_bytes else ""
+        )
         
         # Validate destination directory exists
-        dest_dir = os.path.dirname(destinationfilename)
-        if dest_dir and not os.path.isdir(dest_dir):
-            raise ValidationError(f"Destination directory does not exist: {dest_dir}")
+        _validate_destination_dir(destinationfilename)
         
         progress_callback = self._create_progress_callback(table, subfolder_name)
         
-        batch_data = []
-        filenumber = 1
+        # Every part file is recorded in the checkpoint once renamed into place,
+        # so a resumed conversion continues with the next part
+        checkpoint = self._start_checkpoint(sourcefilename, destinationfilename, columns, byte_range, resume, table)
+        files = []
+        rows_written = 0
+        if checkpoint is not None and checkpoint.resumed:
+            byte_range = checkpoint.remaining_range()
+            files = checkpoint.files
+            rows_written = checkpoint.rows
+        
+        # Rows are parsed and converted to Arrow arrays in chunks, so at most
+        # ARROW_CHUNK_ROWS rows are ever held as Python objects
+        def chunk_tables() -> Iterator["pa.Table"]:
+            for chunk in stats.timed(parse_xml_batches(
+                sourcefilename, columns, self.ARROW_CHUNK_ROWS, progress_callback, byte_range, self.engine,
+                transform=False
+            )):
+                with stats.stage("transform"):
+                    chunk_table = arrow_table(chunk, columns, column_types)
+                yield chunk_table
         
-        for row in parse_xml_rows(sourcefilename, columns, progress_callback):
-            batch_data.append(row)
-            
-            if len(batch_data) >= self.batch_size:
-                self._write_batch(batch_data, columns, destinationfilename, filenumber, subfolder_name)
-                batch_data = []
+        filenumber = len(files)
+        write_options, row_group_size = self._table_write_options(table, columns)
+        # Part files keep the pyarrow default row groups unless the table configures a size
+        file_options = {**write_options, "row_group_size": row_group_size} if row_group_size else write_options
+        sequence = None
+        if self.single_file or is_stream(destinationfilename):
+            sequence = _ParquetFileSequence(
+                destinationfilename, row_group_size or self.row_group_size, self.max_file_bytes, checkpoint, write_options
+            )
+        
+        stats = ConversionStats()
+        completed = False
+        try:
+            for batch_chunks, full in self._batches(chunk_tables()):
                 filenumber += 1
+                with stats.stage("write"):
+                    if sequence:
+                        self._write_row_groups(sequence, batch_chunks, filenumber)
+                    elif full:
+                        files.append(self._write_batch(batch_chunks, destinationfilename, filenumber, file_options))
+                    else:
+                        self._write_final_batch(batch_chunks, destinationfilename, filenumber, file_options)
+                if full and not sequence:
+                    rows_written += sum(piece.num_rows for piece in batch_chunks)
+                    if checkpoint is not None:
+                        checkpoint.commit(rows_written, files)
+            completed = True
+        finally:
+            if sequence and completed:
+                with stats.stage("write"):
+                    sequence.close()
+            elif sequence:
+                sequence.abort()
         
-        if batch_data:
-            self._write_final_batch(batch_data, columns, destinationfilename, filenumber, subfolder_name)
+        if checkpoint is not None:
+            checkpoint.finish()
+        return stats
     
-    def _write_batch(
+    def _output_columns(self, filename: str) -> List[str]:
+        return pq.read_schema(filename).names
+    
+    def _index_positions(self, filename: str, column: str) -> Iterator[Tuple[int, List[Any], Iterable[int]]]:
+        parquet_file = pq.ParquetFile(filename)
+        for group in range(parquet_file.num_row_groups):
+            keys = parquet_file.read_row_group(group, columns=[column]).column(0).to_pylist()
+            yield group, keys, range(len(keys))
+    
+    def _batches(self, chunk_tables: Iterable["pa.Table"]) -> Iterator[Tuple[List["pa.Table"], bool]]:
+        """
+        Slice chunks into batches of exactly batch_size rows, or about
+        batch_bytes of Arrow data when that is reached first.
+        
+        Yields the chunks of every batch and whether it is full; only the
+        last batch can be partial.
+        """
+        batch_chunks = []
+        batch_rows = 0
+        batch_bytes = 0
+        for chunk_table in chunk_tables:
+            while chunk_table.num_rows:
+                take = self._rows_to_take(chunk_table, batch_rows, batch_bytes)
+                piece = chunk_table.slice(0, take)
+                chunk_table = chunk_table.slice(take)
+                batch_chunks.append(piece)
+                batch_rows += take
+                batch_bytes += piece.nbytes
+                if batch_rows < self.batch_size and not (self.batch_bytes and batch_bytes >= self.batch_bytes):
+                    continue
+                yield batch_chunks, True
+                batch_chunks = []
+                batch_rows = 0
+                batch_bytes = 0
+        if batch_chunks:
+            yield batch_chunks, False
+    
+    def _rows_to_take(self, chunk_table: "pa.Table", batch_rows: int, batch_bytes: int) -> int:
+        """Rows of a chunk that fill the current batch, estimating the byte size from the chunk's average row."""
+        take = min(chunk_table.num_rows, self.batch_size - batch_rows)
+        if self.batch_bytes and chunk_table.nbytes:
+            row_bytes = chunk_table.nbytes / chunk_table.num_rows
+            take = min(take, max(1, math.ceil((self.batch_bytes - batch_bytes) / row_bytes)))
+        return take
+    
+    def _write_partitioned(
         self, 
-        batch_data: List[List[Union[int, str, None]]], 
+        sourcefilename: Union[str, BinaryIO], 
+        table: str, 
         columns: List[str], 
+        destination: Union[str, BinaryIO], 
+        subfolder_name: str,
+        byte_range: Optional[Tuple[int, int]],
+        column_types: Optional[Dict[str, str]],
+        resume: bool
+    ) -> ConversionStats:
+        """
+        Write a table into partition folders below the destination folder.
+        
+        Rows are routed to their partition chunk by chunk as they are parsed.
+        Once the open files hold PARTITION_CHECKPOINT_BYTES, they are all
+        closed and committed to the checkpoint, so a resumed conversion
+        continues with new files. Tables without a date column are written
+        into the destination folder itself.
+        """
+        if is_stream(destination):
+            raise ValidationError("Partitioned Parquet output needs a destination folder, not a stream")
+        date_column = next((column for column in PARTITION_DATE_COLUMNS if column in columns), None)
+        logging.info(
+            "Exporting:  %s - %s.parquet (partitioned by %s)", subfolder_name, table,
+            f"{self.partition_by} of {date_column}" if date_column else "nothing, no date column"
+        )
+        os.makedirs(destination, exist_ok=True)
+        
+        progress_callback = self._create_progress_callback(table, subfolder_name)
+        checkpoint = self._start_checkpoint(sourcefilename, destination, columns, byte_range, resume, table)
+        files = []
+        rows_written = 0
+        if checkpoint is not None and checkpoint.resumed:
+            byte_range = checkpoint.remaining_range()
+            files = checkpoint.files
+            rows_written = checkpoint.rows
+        _remove_uncommitted(destination, files)
+        
+        write_options, row_group_size = self._table_write_options(table, columns)
+        partitions = _ParquetPartitionSet(
+            destination, self.max_open_partitions, row_group_size or self.row_group_size, write_options, files
+        )
+        stats = ConversionStats()
+        try:
+            for chunk in stats.timed(parse_xml_batches(
+                sourcefilename, columns, self.ARROW_CHUNK_ROWS, progress_callback, byte_range, self.engine,
+                transform=False
+            )):
+                with stats.stage("transform"):
+                    chunk_table = arrow_table(chunk, columns, column_types)
+                try:
+                    with stats.stage("write"):
+                        if date_column is None:
+                            partitions.write("", chunk_table)
+                        else:
+                            dates = chunk[columns.index(date_column)]
+                            for partition, rows in self._partition_rows(dates, chunk_table):
+                                partitions.write(partition, rows)
+                except (pa.ArrowInvalid, OSError) as e:
+                    raise ValidationError(f"Error writing Parquet partitions of {table}: {e}")
+                rows_written += chunk_table.num_rows
+                if partitions.open_bytes() >= self.PARTITION_CHECKPOINT_BYTES:
+                    with stats.stage("write"):
+                        files = partitions.close_all()
+                    if checkpoint is not None:
+                        checkpoint.commit(rows_written, files)
+            with stats.stage("write"):
+                files = partitions.close_all()
+        except BaseException:
+            partitions.abort()
+            raise
+        
+        if checkpoint is not None:
+            checkpoint.finish()
+        logging.info("            Written %s rows to %s partition files in %s", rows_written, len(files), destination)
+        return stats
+    
+    def _partition_rows(
+        self, 
+        dates: List[Optional[str]], 
+        table: "pa.Table"
+    ) -> Iterator[Tuple[str, "pa.Table"]]:
+        """Split a chunk by the partition of its raw date values, e.g. 2020-05-17T10:00:00.000."""
+        length = 7 if self.partition_by == "month" else 4
+        keys = pc.fill_null(pc.utf8_slice_codeunits(pa.array(dates, pa.string()), 0, length), "")
+        values = pc.unique(keys).to_pylist()
+        if len(values) == 1:
+            yield self._partition_folder(values[0]), table
+            return
+        for value in values:
+            yield self._partition_folder(value), table.filter(pc.equal(keys, value))
+    
+    def _partition_folder(self, key: str) -> str:
+        year, _, month = key.partition("-")
+        if not (len(year) == 4 and year.isdigit()) or (self.partition_by == "month" and not month.isdigit()):
+            year = month = HIVE_NULL_PARTITION
+        if self.partition_by == "month":
+            return os.path.join(f"year={year}", f"month={month}")
+        return f"year={year}"
+    
+    def _table_write_options(self, table: str, columns: List[str]) -> Tuple[Dict[str, Any], Optional[int]]:
+        """pyarrow write arguments for a table's configured options, and its configured row group size."""
+        options = self.table_options.get(table)
+        if options is None:
+            return {}, None
+        return parquet_write_options(options, columns), options.table.get("row_group_size")
+    
+    def destination(self, outputdir: str, site_name: str, table: str) -> str:
+        """Partitioned tables are one dataset per table, with a site=... folder per site."""
+        if self.partition_by:
+            return os.path.join(outputdir, table, f"site={site_name}")
+        return super().destination(outputdir, site_name, table)
+    
+    def output_settings(self, table: Optional[str] = None) -> Dict[str, Any]:
+        settings = {
+            **super().output_settings(table),
+            "batch_size": self.batch_size,
+            "single_file": self.single_file,
+            "row_group_size": self.row_group_size,
+            "max_file_bytes": self.max_file_bytes,
+        }
+        if self.batch_bytes:
+            settings["batch_bytes"] = self.batch_bytes
+        if self.partition_by:
+            settings["partition_by"] = self.partition_by
+            settings["max_open_partitions"] = self.max_open_partitions
+        if self.unified:
+            settings["unified"] = True
+        options = self.table_options.get(table) if table else None
+        if options is not None and (options.table or options.columns):
+            settings["table_options"] = options._asdict()
+        return settings
+    
+    def output_files(self, destinationfilename: str) -> List[str]:
+        if self.partition_by:
+            pattern = os.path.join(glob.escape(destinationfilename), '**', '*.parquet')
+            return sorted(glob.glob(pattern, recursive=True))
+        if os.path.isfile(destinationfilename):
+            return [destinationfilename]
+        stem, extension = os.path.splitext(destinationfilename)
+        pattern = glob.escape(stem) + '_part[0-9][0-9][0-9][0-9]' + glob.escape(extension)
+        return sorted(glob.glob(pattern))
+    
+    def merge_parts(self, part_destinations: List[str], destinationfilename: str) -> None:
+        """
+        Combine range outputs in order.
+        
+        In single-file mode the row groups of every range are streamed into one
+        file sequence; otherwise the rows of every range are batched again
+        into batch_size files, so the output has the names and sizes of a
+        sequential conversion.
+        """
+        if self.partition_by:
+            self._merge_partitions(part_destinations, destinationfilename)
+            return
+        files = [f for part in part_destinations for f in self.output_files(part)]
+        if self.single_file:
+            self._merge_row_groups(files, destinationfilename)
+            return
+        
+        # Outputs are named after their table, which gives its configured options
+        table = os.path.basename(destinationfilename)[:-len(self.file_extension)]
+        columns = pq.read_schema(files[0]).names if files else []
+        write_options, row_group_size = self._table_write_options(table, columns)
+        file_options = {**write_options, "row_group_size": row_group_size} if row_group_size else write_options
+        def chunk_tables() -> Iterator["pa.Table"]:
+            for filename in files:
+                for batch in pq.ParquetFile(filename).iter_batches(batch_size=self.ARROW_CHUNK_ROWS):
+                    yield pa.Table.from_batches([batch])
+        
+        filenumber = 0
+        try:
+            for batch_chunks, full in self._batches(chunk_tables()):
+                filenumber += 1
+                if full:
+                    self._write_batch(batch_chunks, destinationfilename, filenumber, file_options)
+                else:
+                    self._write_final_batch(batch_chunks, destinationfilename, filenumber, file_options)
+        except (pa.ArrowInvalid, OSError) as e:
+            raise ValidationError(f"Error merging Parquet parts into {destinationfilename}: {e}")
+        for filename in files:
+            os.remove(filename)
+    
+    def combine_sites(self, outputdir: str, table: str, site_destinations: List[Tuple[str, str]]) -> None:
+        """
+        Stream the per-site outputs of a table into the unified dataset of the output folder.
+        
+        Row groups get a dictionary-encoded site column and are coalesced
+        into row groups of row_group_size rows, so the rows of small sites
+        share row groups while large sites stream through. The new sites are
+        appended to the dataset as new files, and files of earlier runs are
+        kept as they are, except those holding a site converted again: they
+        are rewritten without its rows. New files are written under a hidden
+        name and the dataset's files renumbered once complete; the per-site
+        outputs are removed afterwards.
+        """
+        if not self.unified:
+            return
+        destination = os.path.join(outputdir, f"{table}{self.file_extension}")
+        staging = os.path.join(outputdir, f".{table}{self.file_extension}")
+        existing = self.output_files(destination)
+        site_files = [(site, self.output_files(filename)) for site, filename in site_destinations]
+        schema_file = next((files[0] for _, files in site_files if files), existing[0] if existing else None)
+        if schema_file is None:
+            return
+        
+        columns = [SITE_COLUMN] + [name for name in pq.read_schema(schema_file).names if name != SITE_COLUMN]
+        write_options, row_group_size = self._table_write_options(table, columns)
+        if "use_dictionary" in write_options and SITE_COLUMN not in write_options["use_dictionary"]:
+            write_options["use_dictionary"].append(SITE_COLUMN)
+        row_group_size = row_group_size or self.row_group_size
+        for stale in self.output_files(staging):
+            os.remove(stale)
+        sequence = _ParquetFileSequence(staging, row_group_size, self.max_file_bytes, write_options=write_options)
+        
+        pending: List["pa.Table"] = []
+        pending_rows = 0
+        def add(rows: "pa.Table") -> None:
+            nonlocal pending, pending_rows
+            pending.append(rows)
+            pending_rows += rows.num_rows
+            if pending_rows >= row_group_size:
+                buffered = pa.concat_tables(pending)
+                full = pending_rows - pending_rows % row_group_size
+                sequence.write(buffered.slice(0, full))
+                pending = [buffered.slice(full)]
+                pending_rows -= full
+        
+        replaced = pa.array([site for site, _ in site_destinations], pa.string())
+        rewritten = [
+            filename for filename in existing
+            if pc.any(pc.is_in(pq.read_table(filename, columns=[SITE_COLUMN]).column(SITE_COLUMN), value_set=replaced)).as_py()
+        ]
+        try:
+            for filename in rewritten:
+                parquet_file = pq.ParquetFile(filename)
+                for index in range(parquet_file.num_row_groups):
+                    rows = parquet_file.read_row_group(index)
+                    add(rows.filter(pc.invert(pc.is_in(rows.column(SITE_COLUMN), value_set=replaced))))
+            for site, files in site_files:
+                for filename in files:
+                    parquet_file = pq.ParquetFile(filename)
+                    for index in range(parquet_file.num_row_groups):
+                        rows = parquet_file.read_row_group(index)
+                        site_column = pa.DictionaryArray.from_arrays(
+                            pa.repeat(pa.scalar(0, pa.int32()), rows.num_rows), pa.array([site], pa.string())
+                        )
+                        add(rows.add_column(0, SITE_COLUMN, site_column))
+            if pending_rows:
+                sequence.write(pa.concat_tables(pending))
+            # Staged files are renamed to the destination's names below
+            combined = sequence.close()
+        except Exception as e:
+            sequence.abort()
+            for staged in sequence.files:
+                if os.path.isfile(staged):
+                    os.remove(staged)
+            raise ValidationError(f"Error combining sites into {destination}: {e}")
+        
+        for filename in rewritten:
+            os.remove(filename)
+        # Kept files only move to lower numbers, so no name is taken twice
+        files = [filename for filename in existing if filename not in rewritten] + combined
+        if len(files) == 1:
+            os.replace(files[0], destination)
+        else:
+            for filenumber, filename in enumerate(files, start=1):
+                os.replace(filename, _part_filename(destination, filenumber))
+        for _, files in site_files:
+            for filename in files:
+                os.remove(filename)
+        logging.info("Combined:   %s sites into %s", len(site_destinations), os.path.basename(destination))
+    
+    def _merge_partitions(self, part_destinations: List[str], destination: str) -> None:
+        """
+        Stream the partition files of every range into one file per partition.
+        
+        Partitions are written one at a time in the order the ranges first
+        wrote them, each from its files in range order, so rows keep their
+        source order; a partition continues in a new file once its file holds
+        PARTITION_CHECKPOINT_BYTES, like a sequential conversion.
+        """
+        # Files are numbered across each range's folder, in the order they were opened
+        partitions: "OrderedDict[str, List[str]]" = OrderedDict()
+        for part in part_destinations:
+            for filename in sorted(self.output_files(part), key=os.path.basename):
+                partitions.setdefault(os.path.dirname(os.path.relpath(filename, part)), []).append(filename)
+        files = [filename for filenames in partitions.values() for filename in filenames]
+        # Partitioned destinations are Table/site=..., which gives the table's configured options
+        table = os.path.basename(os.path.dirname(os.path.normpath(destination)))
+        columns = pq.read_schema(files[0]).names if files else []
+        write_options, row_group_size = self._table_write_options(table, columns)
+        row_group_size = row_group_size or self.row_group_size
+        
+        _remove_uncommitted(destination, [])
+        merged = _ParquetPartitionSet(destination, 1, row_group_size, write_options)
+        try:
+            for partition, filenames in partitions.items():
+                for filename in filenames:
+                    for batch in pq.ParquetFile(filename).iter_batches(batch_size=row_group_size):
+                        merged.write(partition, pa.Table.from_batches([batch]))
+                        if merged.open_bytes() >= self.PARTITION_CHECKPOINT_BYTES:
+                            merged.close_all()
+            merged.close_all()
+        except Exception as e:
+            merged.abort()
+            raise ValidationError(f"Error merging Parquet partitions into {destination}: {e}")
+        
+        for part in part_destinations:
+            shutil.rmtree(part)
+    
+    def _merge_row_groups(self, files: List[str], destinationfilename: str) -> None:
+        # Outputs are named after their table, which gives its configured options
+        table = os.path.basename(destinationfilename)[:-len(self.file_extension)]
+        columns = pq.read_schema(files[0]).names if files else []
+        write_options, row_group_size = self._table_write_options(table, columns)
+        sequence = _ParquetFileSequence(
+            destinationfilename, row_group_size or self.row_group_size, self.max_file_bytes, write_options=write_options
+        )
+        try:
+            for filename in files:
+                parquet_file = pq.ParquetFile(filename)
+                for index in range(parquet_file.num_row_groups):
+                    sequence.write(parquet_file.read_row_group(index))
+            sequence.close()
+        except Exception as e:
+            sequence.abort()
+            raise ValidationError(f"Error merging Parquet parts into {destinationfilename}: {e}")
+        
+        for filename in files:
+            os.remove(filename)
+    
+    @staticmethod
+    def _concat_chunks(batch_chunks: List["pa.Table"]) -> "pa.Table":
+        if len(batch_chunks) == 1:
+            return batch_chunks[0]
+        return pa.concat_tables(batch_chunks)
+    
+    @staticmethod
+    def _write_table_file(table: "pa.Table", filename: str, file_options: Optional[Dict[str, Any]] = None) -> None:
+        """Write a complete Parquet file under a temporary name and rename it into place."""
+        with open(temp_filename(filename), 'wb') as f:
+            pq.write_table(table, f, **(file_options or {}))
+        os.replace(temp_filename(filename), filename)
+    
+    def _write_batch(
+        self, 
+        batch_chunks: List["pa.Table"], 
         destinationfilename: str, 
         filenumber: int, 
-        subfolder_name: str
+        file_options: Dict[str, Any]
+    ) -> str:
+        try:
+            table = self._concat_chunks(batch_chunks)
+            batch_filename = _part_filename(destinationfilename, filenumber)
+            self._write_table_file(table, batch_filename, file_options)
+            logging.info("            Written batch %d with %s rows to %s", filenumber, table.num_rows, os.path.basename(batch_filename))
+        except Exception as e:
+            raise ValidationError(f"Error writing Parquet batch {filenumber}: {e}")
+        return batch_filename
+    
+    def _write_row_groups(
+        self, 
+        sequence: _ParquetFileSequence, 
+        batch_chunks: List["pa.Table"], 
+        filenumber: int
     ) -> None:
         try:
-            df = pd.DataFrame(batch_data, columns=columns)
-            batch_filename = destinationfilename.replace('.parquet', f'_part{filenumber:04d}.parquet')
-            df.to_parquet(batch_filename, index=False, engine='pyarrow')
-            logging.info("            Written batch %d with %s rows to %s", filenumber, len(batch_data), os.path.basename(batch_filename))
+            table = self._concat_chunks(batch_chunks)
+            sequence.write(table)
+            logging.info("            Written batch %d with %s rows to %s", filenumber, table.num_rows, os.path.basename(sequence.files[-1]))
         except Exception as e:
             raise ValidationError(f"Error writing Parquet batch {filenumber}: {e}")
     
     def _write_final_batch(
         self, 
-        batch_data: List[List[Union[int, str, None]]], 
-        columns: List[str], 
+        batch_chunks: List["pa.Table"], 
         destinationfilename: str, 
         filenumber: int, 
-        subfolder_name: str
+        file_options: Dict[str, Any]
     ) -> None:
         try:
-            df = pd.DataFrame(batch_data, columns=columns)
+            table = self._concat_chunks(batch_chunks)
             if filenumber == 1:
                 final_filename = destinationfilename
             else:
-                final_filename = destinationfilename.replace('.parquet', f'_part{filenumber:04d}.parquet')
-            df.to_parquet(final_filename, index=False, engine='pyarrow')
-            logging.info("            Written final batch %d with %s rows to %s", filenumber, len(batch_data), os.path.basename(final_filename))
+                final_filename = _part_filename(destinationfilename, filenumber)
+            self._write_table_file(table, final_filename, file_options)
+            logging.info("            Written final batch %d with %s rows to %s", filenumber, table.num_rows, os.path.basename(final_filename))
         except Exception as e:
-            raise ValidationError(f"Error writing final Parquet batch {filenumber}: {e}")
\ No newline at end of file
+            raise ValidationError(f"Error writing final Parquet batch {filenumber}: {e}")
+
+def sqlite_identifier(name: str) -> str:
+    """Quote a table, column or index name for SQLite."""
+    return '"' + name.replace('"', '""') + '"'
+
+def sqlite_table_definition(table: str, columns: List[Tuple[str, str]], primary_key: bool = True) -> str:
+    """
+    CREATE TABLE statement for (column, SQLite type) pairs.
+    
+    An INTEGER Id column becomes the primary key, an alias of the rowid, so
+    rows are stored in Id order without a separate index.
+    """
+    definitions = [
+        f"{sqlite_identifier(name)} {sqlite_type}"
+        + (" PRIMARY KEY" if primary_key and name == "Id" and sqlite_type == "INTEGER" else "")
+        for name, sqlite_type in columns
+    ]
+    return f"CREATE TABLE {sqlite_identifier(table)} ({', '.join(definitions)})"
+
+class SQLiteWriter(BaseWriter):
+    file_extension = ".sqlite"
+    PARSE_BATCH_ROWS = DEFAULT_PARSE_BATCH_ROWS
+    
+    def __init__(
+        self, 
+        progress_indicator_value: int = 10000000, 
+        engine: str = DEFAULT_ENGINE,
+        transaction_rows: int = 1000000,
+        page_size: int = DEFAULT_SQLITE_PAGE_SIZE,
+        index_columns: Optional[Dict[str, List[str]]] = None,
+        unified: bool = False,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL
+    ) -> None:
+        """
+        Args:
+            progress_indicator_value: Log progress every this many rows
+            engine: XML parsing engine, one of PARSER_ENGINES
+            transaction_rows: Rows inserted per transaction
+            page_size: SQLite page size in bytes of new databases, a power
+                       of two from 512 to 65536
+            index_columns: Columns indexed per table once it is loaded
+                           (default: every column ending in Id, such as
+                           PostId or OwnerUserId; Id itself is the primary key)
+            unified: Combine the sites of every table into one database for
+                     the whole run, stackexchange.sqlite, with a site column;
+                     see combine_sites. Otherwise every site gets its own
+                     database; see combine_tables.
+            progress_interval: Also log progress, with percent of the input
+                               parsed and ETA, every this many seconds
+        """
+        super().__init__(progress_indicator_value, engine, progress_interval)
+        if not SQLITE_AVAILABLE:
+            raise ImportError("This Python was built without sqlite3, which SQLite output requires")
+        if transaction_rows <= 0:
+            raise ValueError("Transaction size must be greater than 0")
+        self.transaction_rows = transaction_rows
+        if not 512 <= page_size <= 65536 or page_size & (page_size - 1):
+            raise ValueError("Page size must be a power of two from 512 to 65536")
+        self.page_size = page_size
+        self.index_columns = index_columns or {}
+        self.unified = unified
+    
+    def write_from_xml(
+        self, 
+        sourcefilename: Union[str, BinaryIO], 
+        table: str, 
+        columns: List[str], 
+        destinationfilename: Union[str, BinaryIO], 
+        subfolder_name: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        column_types: Optional[Dict[str, str]] = None,
+        resume: bool = False
+    ) -> ConversionStats:
+        """
+        Load a table into a database of its own.
+        
+        The database is written under a temporary name and renamed once the
+        table is loaded and indexed, so an interrupted table is loaded again
+        from the start. Byte ranges are indexed once merged.
+        """
+        if is_stream(destinationfilename):
+            raise ValidationError("SQLite output needs a database file, not a stream")
+        logging.info("Exporting:  %s - %s%s", subfolder_name, table, self.file_extension)
+        _validate_destination_dir(destinationfilename)
+        
+        progress_callback = self._create_progress_callback(table, subfolder_name)
+        stats = ConversionStats()
+        temp_file = temp_filename(destinationfilename)
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        try:
+            connection = self._connect(temp_file)
+            try:
+                sqlite_columns = [(name, SQLITE_TYPES[logical_type((column_types or {}).get(name))]) for name in columns]
+                connection.execute(sqlite_table_definition(table, sqlite_columns))
+                self._insert_rows(connection, sourcefilename, table, columns, progress_callback, byte_range, stats)
+                if byte_range is None:
+                    with stats.stage("write"):
+                        self._create_indexes(connection, table, columns)
+            finally:
+                connection.close()
+            os.replace(temp_file, destinationfilename)
+        except sqlite3.Error as e:
+            raise ValidationError(f"Error writing SQLite database {destinationfilename}: {e}")
+        return stats
+    
+    def _connect(self, filename: str, journal: bool = False) -> "sqlite3.Connection":
+        """
+        Open a database for bulk loading, in autocommit mode with explicit transactions.
+        
+        Without journal, a failed load leaves a database that is thrown
+        away; databases that already hold other tables keep their rollback
+        journal, so every change to them is all or nothing.
+        """
+        connection = sqlite3.connect(filename, isolation_level=None)
+        connection.execute(f"PRAGMA page_size = {self.page_size}")
+        connection.execute(f"PRAGMA journal_mode = {'DELETE' if journal else 'OFF'}")
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("PRAGMA temp_store = MEMORY")
+        # 256 MB page cache, so indexes are built with few spills to disk
+        connection.execute("PRAGMA cache_size = -262144")
+        return connection
+    
+    def _insert_rows(
+        self, 
+        connection: "sqlite3.Connection", 
+        sourcefilename: Union[str, BinaryIO], 
+        table: str, 
+        columns: List[str], 
+        progress_callback: TableProgress, 
+        byte_range: Optional[Tuple[int, int]], 
+        stats: ConversionStats
+    ) -> None:
+        insert = f"INSERT INTO {sqlite_identifier(table)} VALUES ({', '.join('?' * len(columns))})"
+        rowcounter = 0
+        connection.execute("BEGIN")
+        for batch in stats.timed(parse_xml_batches(
+            sourcefilename, columns, self.PARSE_BATCH_ROWS, progress_callback, byte_range, self.engine,
+            transform=False
+        )):
+            # Values are transformed like CSV output; SQLite converts numbers by column type
+            with stats.stage("transform"):
+                batch = [transform_values(values) for values in batch]
+            with stats.stage("write"):
+                connection.executemany(insert, zip(*batch))
+            previous = rowcounter
+            rowcounter += len(batch[0])
+            if rowcounter // self.transaction_rows > previous // self.transaction_rows:
+                with stats.stage("write"):
+                    connection.execute("COMMIT")
+                    connection.execute("BEGIN")
+        with stats.stage("write"):
+            connection.execute("COMMIT")
+    
+    def _index_columns(self, table: str, columns: List[str]) -> List[str]:
+        configured = self.index_columns.get(table)
+        if configured is None:
+            return [column for column in columns if column != "Id" and column.endswith("Id")]
+        return [column for column in configured if column in columns]
+    
+    def _create_indexes(self, connection: "sqlite3.Connection", table: str, columns: List[str]) -> None:
+        """Index a loaded table; unified tables, which hold a site column, are also indexed by site and Id."""
+        keys = [[SITE_COLUMN, "Id"]] if SITE_COLUMN in columns and "Id" in columns else []
+        keys += [[column] for column in self._index_columns(table, columns)]
+        connection.execute("BEGIN")
+        for key in keys:
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {sqlite_identifier(table + '_' + '_'.join(key))} "
+                f"ON {sqlite_identifier(table)} ({', '.join(sqlite_identifier(column) for column in key)})"
+            )
+        connection.execute("COMMIT")
+    
+    @staticmethod
+    def _table_columns(connection: "sqlite3.Connection", table: str, schema: str = "main") -> List[Tuple[str, str]]:
+        """(column, type) pairs of a table, empty when the table does not exist."""
+        return [
+            (name, sqlite_type) for _, name, sqlite_type, *_ in
+            connection.execute(f"PRAGMA {schema}.table_info({sqlite_identifier(table)})")
+        ]
+    
+    def _site_database(self, site_folder: str) -> str:
+        return os.path.join(site_folder, os.path.basename(site_folder) + self.file_extension)
+    
+    def output_files(self, destinationfilename: str) -> List[str]:
+        """The table's own database or, once combined, the database of its site holding the table."""
+        if os.path.isfile(destinationfilename):
+            return [destinationfilename]
+        database = self._site_database(os.path.dirname(destinationfilename))
+        if not os.path.isfile(database):
+            return []
+        table = os.path.splitext(os.path.basename(destinationfilename))[0]
+        connection = sqlite3.connect(database)
+        try:
+            return [database] if self._table_columns(connection, table) else []
+        except sqlite3.Error:
+            return []
+        finally:
+            connection.close()
+    
+    def output_settings(self, table: Optional[str] = None) -> Dict[str, Any]:
+        settings = super().output_settings(table)
+        if table in self.index_columns:
+            settings["index_columns"] = self.index_columns[table]
+        return settings
+    
+    def merge_parts(self, part_destinations: List[str], destinationfilename: str) -> None:
+        """Append the rows of later ranges to the database of the first and index the table."""
+        table = os.path.splitext(os.path.basename(destinationfilename))[0]
+        temp_file = temp_filename(destinationfilename)
+        try:
+            os.replace(part_destinations[0], temp_file)
+            connection = self._connect(temp_file)
+            try:
+                for part in part_destinations[1:]:
+                    connection.execute("ATTACH DATABASE ? AS part", (part,))
+                    connection.execute("BEGIN")
+                    connection.execute(f"INSERT INTO main.{sqlite_identifier(table)} SELECT * FROM part.{sqlite_identifier(table)}")
+                    connection.execute("COMMIT")
+                    connection.execute("DETACH DATABASE part")
+                self._create_indexes(connection, table, [name for name, _ in self._table_columns(connection, table)])
+            finally:
+                connection.close()
+            os.replace(temp_file, destinationfilename)
+        except (OSError, sqlite3.Error) as e:
+            raise ValidationError(f"Error merging SQLite parts into {destinationfilename}: {e}")
+        
+        for part in part_destinations[1:]:
+            os.remove(part)
+    
+    def combine_tables(self, outputdir: str, site_name: str) -> None:
+        """
+        Move the tables of a site, loaded into a database each, into the database of the site.
+        
+        The site database is <site>/<site>.sqlite. When it does not exist yet
+        the largest table's database becomes it, so the biggest table is
+        never copied; every other table replaces its earlier version in one
+        transaction, together with its indexes. Tables left over from an
+        interrupted run are moved too.
+        """
+        if self.unified:
+            return
+        folder = os.path.join(outputdir, site_name)
+        database = self._site_database(folder)
+        # Byte ranges of a table whose merge failed are left for the next run
+        staged = [
+            filename for filename in sorted(glob.glob(os.path.join(glob.escape(folder), f"*{self.file_extension}")))
+            if filename != database and not re.search(r"_range\d{4}\.", os.path.basename(filename))
+        ]
+        if not staged:
+            return
+        try:
+            if not os.path.isfile(database):
+                largest = max(staged, key=os.path.getsize)
+                os.replace(largest, database)
+                staged.remove(largest)
+            connection = self._connect(database, journal=True)
+            try:
+                for filename in staged:
+                    self._move_table(connection, filename, os.path.splitext(os.path.basename(filename))[0])
+                    os.remove(filename)
+            finally:
+                connection.close()
+        except (OSError, sqlite3.Error) as e:
+            raise ValidationError(f"Error combining the tables of {site_name} into {database}: {e}")
+        logging.info("Combined:   %s tables into %s", len(staged) + 1, os.path.basename(database))
+    
+    def _move_table(self, connection: "sqlite3.Connection", filename: str, table: str) -> None:
+        """Replace a table and its indexes with those of another database."""
+        connection.execute("ATTACH DATABASE ? AS source", (filename,))
+        try:
+            statements = [
+                sql for sql, in connection.execute(
+                    "SELECT sql FROM source.sqlite_master WHERE tbl_name = ? AND sql IS NOT NULL ORDER BY type DESC",
+                    (table,)
+                )
+            ]
+            connection.execute("BEGIN")
+            try:
+                connection.execute(f"DROP TABLE IF EXISTS main.{sqlite_identifier(table)}")
+                # The table comes first, then its indexes; unqualified names are created in main
+                connection.execute(statements[0])
+                connection.execute(f"INSERT INTO main.{sqlite_identifier(table)} SELECT * FROM source.{sqlite_identifier(table)}")
+                for statement in statements[1:]:
+                    connection.execute(statement)
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        finally:
+            connection.execute("DETACH DATABASE source")
+    
+    def combine_sites(self, outputdir: str, table: str, site_destinations: List[Tuple[str, str]]) -> None:
+        """
+        Insert the per-site databases of a table into the database of the whole run, with a site column.
+        
+        The database is stackexchange.sqlite in the output folder. Sites
+        already in it from earlier runs are kept, except those converted
+        again, whose rows are replaced in one transaction per site. Indexes
+        are dropped while rows are inserted and built again afterwards; the
+        per-site databases are removed.
+        """
+        if not self.unified:
+            return
+        database = os.path.join(outputdir, UNIFIED_SQLITE_DATABASE + self.file_extension)
+        staged = [(site, filename) for site, filename in site_destinations if os.path.isfile(filename)]
+        if not staged:
+            return
+        quoted = sqlite_identifier(table)
+        try:
+            connection = self._connect(database, journal=True)
+            try:
+                if not self._table_columns(connection, table):
+                    connection.execute("ATTACH DATABASE ? AS source", (staged[0][1],))
+                    columns = self._table_columns(connection, table, "source")
+                    connection.execute("DETACH DATABASE source")
+                    connection.execute(sqlite_table_definition(table, [(SITE_COLUMN, "TEXT")] + columns, primary_key=False))
+                
+                indexes = [
+                    name for name, in connection.execute(
+                        "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+                    )
+                ]
+                for name in indexes:
+                    connection.execute(f"DROP INDEX {sqlite_identifier(name)}")
+                
+                for site, filename in staged:
+                    connection.execute("ATTACH DATABASE ? AS source", (filename,))
+                    try:
+                        connection.execute("BEGIN")
+                        connection.execute(f"DELETE FROM main.{quoted} WHERE {sqlite_identifier(SITE_COLUMN)} = ?", (site,))
+                        connection.execute(f"INSERT INTO main.{quoted} SELECT ?, * FROM source.{quoted}", (site,))
+                        connection.execute("COMMIT")
+                    except BaseException:
+                        if connection.in_transaction:
+                            connection.execute("ROLLBACK")
+                        raise
+                    finally:
+                        connection.execute("DETACH DATABASE source")
+                self._create_indexes(connection, table, [name for name, _ in self._table_columns(connection, table)])
+            finally:
+                connection.close()
+        except sqlite3.Error as e:
+            raise ValidationError(f"Error combining sites into {database}: {e}")
+        
+        for _, filename in staged:
+            os.remove(filename)
+        logging.info("Combined:   %s sites into %s", len(staged), f"{os.path.basename(database)}:{table}")
+
+def postgres_table_definition(table: str, columns: List[str], column_types: Optional[Dict[str, str]] = None) -> str:
+    """CREATE TABLE statement of the PostgreSQL table that the binary COPY output of a table loads into."""
+    definitions = [
+        f'"{name}" {POSTGRES_TYPES[logical_type((column_types or {}).get(name))]}' for name in columns
+    ]
+    return f'CREATE TABLE "{table}" ({", ".join(definitions)})'
+
+def _pgcopy_timestamp(value: str) -> int:
+    """Microseconds from POSTGRES_EPOCH of an ISO 8601 time such as 2008-07-31T21:42:52.667."""
+    moment, _, fraction = value.partition(".")
+    delta = datetime.fromisoformat(moment) - POSTGRES_EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + int(fraction.ljust(6, "0")[:6] or 0)
+
+def _pgcopy_boolean(value: str) -> int:
+    if value in ("True", "true", "1"):
+        return 1
+    if value in ("False", "false", "0"):
+        return 0
+    raise ValueError(f"invalid boolean {value!r}")
+
+def pgcopy_field_encoder(sql_type: Optional[str]) -> Callable[[List[Optional[str]]], List[bytes]]:
+    """
+    Encoder of a column of raw attribute values into binary COPY fields of its PostgreSQL type.
+    
+    Every field is its byte length followed by the value in network byte
+    order; None becomes the length -1. Strings are written as they are in
+    the dump, without the line break escaping of CSV output. Raises
+    ValueError or struct.error for values that do not fit the type.
+    """
+    kind = logical_type(sql_type)
+    if kind == "string":
+        length = struct.Struct(">i").pack
+        def encode_text(values: List[Optional[str]]) -> List[bytes]:
+            fields = []
+            for value in values:
+                if value is None:
+                    fields.append(PGCOPY_NULL)
+                else:
+                    data = value.encode("utf-8")
+                    fields.append(length(len(data)) + data)
+            return fields
+        return encode_text
+    
+    code, convert = {
+        "int64": ("q", int),
+        "int32": ("i", int),
+        "int16": ("h", int),
+        "int8": ("h", int),
+        "bool": ("?", _pgcopy_boolean),
+        "timestamp": ("q", _pgcopy_timestamp),
+        "float64": ("d", float),
+    }[kind]
+    size = struct.calcsize(">" + code)
+    pack = struct.Struct(">i" + code).pack
+    def encode(values: List[Optional[str]]) -> List[bytes]:
+        return [PGCOPY_NULL if value is None else pack(size, convert(value)) for value in values]
+    return encode
+
+def encode_pgcopy_rows(
+    batch: List[List[Optional[str]]], 
+    columns: List[str], 
+    encoders: List[Callable[[List[Optional[str]]], List[bytes]]]
+) -> bytes:
+    """Encode a batch of raw column values as binary COPY tuples, each its field count followed by its fields."""
+    fields = []
+    for name, values, encoder in zip(columns, batch, encoders):
+        try:
+            fields.append(encoder(values))
+        except (ValueError, OverflowError, struct.error) as e:
+            raise ValidationError(f"Cannot convert column {name} for PostgreSQL: {e}")
+    field_count = struct.pack(">h", len(columns))
+    return b"".join(chain.from_iterable(zip(repeat(field_count), *fields)))
+
+class PGCopyWriter(BaseWriter):
+    file_extension = ".pgcopy"
+    PARSE_BATCH_ROWS = DEFAULT_PARSE_BATCH_ROWS
+    
+    def __init__(
+        self, 
+        progress_indicator_value: int = 10000000, 
+        engine: str = DEFAULT_ENGINE, 
+        checkpoint_rows: int = 1000000,
+        buffer_size: int = DEFAULT_CSV_BUFFER_SIZE,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL
+    ) -> None:
+        """
+        Write tables in the PostgreSQL binary COPY format, for COPY ... FROM STDIN (FORMAT binary).
+        
+        Fields are typed by the SQL Server types of the columns, mapped to
+        POSTGRES_TYPES; postgres_table_definition gives the matching table.
+        
+        Args:
+            progress_indicator_value: Log progress every this many rows
+            engine: XML parsing engine, one of PARSER_ENGINES
+            checkpoint_rows: Record a checkpoint every this many rows, from
+                             which an interrupted conversion is resumed
+            buffer_size: Bytes buffered before output files are written to
+            progress_interval: Also log progress, with percent of the input
+                               parsed and ETA, every this many seconds
+        """
+        super().__init__(progress_indicator_value, engine, progress_interval)
+        if checkpoint_rows <= 0:
+            raise ValueError("Checkpoint interval must be greater than 0")
+        self.checkpoint_rows = checkpoint_rows
+        if buffer_size <= 0:
+            raise ValueError("Buffer size must be greater than 0")
+        self.buffer_size = buffer_size
+    
+    def write_from_xml(
+        self, 
+        sourcefilename: Union[str, BinaryIO], 
+        table: str, 
+        columns: List[str], 
+        destinationfilename: Union[str, BinaryIO], 
+        subfolder_name: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        column_types: Optional[Dict[str, str]] = None,
+        resume: bool = False
+    ) -> ConversionStats:
+        logging.info("Exporting:  %s - %s%s", subfolder_name, table, self.file_extension)
+        stats = ConversionStats()
+        progress_callback = self._create_progress_callback(table, subfolder_name)
+        _validate_destination_dir(destinationfilename)
+        encoders = [pgcopy_field_encoder((column_types or {}).get(name)) for name in columns]
+        
+        try:
+            if is_stream(destinationfilename):
+                self._write_rows(destinationfilename, sourcefilename, columns, encoders, progress_callback, byte_range, stats)
+            else:
+                checkpoint = self._start_checkpoint(sourcefilename, destinationfilename, columns, byte_range, resume)
+                temp_file = temp_filename(destinationfilename)
+                mode = 'wb'
+                if checkpoint is not None and checkpoint.resumed:
+                    # Drop rows written after the last checkpoint and append from there
+                    with open(temp_file, 'r+b') as f:
+                        f.truncate(checkpoint.output_bytes)
+                    mode = 'ab'
+                    byte_range = checkpoint.remaining_range()
+                with open(temp_file, mode, buffering=self.buffer_size) as f:
+                    self._write_rows(f, sourcefilename, columns, encoders, progress_callback, byte_range, stats, checkpoint)
+                os.replace(temp_file, destinationfilename)
+                if checkpoint is not None:
+                    checkpoint.finish()
+        except ValidationError:
+            raise
+        except PermissionError:
+            raise ValidationError(f"Permission denied writing to file: {source_name(destinationfilename)}")
+        except Exception as e:
+            raise ValidationError(f"Error writing PGCOPY file {source_name(destinationfilename)}: {e}")
+        return stats
+    
+    def _write_rows(
+        self, 
+        f: BinaryIO, 
+        sourcefilename: Union[str, BinaryIO], 
+        columns: List[str], 
+        encoders: List[Callable[[List[Optional[str]]], List[bytes]]], 
+        progress_callback: TableProgress, 
+        byte_range: Optional[Tuple[int, int]], 
+        stats: ConversionStats,
+        checkpoint: Optional[CheckpointSession] = None
+    ) -> None:
+        rowcounter = 0
+        if checkpoint is not None and checkpoint.resumed:
+            rowcounter = checkpoint.rows
+        if not rowcounter:
+            f.write(PGCOPY_HEADER)
+        
+        # Checkpoints are taken after the batch that reaches each interval
+        batch_size = min(self.PARSE_BATCH_ROWS, self.checkpoint_rows)
+        for batch in stats.timed(parse_xml_batches(
+            sourcefilename, columns, batch_size, progress_callback, byte_range, self.engine,
+            transform=False
+        )):
+            with stats.stage("encode"):
+                data = encode_pgcopy_rows(batch, columns, encoders)
+            with stats.stage("write"):
+                f.write(data)
+            previous = rowcounter
+            rowcounter += len(batch[0])
+            if checkpoint is not None and rowcounter // self.checkpoint_rows > previous // self.checkpoint_rows:
+                with stats.stage("write"):
+                    f.flush()
+                checkpoint.commit(rowcounter, [f.name], os.fstat(f.fileno()).st_size)
+        f.write(PGCOPY_TRAILER)
+    
+    def merge_parts(self, part_destinations: List[str], destinationfilename: str) -> None:
+        """Concatenate the tuples of part files between one header and one trailer."""
+        try:
+            with open(temp_filename(destinationfilename), 'wb') as out:
+                out.write(PGCOPY_HEADER)
+                for part in part_destinations:
+                    with open(part, 'rb') as f:
+                        if f.read(len(PGCOPY_HEADER)) != PGCOPY_HEADER:
+                            raise ValidationError(f"{part} is not a PGCOPY file")
+                        remaining = os.fstat(f.fileno()).st_size - len(PGCOPY_HEADER) - len(PGCOPY_TRAILER)
+                        while remaining > 0:
+                            data = f.read(min(remaining, 16 * 1024 * 1024))
+                            if not data:
+                                raise ValidationError(f"{part} is truncated")
+                            out.write(data)
+                            remaining -= len(data)
+                out.write(PGCOPY_TRAILER)
+            os.replace(temp_filename(destinationfilename), destinationfilename)
+        except Exception as e:
+            raise ValidationError(f"Error merging PGCOPY parts into {destinationfilename}: {e}")
+        
+        for part in part_destinations:
+            os.remove(part)
+
+class ArrowWriter(BaseWriter):
+    file_extension = ".arrow"
+    PARSE_BATCH_ROWS = DEFAULT_PARSE_BATCH_ROWS
+    
+    def __init__(
+        self, 
+        progress_indicator_value: int = 10000000, 
+        engine: str = DEFAULT_ENGINE, 
+        compression: Optional[str] = None,
+        progress_interval: float = DEFAULT_PROGRESS_INTERVAL,
+        id_index: bool = False
+    ) -> None:
+        """
+        Write tables as Arrow IPC files (Feather version 2), one record batch per parsed batch.
+        
+        Columns hold the same types and values as Parquet output. Without
+        compression, read_arrow memory-maps a file and reads its columns
+        without copying or decoding them.
+        
+        Args:
+            progress_indicator_value: Log progress every this many rows
+            engine: XML parsing engine, one of PARSER_ENGINES
+            compression: Compress buffers with one of ARROW_COMPRESSIONS
+                         (default: uncompressed)
+            progress_interval: Also log progress, with percent of the input
+                               parsed and ETA, every this many seconds
+            id_index: Index every table by Id (and PostId) once written,
+                      mapping keys to their record batch and row; see
+                      write_id_indexes
+        """
+        super().__init__(progress_indicator_value, engine, progress_interval)
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for Arrow output. Install with: pip install pyarrow")
+        if compression is not None and compression not in ARROW_COMPRESSIONS:
+            raise ConfigurationError(
+                f"Unknown Arrow compression '{compression}'. Choose from: {', '.join(ARROW_COMPRESSIONS)}"
+            )
+        self.compression = compression
+        self.id_index = id_index
+    
+    def write_from_xml(
+        self, 
+        sourcefilename: Union[str, BinaryIO], 
+        table: str, 
+        columns: List[str], 
+        destinationfilename: Union[str, BinaryIO], 
+        subfolder_name: str,
+        byte_range: Optional[Tuple[int, int]] = None,
+        column_types: Optional[Dict[str, str]] = None,
+        resume: bool = False
+    ) -> ConversionStats:
+        """
+        Convert a table into one Arrow IPC file.
+        
+        The file is written under a temporary name and renamed once complete;
+        an interrupted table is converted again from the start.
+        """
+        logging.info("Exporting:  %s - %s%s", subfolder_name, table, self.file_extension)
+        stats = ConversionStats()
+        progress_callback = self._create_progress_callback(table, subfolder_name)
+        _validate_destination_dir(destinationfilename)
+        
+        sink = destinationfilename if is_stream(destinationfilename) else temp_filename(destinationfilename)
+        try:
+            self._write_batches(sink, sourcefilename, columns, column_types, progress_callback, byte_range, stats)
+            if not is_stream(destinationfilename):
+                os.replace(sink, destinationfilename)
+        except BaseException as e:
+            if not is_stream(destinationfilename) and os.path.exists(sink):
+                os.remove(sink)
+            if isinstance(e, ValidationError) or not isinstance(e, Exception):
+                raise
+            raise ValidationError(f"Error writing Arrow file {source_name(destinationfilename)}: {e}")
+        return stats
+    
+    def _write_batches(
+        self, 
+        sink: Union[str, BinaryIO], 
+        sourcefilename: Union[str, BinaryIO], 
+        columns: List[str], 
+        column_types: Optional[Dict[str, str]], 
+        progress_callback: TableProgress, 
+        byte_range: Optional[Tuple[int, int]], 
+        stats: ConversionStats
+    ) -> None:
+        writer = None
+        schema = None
+        try:
+            for batch in stats.timed(parse_xml_batches(
+                sourcefilename, columns, self.PARSE_BATCH_ROWS, progress_callback, byte_range, self.engine,
+                transform=False
+            )):
+                with stats.stage("transform"):
+                    batch_table = arrow_table(batch, columns, column_types)
+                # Buffers are compressed while they are written
+                with stats.stage("write"):
+                    if writer is None:
+                        schema = batch_table.schema
+                        writer = pa.ipc.new_file(sink, schema, options=self._write_options())
+                    elif not batch_table.schema.equals(schema):
+                        batch_table = batch_table.cast(schema)
+                    writer.write_table(batch_table)
+            if writer is None:
+                writer = pa.ipc.new_file(sink, arrow_table([[] for _ in columns], columns, column_types).schema)
+        finally:
+            if writer is not None:
+                writer.close()
+    
+    def _write_options(self) -> "pa.ipc.IpcWriteOptions":
+        return pa.ipc.IpcWriteOptions(compression=self.compression)
+    
+    def _output_columns(self, filename: str) -> List[str]:
+        with pa.memory_map(filename) as source:
+            return pa.ipc.open_file(source).schema.names
+    
+    def _index_positions(self, filename: str, column: str) -> Iterator[Tuple[int, List[Any], Iterable[int]]]:
+        with pa.memory_map(filename) as source:
+            reader = pa.ipc.open_file(source)
+            for group in range(reader.num_record_batches):
+                keys = reader.get_batch(group).column(column).to_pylist()
+                yield group, keys, range(len(keys))
+    
+    def output_settings(self, table: Optional[str] = None) -> Dict[str, Any]:
+        if self.compression:
+            return {**super().output_settings(table), "compression": self.compression}
+        return super().output_settings(table)
+    
+    def merge_parts(self, part_destinations: List[str], destinationfilename: str) -> None:
+        """Copy the record batches of part files, memory-mapped, into one file."""
+        writer = None
+        try:
+            for part in part_destinations:
+                with pa.memory_map(part) as source:
+                    reader = pa.ipc.open_file(source)
+                    if writer is None:
+                        schema = reader.schema
+                        writer = pa.ipc.new_file(temp_filename(destinationfilename), schema, options=self._write_options())
+                    for index in range(reader.num_record_batches):
+                        batch = pa.Table.from_batches([reader.get_batch(index)])
+                        if not batch.schema.equals(schema):
+                            batch = batch.cast(schema)
+                        writer.write_table(batch)
+            writer.close()
+            writer = None
+            os.replace(temp_filename(destinationfilename), destinationfilename)
+        except Exception as e:
+            if writer is not None:
+                writer.close()
+                os.remove(temp_filename(destinationfilename))
+            raise ValidationError(f"Error merging Arrow parts into {destinationfilename}: {e}")
+        
+        for part in part_destinations:
+            os.remove(part)
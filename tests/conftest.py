@@ -53,6 +53,77 @@ def sample_xml_posts():
 </posts>'''
 
 
+@pytest.fixture
+def posts_xml_file(temp_dir):
+    """
+    Factory writing temp_dir/Posts.xml with rows of Id 1 to rows.
+    
+    attributes gives the attributes of row i after its Id, e.g.
+    posts_xml_file(300, lambda i: f' Body="Body {i % 3}"').
+    """
+    def write(rows, attributes=lambda i: ""):
+        source_file = os.path.join(temp_dir, "Posts.xml")
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n<posts>\n')
+            for i in range(1, rows + 1):
+                f.write(f'  <row Id="{i}"{attributes(i)} />\n')
+            f.write('</posts>\n')
+        return source_file
+    return write
+
+
+class SiteDump:
+    """
+    A dump folder of sites holding Posts and Comments tables, with a config
+    of the tables and an output folder; unpacks as (input_dir, output_dir,
+    config_file).
+    """
+    
+    TABLE_COLUMNS = {'Posts': ['Id', 'OwnerUserId', 'Body'], 'Comments': ['Id', 'PostId', 'Text']}
+    
+    def __init__(self, directory, tables):
+        self.input_dir = os.path.join(directory, "input")
+        self.output_dir = os.path.join(directory, "output")
+        self.config_file = os.path.join(directory, "config.yaml")
+        self.tables = list(tables)
+        with open(self.config_file, 'w') as f:
+            yaml.dump({'tables': {table: self.TABLE_COLUMNS[table] for table in self.tables}}, f)
+    
+    def __iter__(self):
+        return iter((self.input_dir, self.output_dir, self.config_file))
+    
+    def add_site(self, site, rows):
+        """Write the tables of a site with rows of Id 1 to rows, replacing earlier ones."""
+        folder = os.path.join(self.input_dir, site)
+        os.makedirs(folder, exist_ok=True)
+        if 'Posts' in self.tables:
+            with open(os.path.join(folder, "Posts.xml"), 'w') as f:
+                f.write('<posts>\n')
+                for i in range(1, rows + 1):
+                    f.write(f'  <row Id="{i}" OwnerUserId="{i % 3}" Body="{site}, &quot;{i}&quot;&#xA;" />\n')
+                f.write('</posts>\n')
+        if 'Comments' in self.tables:
+            with open(os.path.join(folder, "Comments.xml"), 'w') as f:
+                f.write('<comments>\n')
+                for i in range(1, rows + 1):
+                    f.write(f'  <row Id="{i}" PostId="{i}" Text="comment {i}" />\n')
+                f.write('</comments>\n')
+
+
+@pytest.fixture
+def site_dump(temp_dir):
+    """
+    Factory of a SiteDump in temp_dir with the given (site, rows) pairs, e.g.
+    site_dump([("a.com", 30), ("b.com", 5)], tables=["Posts"]).
+    """
+    def make(sites, tables=("Posts", "Comments")):
+        dump = SiteDump(temp_dir, tables)
+        for site, rows in sites:
+            dump.add_site(site, rows)
+        return dump
+    return make
+
+
 @pytest.fixture
 def sample_xml_users():
     """Sample Users.xml content for testing."""
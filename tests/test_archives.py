@@ -0,0 +1,212 @@
+"""
+Tests for stackexchange_parser.archives module.
+"""
+
+import os
+import csv
+import pytest
+from unittest.mock import patch
+
+from stackexchange_parser import process_stackexchange_data, CSVWriter, StackExchangeParserError, ValidationError
+from stackexchange_parser import archives
+from stackexchange_parser.archives import (
+    ArchiveMember,
+    site_name_from_archive,
+    list_archive_members,
+    iter_archive_members,
+    find_7z_executable
+)
+from stackexchange_parser.core import find_archives_with_data, get_table_members_in_archives, parse_xml_rows
+from stackexchange_parser.parallel import ConversionUnit, run_units
+
+py7zr = pytest.importorskip("py7zr")
+
+
+@pytest.fixture
+def site_archive(temp_dir, sample_xml_posts, sample_xml_users, sample_xml_comments):
+    """Create a site dump archive like the ones published by StackExchange."""
+    archive_dir = os.path.join(temp_dir, "dumps")
+    os.makedirs(archive_dir)
+    archive = os.path.join(archive_dir, "stackoverflow.com.7z")
+    with py7zr.SevenZipFile(archive, 'w') as seven_zip:
+        seven_zip.writestr(sample_xml_posts, "Posts.xml")
+        seven_zip.writestr(sample_xml_users, "Users.xml")
+        seven_zip.writestr(sample_xml_comments, "Comments.xml")
+        seven_zip.writestr("not a table", "readme.txt")
+    return archive
+
+
+@pytest.fixture(params=["py7zr", "7z"])
+def backend(request):
+    """Run archive tests against both extraction backends."""
+    if request.param == "py7zr":
+        with patch.object(archives, "find_7z_executable", return_value=None):
+            yield request.param
+    else:
+        if find_7z_executable() is None:
+            pytest.skip("7z command line tool not installed")
+        yield request.param
+
+
+class TestSiteNames:
+    """Test deriving site names from archive filenames."""
+
+    def test_site_archive(self):
+        """Test a single archive per site."""
+        assert site_name_from_archive("/dumps/math.stackexchange.com.7z") == "math.stackexchange.com"
+
+    def test_per_table_archive(self):
+        """Test the per-table archives of the largest sites."""
+        tables = {'Posts': ['Id']}
+        assert site_name_from_archive("stackoverflow.com-Posts.7z", tables) == "stackoverflow.com"
+
+    def test_hyphenated_site_name(self):
+        """Test that a hyphen is only a table separator for configured tables."""
+        tables = {'Posts': ['Id']}
+        assert site_name_from_archive("ja.meta.stackoverflow.com-archive.7z", tables) == \
+            "ja.meta.stackoverflow.com-archive"
+
+
+class TestArchiveReading:
+    """Test listing and streaming archive members."""
+
+    def test_list_members(self, site_archive, backend):
+        """Test that members are listed in archive order with their sizes."""
+        members = list_archive_members(site_archive)
+
+        assert [name for name, _ in members] == ["Posts.xml", "Users.xml", "Comments.xml", "readme.txt"]
+        assert all(size > 0 for _, size in members)
+
+    def test_iter_members_single_pass(self, site_archive, backend, sample_xml_users, sample_xml_comments):
+        """Test that requested members are streamed in archive order."""
+        streamed = []
+        for name, stream in iter_archive_members(site_archive, ["Comments.xml", "Users.xml"]):
+            data = b""
+            while True:
+                chunk = stream.read(7)
+                if not chunk:
+                    break
+                data += chunk
+            streamed.append((name, data))
+
+        assert streamed == [
+            ("Users.xml", sample_xml_users.encode("utf-8")),
+            ("Comments.xml", sample_xml_comments.encode("utf-8"))
+        ]
+
+    def test_unread_members_are_skipped(self, site_archive, backend):
+        """Test that a partially read member does not leak into the next one."""
+        names = []
+        for name, stream in iter_archive_members(site_archive, ["Posts.xml", "Users.xml"]):
+            stream.read(10)
+            names.append(name)
+
+        assert names == ["Posts.xml", "Users.xml"]
+
+    def test_stop_early(self, site_archive, backend):
+        """Test that abandoning the iteration stops extraction cleanly."""
+        members = iter_archive_members(site_archive, ["Posts.xml", "Users.xml", "Comments.xml"])
+        name, _ = next(members)
+        members.close()
+
+        assert name == "Posts.xml"
+
+    def test_parse_member_stream(self, site_archive, backend):
+        """Test that a member stream can be parsed like a file."""
+        for _, stream in iter_archive_members(site_archive, ["Posts.xml"]):
+            rows = list(parse_xml_rows(stream, ['Id', 'Title']))
+
+        assert [row[0] for row in rows] == ['1', '2', '3']
+
+    def test_missing_backend(self, site_archive):
+        """Test the error raised without any extraction backend."""
+        with patch.object(archives, "find_7z_executable", return_value=None), \
+                patch.object(archives, "PY7ZR_AVAILABLE", False):
+            with pytest.raises(ImportError, match="py7zr"):
+                list_archive_members(site_archive)
+
+
+class TestArchiveDiscovery:
+    """Test finding archives and the tables inside them."""
+
+    def test_find_archives_with_data(self, site_archive, temp_dir, sample_config):
+        """Test that archives are grouped by site."""
+        sites = find_archives_with_data(temp_dir, sample_config['tables'])
+
+        assert sites == [("stackoverflow.com", [site_archive])]
+
+    def test_meta_archives_skipped(self, site_archive, temp_dir, sample_config):
+        """Test that meta site archives are only included on request."""
+        meta_archive = os.path.join(os.path.dirname(site_archive), "meta.stackoverflow.com.7z")
+        with py7zr.SevenZipFile(meta_archive, 'w') as seven_zip:
+            seven_zip.writestr('<posts></posts>', "Posts.xml")
+
+        assert [site for site, _ in find_archives_with_data(temp_dir, sample_config['tables'])] == \
+            ["stackoverflow.com"]
+        assert [site for site, _ in find_archives_with_data(temp_dir, sample_config['tables'], True)] == \
+            ["meta.stackoverflow.com", "stackoverflow.com"]
+
+    def test_table_members(self, site_archive, sample_config):
+        """Test that table members come back in configuration order."""
+        found = get_table_members_in_archives([site_archive], sample_config['tables'])
+
+        assert [(member, table) for member, table, _ in found] == [
+            (ArchiveMember(site_archive, "Posts.xml"), "Posts"),
+            (ArchiveMember(site_archive, "Users.xml"), "Users"),
+            (ArchiveMember(site_archive, "Comments.xml"), "Comments")
+        ]
+
+
+class TestArchiveWorkflow:
+    """Test converting archives end to end."""
+
+    def test_archive_matches_extracted(
+        self, site_archive, stackexchange_site_structure, sample_config_file, temp_dir
+    ):
+        """Test that converting an archive gives the same CSV files as the extracted folder."""
+        archive_output = os.path.join(temp_dir, "archive_output")
+        folder_output = os.path.join(temp_dir, "folder_output")
+
+        assert process_stackexchange_data(
+            os.path.dirname(site_archive), archive_output, CSVWriter(), False, sample_config_file
+        ) == 1
+        process_stackexchange_data(
+            stackexchange_site_structure['input_dir'], folder_output, CSVWriter(), False, sample_config_file
+        )
+
+        for table in ['Posts', 'Users', 'Comments']:
+            with open(os.path.join(archive_output, "stackoverflow.com", f"{table}.csv"), 'rb') as f1, \
+                    open(os.path.join(folder_output, "stackoverflow.com", f"{table}.csv"), 'rb') as f2:
+                assert f1.read() == f2.read()
+
+    def test_archive_parallel(self, site_archive, sample_config_file, temp_dir):
+        """Test that an archive is converted in one worker task with jobs > 1."""
+        output_dir = os.path.join(temp_dir, "output")
+
+        process_stackexchange_data(
+            os.path.dirname(site_archive), output_dir, CSVWriter(), False, sample_config_file, jobs=2
+        )
+
+        with open(os.path.join(output_dir, "stackoverflow.com", "Posts.csv"), 'r', newline='', encoding='utf-8') as f:
+            assert len(list(csv.DictReader(f))) == 3
+
+    def test_missing_member_reported(self, site_archive, temp_dir):
+        """Test that a member missing from the archive is reported after the others are converted."""
+        units = [
+            ConversionUnit(ArchiveMember(site_archive, name), table, ['Id'],
+                           os.path.join(temp_dir, f"{table}.csv"), "stackoverflow.com")
+            for name, table in [("Posts.xml", "Posts"), ("Badges.xml", "Badges")]
+        ]
+
+        with pytest.raises(ValidationError, match="Badges.xml"):
+            run_units(CSVWriter(), units)
+
+        assert os.path.exists(units[0].destination_file)
+
+    def test_corrupt_archive_raises(self, temp_dir, sample_config_file):
+        """Test that an unreadable archive is reported as a validation error."""
+        with open(os.path.join(temp_dir, "broken.com.7z"), 'wb') as f:
+            f.write(b"not an archive")
+
+        with pytest.raises(StackExchangeParserError):
+            process_stackexchange_data(temp_dir, os.path.join(temp_dir, "out"), CSVWriter(), False, sample_config_file)
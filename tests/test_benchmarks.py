@@ -0,0 +1,130 @@
+"""
+Tests for the benchmarks package.
+"""
+
+import os
+import json
+import pytest
+
+from stackexchange_parser.core import parse_xml_rows, load_tables_config, PARSER_ENGINES
+from benchmarks.generate import GenerationOptions, generate_dump, escape_attribute, parse_table_rows
+from benchmarks.run import Measurement, count_rows, run_benchmarks, main
+
+
+@pytest.fixture
+def synthetic_dump(temp_dir):
+    """Generate a small synthetic dump."""
+    options = GenerationOptions(rows=25, body_median=200, table_rows={'Posts': 40})
+    manifest = generate_dump(temp_dir, options)
+    return temp_dir, manifest
+
+
+class TestGenerator:
+    """Test the synthetic dump generator."""
+
+    def test_all_tables_generated(self, synthetic_dump):
+        """Test that every configured table gets a file with the requested rows."""
+        datadir, manifest = synthetic_dump
+
+        assert set(manifest['tables']) == set(load_tables_config())
+        assert manifest['tables']['Posts']['rows'] == 40
+        assert manifest['tables']['Votes']['rows'] == 25
+        with open(os.path.join(datadir, "benchmark.json"), encoding="utf-8") as f:
+            assert json.load(f) == json.loads(json.dumps(manifest))
+
+    @pytest.mark.parametrize("engine", sorted(PARSER_ENGINES))
+    def test_parses_with_every_engine(self, synthetic_dump, engine):
+        """Test that generated files are valid dumps for every engine."""
+        datadir, manifest = synthetic_dump
+        tables = load_tables_config()
+
+        for table, info in manifest['tables'].items():
+            rows = list(parse_xml_rows(os.path.join(datadir, info['file']), tables[table], engine=engine))
+            assert len(rows) == info['rows']
+            assert [row[0] for row in rows[:3]] == ['1', '2', '3']
+
+    def test_deterministic(self, temp_dir):
+        """Test that a seed always produces the same dump."""
+        options = GenerationOptions(rows=10, seed=7)
+        generate_dump(os.path.join(temp_dir, "a"), options, ['Posts'])
+        generate_dump(os.path.join(temp_dir, "b"), options, ['Posts'])
+
+        with open(os.path.join(temp_dir, "a", "Posts.xml"), 'rb') as f1, \
+                open(os.path.join(temp_dir, "b", "Posts.xml"), 'rb') as f2:
+            assert f1.read() == f2.read()
+
+    def test_body_length_distribution(self, temp_dir):
+        """Test that the Body median follows the requested length."""
+        short = generate_dump(os.path.join(temp_dir, "short"), GenerationOptions(rows=50, body_median=100), ['Posts'])
+        long = generate_dump(os.path.join(temp_dir, "long"), GenerationOptions(rows=50, body_median=5000), ['Posts'])
+
+        assert long['tables']['Posts']['bytes'] > 5 * short['tables']['Posts']['bytes']
+
+    def test_escape_attribute(self):
+        """Test that markup and line breaks are escaped like in the dumps."""
+        assert escape_attribute('<p>a & "b"</p>\n') == '&lt;p&gt;a &amp; &quot;b&quot;&lt;/p&gt;&#xA;'
+
+    def test_unknown_table(self, temp_dir):
+        """Test that an unknown table is rejected."""
+        with pytest.raises(ValueError, match="Nope"):
+            generate_dump(temp_dir, GenerationOptions(rows=1), ['Nope'])
+
+    def test_table_rows_argument(self):
+        """Test parsing Table=rows overrides."""
+        assert parse_table_rows(['Posts=5', 'Votes=10']) == {'Posts': 5, 'Votes': 10}
+
+
+class TestRunner:
+    """Test running the benchmark matrix."""
+
+    def test_count_rows(self, synthetic_dump):
+        """Test that rows are counted across chunk boundaries."""
+        datadir, manifest = synthetic_dump
+
+        assert count_rows(os.path.join(datadir, "Posts.xml")) == manifest['tables']['Posts']['rows']
+
+    def test_run_matrix(self, synthetic_dump):
+        """Test that every writer and engine combination is measured."""
+        datadir, _ = synthetic_dump
+
+        results = run_benchmarks(datadir, ['csv'], sorted(PARSER_ENGINES), ['Posts', 'Votes'], isolate=False)
+
+        assert [(r.engine, r.table) for r in results] == [
+            (engine, table) for engine in sorted(PARSER_ENGINES) for table in ['Posts', 'Votes']
+        ]
+        assert all(isinstance(r, Measurement) for r in results)
+        assert all(r.rows > 0 and r.output_bytes > 0 and r.rows_per_second > 0 for r in results)
+
+    def test_isolated_measurement(self, synthetic_dump):
+        """Test measuring in a separate process reports its peak RSS."""
+        datadir, _ = synthetic_dump
+
+        result, = run_benchmarks(datadir, ['csv'], ['lxml'], ['Votes'])
+
+        assert result.rows == 25
+        if os.name == 'posix':
+            assert result.peak_rss_bytes > 0
+
+    def test_parquet_scan(self, synthetic_dump):
+        """Test that Parquet writers, including the tuned one, are timed being read back."""
+        pytest.importorskip("pyarrow")
+        datadir, _ = synthetic_dump
+
+        results = run_benchmarks(datadir, ['csv', 'parquet', 'parquet-tuned'], ['lxml'], ['Votes'], isolate=False)
+
+        assert [r.writer for r in results] == ['csv', 'parquet', 'parquet-tuned']
+        assert results[0].scan_seconds is None
+        assert all(r.scan_seconds >= 0 for r in results[1:])
+
+    @pytest.mark.slow
+    def test_main_writes_json(self, temp_dir):
+        """Test the command line writes a machine-readable report."""
+        output = os.path.join(temp_dir, "results.json")
+
+        assert main(['--rows', '20', '--tables', 'Votes', '-w', 'csv', '-e', 'lxml', '-o', output]) == 0
+
+        with open(output, encoding="utf-8") as f:
+            report = json.load(f)
+        assert set(report) == {'environment', 'generation', 'results'}
+        assert report['generation']['rows'] == 20
+        assert report['results'][0]['table'] == 'Votes'
@@ -0,0 +1,307 @@
+"""
+Tests for stackexchange_parser.checkpoint module.
+"""
+
+import os
+import io
+import pytest
+from unittest.mock import patch
+
+from stackexchange_parser import process_stackexchange_data, CSVWriter, ParquetWriter, ValidationError
+from stackexchange_parser import checkpoint, writers
+from stackexchange_parser.checkpoint import (
+    CheckpointSession,
+    checkpoint_filename,
+    load_checkpoint,
+    is_converted,
+    temp_filename
+)
+from stackexchange_parser.core import find_row_offset, find_next_row_start
+
+COLUMNS = ['Id', 'Title', 'Body']
+
+
+@pytest.fixture
+def posts_file(temp_dir):
+    """Create a Posts.xml with 50 rows."""
+    source_file = os.path.join(temp_dir, "Posts.xml")
+    with open(source_file, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<posts>\n')
+        for i in range(1, 51):
+            f.write(f'  <row Id="{i}" Title="Question &lt;{i}&gt; café" Body="Line 1&#xA;Line 2" />\n')
+        f.write('</posts>\n')
+    return source_file
+
+
+def interrupt_after(rows):
+    """Patch the writers' parser to fail after the given number of rows, parsing one row per batch."""
+    real_parse = writers.parse_xml_batches
+
+    def parse(sourcefilename, columns, batch_size, *args, **kwargs):
+        for count, batch in enumerate(real_parse(sourcefilename, columns, 1, *args, **kwargs)):
+            if count == rows:
+                raise KeyboardInterrupt
+            yield batch
+    return patch.object(writers, "parse_xml_batches", side_effect=parse)
+
+
+def read_bytes(filename):
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+class TestFindRowOffset:
+    """Test locating the source offset reached after a number of rows."""
+
+    @pytest.mark.parametrize("chunk_size", [5, 7, 64, 1024 * 1024])
+    def test_offsets_across_chunks(self, posts_file, chunk_size):
+        """Test that skipping rows lands on the next row regardless of chunk boundaries."""
+        with patch("stackexchange_parser.core._SCAN_CHUNK_SIZE", chunk_size), open(posts_file, 'rb') as f:
+            offset = find_row_offset(f, 0, 10)
+            offset = find_row_offset(f, offset, 5)
+            start = find_next_row_start(f, offset)
+            f.seek(start)
+            assert f.read(12) == b'<row Id="16"'
+
+    def test_too_few_rows(self, posts_file):
+        """Test that asking for more rows than the file has is an error."""
+        with open(posts_file, 'rb') as f:
+            with pytest.raises(ValidationError):
+                find_row_offset(f, 0, 51)
+
+
+class TestCheckpointSession:
+    """Test when a checkpoint is resumed."""
+
+    def test_changed_source_starts_over(self, posts_file, temp_dir):
+        """Test that a checkpoint of a different source version is not resumed."""
+        destination = os.path.join(temp_dir, "Posts.csv")
+        session = CheckpointSession(posts_file, destination, COLUMNS, {"writer": "CSVWriter"})
+        session.start([])
+        with open(temp_filename(destination), 'w') as f:
+            f.write("Id,Title,Body\n")
+        session.commit(10, [temp_filename(destination)], 14)
+
+        assert CheckpointSession(posts_file, destination, COLUMNS, {"writer": "CSVWriter"}, resume=True).resumed
+        assert not CheckpointSession(posts_file, destination, COLUMNS, {"writer": "ParquetWriter"}, resume=True).resumed
+        assert not CheckpointSession(posts_file, destination, ['Id'], {"writer": "CSVWriter"}, resume=True).resumed
+
+        with open(posts_file, 'a') as f:
+            f.write("\n")
+        assert not CheckpointSession(posts_file, destination, COLUMNS, {"writer": "CSVWriter"}, resume=True).resumed
+
+    def test_stream_sources_are_not_resumable(self, temp_dir):
+        """Test that a stream source is checkpointed but never resumed."""
+        destination = os.path.join(temp_dir, "Posts.csv")
+        session = CheckpointSession(io.BytesIO(b""), destination, COLUMNS, {})
+        session.start([])
+        session.commit(3, [])
+
+        assert load_checkpoint(destination).rows == 3
+        assert not CheckpointSession(io.BytesIO(b""), destination, COLUMNS, {}, resume=True).resumed
+
+
+class TestCSVResume:
+    """Test interrupting and resuming CSV conversions."""
+
+    def test_interrupted_output_is_not_final(self, posts_file, temp_dir):
+        """Test that an interrupted conversion leaves only temporary output and a checkpoint."""
+        destination = os.path.join(temp_dir, "Posts.csv")
+        writer = CSVWriter(checkpoint_rows=10)
+
+        with interrupt_after(25), pytest.raises(KeyboardInterrupt):
+            writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site")
+
+        assert not os.path.exists(destination)
+        assert load_checkpoint(destination).rows == 20
+        assert not is_converted(writer, destination)
+
+    def test_resume_matches_full_conversion(self, posts_file, temp_dir):
+        """Test that a resumed conversion writes the same file as an uninterrupted one."""
+        expected = os.path.join(temp_dir, "Expected.csv")
+        destination = os.path.join(temp_dir, "Posts.csv")
+        writer = CSVWriter(checkpoint_rows=10)
+        writer.write_from_xml(posts_file, "Posts", COLUMNS, expected, "site")
+
+        with interrupt_after(25), pytest.raises(KeyboardInterrupt):
+            writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site")
+        with patch.object(writers, "parse_xml_batches", wraps=writers.parse_xml_batches) as parse:
+            writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site", resume=True)
+
+        assert read_bytes(destination) == read_bytes(expected)
+        assert parse.call_args.args[4] is not None  # only the remaining byte range was parsed
+        assert not os.path.exists(checkpoint_filename(destination))
+        assert not os.path.exists(temp_filename(destination))
+        assert is_converted(writer, destination)
+
+    def test_resume_twice(self, posts_file, temp_dir):
+        """Test that source rows are only counted when resuming, from where the last resume started."""
+        expected = os.path.join(temp_dir, "Expected.csv")
+        destination = os.path.join(temp_dir, "Posts.csv")
+        writer = CSVWriter(checkpoint_rows=10)
+        writer.write_from_xml(posts_file, "Posts", COLUMNS, expected, "site")
+
+        with patch.object(checkpoint, "find_row_offset", wraps=find_row_offset) as count_rows:
+            with interrupt_after(25), pytest.raises(KeyboardInterrupt):
+                writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site")
+            assert not count_rows.called
+            with interrupt_after(15), pytest.raises(KeyboardInterrupt):
+                writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site", resume=True)
+            assert (load_checkpoint(destination).rows, load_checkpoint(destination).offset_rows) == (30, 20)
+            writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site", resume=True)
+
+        assert [call.args[2] for call in count_rows.call_args_list] == [20, 10]
+        assert read_bytes(destination) == read_bytes(expected)
+
+    def test_without_resume_starts_over(self, posts_file, temp_dir):
+        """Test that a checkpoint is ignored unless resuming."""
+        destination = os.path.join(temp_dir, "Posts.csv")
+        writer = CSVWriter(checkpoint_rows=10)
+
+        with interrupt_after(25), pytest.raises(KeyboardInterrupt):
+            writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site")
+        writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site")
+
+        with open(destination, encoding='utf-8') as f:
+            assert len(f.read().splitlines()) == 51
+
+    def test_invalid_checkpoint_interval(self):
+        """Test that the checkpoint interval must be positive."""
+        with pytest.raises(ValueError):
+            CSVWriter(checkpoint_rows=0)
+
+
+class TestParquetResume:
+    """Test interrupting and resuming Parquet conversions."""
+
+    @pytest.fixture(autouse=True)
+    def require_pyarrow(self):
+        pytest.importorskip("pyarrow")
+
+    def read_ids(self, writer, destination):
+        import pyarrow.parquet as pq
+        return [
+            value for filename in writer.output_files(destination)
+            for value in pq.read_table(filename).column('Id').to_pylist()
+        ]
+
+    def test_resume_part_files(self, posts_file, temp_dir):
+        """Test that committed part files are kept and the rest continues with the next part."""
+        destination = os.path.join(temp_dir, "Posts.parquet")
+        writer = ParquetWriter(batch_size=10)
+
+        with interrupt_after(25), pytest.raises(KeyboardInterrupt):
+            writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site")
+
+        checkpoint = load_checkpoint(destination)
+        assert checkpoint.files == ["Posts_part0001.parquet", "Posts_part0002.parquet"]
+        assert checkpoint.rows == 20
+        first_part = os.path.getmtime(os.path.join(temp_dir, "Posts_part0001.parquet"))
+
+        writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site", resume=True)
+
+        assert os.path.getmtime(os.path.join(temp_dir, "Posts_part0001.parquet")) == first_part
+        assert [os.path.basename(f) for f in writer.output_files(destination)] == \
+            [f"Posts_part{n:04d}.parquet" for n in range(1, 6)]
+        assert self.read_ids(writer, destination) == [str(i) for i in range(1, 51)]
+        assert not [f for f in os.listdir(temp_dir) if f.endswith('.partial')]
+
+    def test_resume_single_file_rollover(self, posts_file, temp_dir):
+        """Test that rolled-over files are committed in single-file mode."""
+        destination = os.path.join(temp_dir, "Posts.parquet")
+        writer = ParquetWriter(batch_size=5, single_file=True, max_file_bytes=1)
+
+        with interrupt_after(23), pytest.raises(KeyboardInterrupt):
+            writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site")
+
+        assert load_checkpoint(destination).rows == 20
+        assert not [f for f in os.listdir(temp_dir) if f.endswith('.partial')]
+
+        writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site", resume=True)
+
+        assert len(writer.output_files(destination)) == 10
+        assert self.read_ids(writer, destination) == [str(i) for i in range(1, 51)]
+
+    def test_resume_byte_bounded_batches(self, posts_file, temp_dir):
+        """Test that batches flushed by size commit the rows they actually hold."""
+        destination = os.path.join(temp_dir, "Posts.parquet")
+        writer = ParquetWriter(batch_size=1000, batch_bytes=1)
+
+        with interrupt_after(7), pytest.raises(KeyboardInterrupt):
+            writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site")
+        assert load_checkpoint(destination).rows == 7
+
+        writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site", resume=True)
+
+        assert len(writer.output_files(destination)) == 50
+        assert self.read_ids(writer, destination) == [str(i) for i in range(1, 51)]
+
+    def test_restart_removes_stale_parts(self, posts_file, temp_dir):
+        """Test that parts of an earlier attempt do not survive a restart."""
+        destination = os.path.join(temp_dir, "Posts.parquet")
+
+        with interrupt_after(35), pytest.raises(KeyboardInterrupt):
+            ParquetWriter(batch_size=10).write_from_xml(posts_file, "Posts", COLUMNS, destination, "site")
+        writer = ParquetWriter(batch_size=100)
+        writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site", resume=True)
+
+        assert writer.output_files(destination) == [destination]
+        assert self.read_ids(writer, destination) == [str(i) for i in range(1, 51)]
+
+
+    def test_resume_partitioned(self, temp_dir):
+        """Test that partition files committed before an interruption are kept and the rest are written again."""
+        import pyarrow.dataset as ds
+        source_file = os.path.join(temp_dir, "Posts.xml")
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write('<posts>\n')
+            for i in range(1, 51):
+                f.write(f'  <row Id="{i}" CreationDate="{2000 + i // 10}-01-01T00:00:00.000" />\n')
+            f.write('</posts>\n')
+        destination = os.path.join(temp_dir, "Posts", "site=site")
+        writer = ParquetWriter(partition_by="year")
+        writer.PARTITION_CHECKPOINT_BYTES = 1
+
+        with interrupt_after(25), pytest.raises(KeyboardInterrupt):
+            writer.write_from_xml(source_file, "Posts", ['Id', 'CreationDate'], destination, "site")
+
+        checkpoint = load_checkpoint(destination)
+        assert checkpoint.rows == 25
+        assert checkpoint.files[0] == os.path.join("site=site", "year=2000", "part-00001.parquet")
+
+        writer.write_from_xml(source_file, "Posts", ['Id', 'CreationDate'], destination, "site", resume=True)
+
+        ids = ds.dataset(destination, format="parquet", partitioning="hive").to_table().column('Id').to_pylist()
+        assert sorted(ids, key=int) == [str(i) for i in range(1, 51)]
+        assert load_checkpoint(destination) is None
+
+class TestResumeWorkflow:
+    """Test resuming a whole conversion run."""
+
+    def test_resume_existing_site(self, stackexchange_site_structure, sample_config_file, temp_dir):
+        """Test that finished tables are skipped and the rest of an existing site is converted."""
+        input_dir = stackexchange_site_structure['input_dir']
+        output_dir = os.path.join(temp_dir, "output")
+        site_dir = os.path.join(output_dir, "stackoverflow.com")
+        process_stackexchange_data(input_dir, output_dir, CSVWriter(), False, sample_config_file)
+        users_mtime = os.path.getmtime(os.path.join(site_dir, "Users.csv"))
+        os.remove(os.path.join(site_dir, "Posts.csv"))
+
+        assert process_stackexchange_data(input_dir, output_dir, CSVWriter(), False, sample_config_file) == 0
+        assert not os.path.exists(os.path.join(site_dir, "Posts.csv"))
+
+        assert process_stackexchange_data(
+            input_dir, output_dir, CSVWriter(), False, sample_config_file, resume=True
+        ) == 1
+        assert os.path.exists(os.path.join(site_dir, "Posts.csv"))
+        assert os.path.getmtime(os.path.join(site_dir, "Users.csv")) == users_mtime
+
+    def test_resume_nothing_left(self, stackexchange_site_structure, sample_config_file, temp_dir):
+        """Test that resuming a finished run converts nothing."""
+        input_dir = stackexchange_site_structure['input_dir']
+        output_dir = os.path.join(temp_dir, "output")
+        process_stackexchange_data(input_dir, output_dir, CSVWriter(), False, sample_config_file)
+
+        assert process_stackexchange_data(
+            input_dir, output_dir, CSVWriter(), False, sample_config_file, resume=True
+        ) == 0
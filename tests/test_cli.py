@@ -2,7 +2,10 @@
 Tests for stackexchange_parser.cli module.
 """
 
+import io
 import os
+import csv
+import sys
 import pytest
 from unittest.mock import patch, MagicMock
 from argparse import Namespace
@@ -281,6 +284,15 @@ class TestCLIIntegration:
             'input_dir', 'output_dir', mock_writer_instance, False, 'config.yaml'
         )
     
+    def test_cli_parser_engine(self):
+        """Test that the parsing engine can be selected."""
+        parser = create_parser()
+        
+        assert parser.parse_args(['input', 'output']).engine == 'lxml'
+        assert parser.parse_args(['input', 'output', '--engine', 'scanner']).engine == 'scanner'
+        with pytest.raises(SystemExit):
+            parser.parse_args(['input', 'output', '--engine', 'sax'])
+    
     def test_cli_parser_defaults(self):
         """Test that parser provides sensible defaults."""
         parser = create_parser()
@@ -295,4 +307,77 @@ class TestCLIIntegration:
         
         # These should be large enough for most use cases
         assert args.progressindicatorvalue > 1000000
-        assert args.batchsize > 100000
\ No newline at end of file
+        assert args.batchsize > 100000
+
+class TestPipeMode:
+    """Test converting a single table between stdin and stdout."""
+    
+    def _run(self, argv, stdin_bytes=b""):
+        stdin = io.TextIOWrapper(io.BytesIO(stdin_bytes))
+        stdout_buffer = io.BytesIO()
+        stdout = io.TextIOWrapper(stdout_buffer)
+        with patch('stackexchange_parser.cli.setup_logging'), \
+                patch.object(sys, 'stdin', stdin), patch.object(sys, 'stdout', stdout):
+            main(create_parser().parse_args(argv))
+        return stdout_buffer.getvalue()
+    
+    def test_stdin_to_stdout_csv(self, sample_xml_posts, sample_config_file):
+        """Test that rows read from stdin are written to stdout as CSV."""
+        output = self._run(
+            ['-', '-', '--table', 'Posts', '-c', sample_config_file],
+            sample_xml_posts.encode('utf-8')
+        )
+        
+        rows = list(csv.reader(io.StringIO(output.decode('utf-8'))))
+        assert rows[0] == ['Id', 'PostTypeId', 'CreationDate', 'Score', 'Title', 'Body']
+        assert [row[0] for row in rows[1:]] == ['1', '2', '3']
+    
+    def test_stdin_to_stdout_parquet(self, sample_xml_posts, sample_config_file):
+        """Test that Parquet written to stdout is one readable file."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        output = self._run(
+            ['-', '-', '--table', 'Posts', '-f', 'parquet', '-b', '2', '-c', sample_config_file],
+            sample_xml_posts.encode('utf-8')
+        )
+        
+        parquet_file = pq.ParquetFile(io.BytesIO(output))
+        assert parquet_file.num_row_groups == 2
+        assert parquet_file.read().column('Id').to_pylist() == [1, 2, 3]
+    
+    def test_file_to_stdout(self, stackexchange_site_structure, sample_config_file):
+        """Test that a site folder input reads the table's XML file."""
+        output = self._run([
+            stackexchange_site_structure['main_site'], '-', '-t', 'Users', '-c', sample_config_file
+        ])
+        
+        assert output.decode('utf-8').splitlines()[0] == 'Id,DisplayName,CreationDate,Reputation'
+    
+    def test_stdin_to_folder(self, sample_xml_users, sample_config_file, temp_dir):
+        """Test that stdin can be converted into an output folder."""
+        output_dir = os.path.join(temp_dir, "out")
+        self._run(['-', output_dir, '-t', 'Users', '-c', sample_config_file], sample_xml_users.encode('utf-8'))
+        
+        with open(os.path.join(output_dir, "Users.csv"), 'r', encoding='utf-8') as f:
+            assert len(f.read().splitlines()) == 3
+    
+    def test_pipe_requires_table(self):
+        """Test that - without --table is rejected."""
+        with pytest.raises(SystemExit):
+            self._run(['-', '-'])
+    
+    def test_pipe_unknown_table(self, sample_config_file):
+        """Test that an unconfigured table is rejected."""
+        with pytest.raises(SystemExit):
+            self._run(['-', '-', '-t', 'Missing', '-c', sample_config_file])
+    
+    @pytest.mark.parametrize("option", [
+        ['--meta'], ['--jobs', '2'], ['--split', '3'], ['--resume'], ['--refresh'], ['--unified'],
+        ['--metrics-json', 'metrics.json'], ['--profile-dir', 'profiles']
+    ])
+    def test_single_table_rejects_folder_options(self, option, sample_config_file, capsys):
+        """Test that options of whole-folder conversions are rejected instead of ignored."""
+        with pytest.raises(SystemExit):
+            self._run(['-', '-', '-t', 'Posts', '-c', sample_config_file] + option)
+        
+        error = capsys.readouterr().err
+        assert option[0] in error and "single table" in error
@@ -0,0 +1,204 @@
+"""
+Tests for stackexchange_parser.compression module.
+"""
+
+import bz2
+import gzip
+import io
+import os
+import zlib
+import pytest
+from unittest.mock import patch
+
+from stackexchange_parser import process_stackexchange_data, CSVWriter, ConfigurationError
+from stackexchange_parser import compression, writers
+from stackexchange_parser.checkpoint import load_checkpoint
+from stackexchange_parser.compression import (
+    BlockCompressedWriter,
+    ZSTANDARD_AVAILABLE,
+    first_member_size
+)
+from stackexchange_parser.core import split_xml_file
+from stackexchange_parser.parallel import ConversionUnit, split_unit
+
+COLUMNS = ['Id', 'Title', 'Body']
+DECOMPRESS = {"gzip": gzip.decompress, "bz2": bz2.decompress}
+
+
+@pytest.fixture
+def posts_file(temp_dir):
+    """Create a Posts.xml with 200 rows."""
+    source_file = os.path.join(temp_dir, "Posts.xml")
+    with open(source_file, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<posts>\n')
+        for i in range(1, 201):
+            f.write(f'  <row Id="{i}" Title="Question, {i}" Body="Line 1&#xA;Line &quot;2&quot;" />\n')
+        f.write('</posts>\n')
+    return source_file
+
+
+def read_bytes(filename):
+    with open(filename, 'rb') as f:
+        return f.read()
+
+
+def gzip_members(data):
+    """Count the gzip members of a file."""
+    members = 0
+    while data:
+        decompressor = zlib.decompressobj(31)
+        decompressor.decompress(data)
+        data = decompressor.unused_data
+        members += 1
+    return members
+
+
+class TestBlockCompressedWriter:
+    """Test compressing a stream in blocks on a thread pool."""
+
+    @pytest.mark.parametrize("codec", ["gzip", "bz2"])
+    def test_round_trip(self, codec):
+        """Test that the concatenated blocks decompress to what was written, in order."""
+        data = b"".join(f"row {i},some text\r\n".encode() for i in range(5000))
+        raw = io.BytesIO()
+        f = BlockCompressedWriter(raw, codec, threads=4, block_size=1000, owned=False)
+        for start in range(0, len(data), 777):
+            f.write(data[start:start + 777])
+        f.close()
+
+        assert not raw.closed
+        assert DECOMPRESS[codec](raw.getvalue()) == data
+
+    def test_gzip_members(self):
+        """Test that gzip output is multi-member, one member per block."""
+        raw = io.BytesIO()
+        with BlockCompressedWriter(raw, "gzip", block_size=100, owned=False) as f:
+            f.write(b"x" * 250)
+
+        assert gzip_members(raw.getvalue()) == 3
+
+    def test_flush_ends_block(self):
+        """Test that flush writes everything so far as complete blocks."""
+        raw = io.BytesIO()
+        f = BlockCompressedWriter(raw, "gzip", owned=False)
+        f.write(b"Id,Title\r\n")
+        f.flush()
+        header_size = len(raw.getvalue())
+        f.write(b"1,Hello\r\n")
+        f.close()
+
+        raw.seek(0)
+        assert first_member_size(raw, "gzip") == header_size
+        assert raw.tell() == 0
+        assert gzip.decompress(raw.getvalue()[header_size:]) == b"1,Hello\r\n"
+
+    @pytest.mark.skipif(not ZSTANDARD_AVAILABLE, reason="zstandard not installed")
+    def test_zstd_round_trip(self):
+        """Test that zstd frames concatenate into one stream."""
+        import zstandard
+        raw = io.BytesIO()
+        with BlockCompressedWriter(raw, "zstd", block_size=100, owned=False) as f:
+            f.write(b"abc" * 100)
+
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(raw.getvalue()), read_across_frames=True)
+        assert reader.read() == b"abc" * 100
+
+    def test_unknown_compression(self):
+        """Test that unknown compression names are rejected."""
+        with pytest.raises(ConfigurationError, match="Unknown compression"):
+            CSVWriter(compression="lzma")
+
+    def test_zstd_requires_zstandard(self):
+        """Test that zstd without zstandard raises an informative error."""
+        with patch.object(compression, "ZSTANDARD_AVAILABLE", False):
+            with pytest.raises(ImportError, match="zstandard"):
+                CSVWriter(compression="zstd")
+
+
+class TestCompressedCSV:
+    """Test writing compressed CSV files."""
+
+    @pytest.mark.parametrize("codec,extension", [("gzip", ".csv.gz"), ("bz2", ".csv.bz2")])
+    def test_matches_uncompressed(self, posts_file, temp_dir, codec, extension):
+        """Test that compressed output decompresses to the uncompressed CSV file."""
+        plain = os.path.join(temp_dir, "Posts.csv")
+        CSVWriter().write_from_xml(posts_file, "Posts", COLUMNS, plain, "site")
+        writer = CSVWriter(compression=codec)
+        destination = os.path.join(temp_dir, "Posts" + writer.file_extension)
+
+        writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site")
+
+        assert writer.file_extension == extension
+        assert DECOMPRESS[codec](read_bytes(destination)) == read_bytes(plain)
+        assert writer.output_settings()["compression"] == codec
+
+    def test_stream_destination(self, posts_file):
+        """Test that a compressed stream is completed without closing it."""
+        destination = io.BytesIO()
+
+        CSVWriter(compression="gzip").write_from_xml(posts_file, "Posts", ['Id'], destination, "site")
+
+        assert not destination.closed
+        assert gzip.decompress(destination.getvalue()).splitlines()[:2] == [b'Id', b'1']
+
+    def test_merge_ranges(self, posts_file, temp_dir):
+        """Test that merged range outputs keep only the first header."""
+        plain = os.path.join(temp_dir, "Posts.csv")
+        CSVWriter().write_from_xml(posts_file, "Posts", COLUMNS, plain, "site")
+        writer = CSVWriter(compression="gzip")
+        parts = []
+        for number, byte_range in enumerate(split_xml_file(posts_file, 3), start=1):
+            parts.append(os.path.join(temp_dir, f"Posts_range{number:04d}.csv.gz"))
+            writer.write_from_xml(posts_file, "Posts", COLUMNS, parts[-1], "site", byte_range=byte_range)
+        destination = os.path.join(temp_dir, "Posts.csv.gz")
+
+        writer.merge_parts(parts, destination)
+
+        assert len(parts) == 3
+        assert gzip.decompress(read_bytes(destination)) == read_bytes(plain)
+
+    def test_resume(self, posts_file, temp_dir):
+        """Test that an interrupted compressed conversion resumes at a block boundary."""
+        plain = os.path.join(temp_dir, "Posts.csv")
+        CSVWriter().write_from_xml(posts_file, "Posts", COLUMNS, plain, "site")
+        destination = os.path.join(temp_dir, "Posts.csv.gz")
+        writer = CSVWriter(checkpoint_rows=50, compression="gzip")
+        real_parse = writers.parse_xml_batches
+
+        def parse(*args, **kwargs):
+            for count, batch in enumerate(real_parse(*args, **kwargs)):
+                if count == 2:
+                    raise KeyboardInterrupt
+                yield batch
+
+        with patch.object(writers, "parse_xml_batches", side_effect=parse), pytest.raises(KeyboardInterrupt):
+            writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site")
+        assert load_checkpoint(destination).rows == 100
+
+        writer.write_from_xml(posts_file, "Posts", COLUMNS, destination, "site", resume=True)
+
+        assert gzip.decompress(read_bytes(destination)) == read_bytes(plain)
+
+    def test_site_conversion(self, stackexchange_site_structure, sample_config_file, temp_dir):
+        """Test that a full conversion writes compressed tables with the compressed extension."""
+        output_dir = os.path.join(temp_dir, "output")
+
+        process_stackexchange_data(
+            stackexchange_site_structure['input_dir'], output_dir, CSVWriter(compression="gzip"), False,
+            sample_config_file
+        )
+
+        site_output = os.path.join(output_dir, "stackoverflow.com")
+        assert sorted(os.listdir(site_output)) == ["Comments.csv.gz", "Posts.csv.gz", "Users.csv.gz"]
+        assert gzip.decompress(read_bytes(os.path.join(site_output, "Posts.csv.gz"))).startswith(b"Id,")
+
+    def test_split_range_names(self, posts_file, temp_dir):
+        """Test that range outputs keep the compressed extension at the end."""
+        unit = ConversionUnit(
+            source_file=posts_file, destination_file=os.path.join(temp_dir, "Posts.csv.gz"),
+            table_name="Posts", columns=COLUMNS, subfolder_name="site"
+        )
+
+        units = split_unit(unit, 2, min_bytes=0)
+
+        assert [os.path.basename(u.destination_file) for u in units] == ["Posts_range0001.csv.gz", "Posts_range0002.csv.gz"]
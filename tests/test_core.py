@@ -3,6 +3,7 @@ Tests for stackexchange_parser.core module.
 """
 
 import os
+import logging
 import tempfile
 import pytest
 import yaml
@@ -14,6 +15,17 @@ from stackexchange_parser.core import (
     find_subfolders_with_data,
     ensure_output_directory,
     get_table_files_in_folder,
+    load_column_types,
+    default_ddl_dir,
+    load_parquet_options,
+    ParquetOptions,
+    parse_ddl_types,
+    parse_xml_rows,
+    parse_xml_batches,
+    transform_column,
+    transform_values,
+    split_xml_file,
+    PARSER_ENGINES,
     clean_text,
     StackExchangeParserError,
     ConfigurationError,
@@ -266,4 +278,302 @@ class TestCleanText:
         assert "&#xA;" in result
         assert "&#xD;" in result
         assert "True" in result  # Should not convert True inside larger text
-        assert "False" in result  # Should not convert False inside larger text
\ No newline at end of file
+        assert "False" in result  # Should not convert False inside larger text
+
+class TestColumnTypes:
+    """Test column types loaded from the SQL Server DDL and the YAML config."""
+    
+    def test_parse_ddl_types(self):
+        """Test extracting column types from a CREATE TABLE statement."""
+        sql = """Create Table Votes(
+   Id int NOT NULL,
+   VoteTypeId tinyint NOT NULL,
+   CreationDate datetime NULL,
+   Text nvarchar(max) NULL,
+)
+"""
+        types = parse_ddl_types(sql)
+        
+        assert types == {'Votes': {
+            'Id': 'int',
+            'VoteTypeId': 'tinyint',
+            'CreationDate': 'datetime',
+            'Text': 'nvarchar(max)'
+        }}
+    
+    def test_load_column_types_from_ddl(self):
+        """Test that the default config picks up types from SQLServer/*.sql."""
+        types = load_column_types()
+        
+        assert types['Posts']['Id'] == 'int'
+        assert types['Posts']['PostTypeId'] == 'tinyint'
+        assert types['Badges']['TagBased'] == 'bit'
+        assert types['PostHistory']['RevisionGUID'] == 'uniqueidentifier'
+    
+    def test_yaml_types_override_ddl(self, temp_dir):
+        """Test that types declared in the YAML config take precedence."""
+        config_path = os.path.join(temp_dir, "typed.yaml")
+        with open(config_path, 'w') as f:
+            yaml.dump({'tables': {'Posts': ['Id', {'Score': 'bigint'}, {'Custom': 'int'}]}}, f)
+        
+        assert load_tables_config(config_path) == {'Posts': ['Id', 'Score', 'Custom']}
+        assert load_column_types(config_path) == {'Posts': {'Id': 'int', 'Score': 'bigint', 'Custom': 'int'}}
+    
+    def test_default_ddl_dir_in_package(self):
+        """Test that the DDL ships inside the package, so installs find it."""
+        import stackexchange_parser
+        
+        package_dir = os.path.dirname(os.path.abspath(stackexchange_parser.__file__))
+        assert os.path.dirname(os.path.abspath(default_ddl_dir())) == package_dir
+        assert os.path.isfile(os.path.join(default_ddl_dir(), "Posts.sql"))
+    
+    def test_missing_ddl_dir(self, temp_dir, caplog):
+        """Test that a missing default DDL directory warns and leaves only the YAML types, and a missing ddl_dir is an error."""
+        config_path = os.path.join(temp_dir, "typed.yaml")
+        with open(config_path, 'w') as f:
+            yaml.dump({'tables': {'Posts': ['Id', {'Score': 'bigint'}]}}, f)
+        missing = os.path.join(temp_dir, "SQLServer")
+        
+        with patch('stackexchange_parser.core.default_ddl_dir', return_value=missing), caplog.at_level(logging.WARNING):
+            assert load_column_types(config_path) == {'Posts': {'Score': 'bigint'}}
+        assert "No DDL directory" in caplog.text
+        with pytest.raises(ConfigurationError, match="DDL directory not found"):
+            load_column_types(config_path, ddl_dir=missing)
+    
+    def test_unsupported_type(self, temp_dir):
+        """Test that unknown SQL types are rejected."""
+        config_path = os.path.join(temp_dir, "bad_type.yaml")
+        with open(config_path, 'w') as f:
+            yaml.dump({'tables': {'Posts': [{'Id': 'geography'}]}}, f)
+        
+        with pytest.raises(ConfigurationError):
+            load_column_types(config_path)
+
+
+class TestParquetOptions:
+    """Test Parquet write options loaded from the YAML config."""
+    
+    def write_config(self, temp_dir, parquet):
+        config_path = os.path.join(temp_dir, "parquet.yaml")
+        with open(config_path, 'w') as f:
+            yaml.dump({'tables': {'Posts': ['Id', 'Body'], 'Votes': ['Id']}, 'parquet': parquet}, f)
+        return config_path
+    
+    def test_defaults_and_overrides(self, temp_dir):
+        """Test that defaults apply to every table and tables and columns override them."""
+        config_path = self.write_config(temp_dir, {
+            'defaults': {'compression': 'ZSTD', 'row_group_size': 1000},
+            'tables': {'Posts': {'row_group_size': 500, 'columns': {'Body': {'dictionary': False, 'compression': 'gzip'}}}}
+        })
+        
+        options = load_parquet_options(config_path)
+        
+        assert options['Votes'] == ParquetOptions({'compression': 'zstd', 'row_group_size': 1000}, {})
+        assert options['Posts'].table == {'compression': 'zstd', 'row_group_size': 500}
+        assert options['Posts'].column_option('Body', 'compression') == 'gzip'
+        assert options['Posts'].column_option('Id', 'compression') == 'zstd'
+        assert options['Posts'].column_option('Id', 'dictionary') is None
+    
+    def test_no_section(self):
+        """Test that the default config parses and configures no row group size."""
+        options = load_parquet_options()
+        
+        assert all(not table_options.table.get('row_group_size') for table_options in options.values())
+        assert options['Posts'].column_option('Body', 'dictionary') is False
+    
+    @pytest.mark.parametrize("parquet,message", [
+        ({'default': {}}, "Unknown keys"),
+        ({'defaults': {'compresion': 'zstd'}}, "Unknown Parquet option"),
+        ({'defaults': {'compression': 'lzma'}}, "Unknown Parquet compression"),
+        ({'defaults': {'row_group_size': 0}}, "greater than 0"),
+        ({'defaults': {'compression_level': True}}, "must be a int"),
+        ({'tables': {'Users': {}}}, "unknown table"),
+        ({'tables': {'Posts': {'columns': {'Title': {}}}}}, "unknown column"),
+        ({'tables': {'Posts': {'columns': {'Body': {'row_group_size': 10}}}}}, "Unknown Parquet option"),
+    ])
+    def test_invalid_options(self, temp_dir, parquet, message):
+        """Test that invalid Parquet options are rejected with the offending key."""
+        config_path = self.write_config(temp_dir, parquet)
+        
+        with pytest.raises(ConfigurationError, match=message):
+            load_parquet_options(config_path)
+
+
+class TestParserEngines:
+    """Test that every parsing engine gives identical rows."""
+    
+    COLUMNS = ['Id', 'Title', 'Body', 'Flag', 'Missing']
+    
+    @pytest.fixture
+    def tricky_xml(self, temp_dir):
+        """Rows exercising escaping, whitespace normalization and layout variations."""
+        source_file = os.path.join(temp_dir, "Tricky.xml")
+        with open(source_file, 'wb') as f:
+            f.write('''<?xml version="1.0" encoding="utf-8"?>
+<posts>
+  <row Id="1" Title="&lt;b&gt; &amp;amp; &quot;x&quot; &apos;y&apos;" Body="a&#xA;b&#xD;&#xA;c&#10;d&#x9;e" Flag="True" />
+  <row Id="2" Title="café 中 &#x1F600;" Body="literal\ttab and
+newline" Flag="False" />
+  <row
+       Id="3"   Title = 'single "quoted"'
+       Body="&lt;row Id=&quot;9&quot; /&gt;" ></row>
+  <row Id="4" Title="" />
+  <rowset Id="5" />
+</posts>'''.encode('utf-8'))
+        return source_file
+    
+    @pytest.mark.parametrize("engine", list(PARSER_ENGINES))
+    def test_engines_match_lxml(self, tricky_xml, engine):
+        """Test that an engine gives the same rows as lxml."""
+        expected = list(parse_xml_rows(tricky_xml, self.COLUMNS, engine="lxml"))
+        
+        assert [row[0] for row in expected] == ['1', '2', '3', '4']
+        assert list(parse_xml_rows(tricky_xml, self.COLUMNS, engine=engine)) == expected
+    
+    @pytest.mark.parametrize("engine", list(PARSER_ENGINES))
+    @pytest.mark.parametrize("row, expected", [
+        ('<row Id="1" A=\'a > b "c"\' B="b"/>', ['1', 'a > b "c"', 'b']),
+        ('<row Id="1" A=\'x"\' B="b" />', ['1', 'x"', 'b']),
+    ])
+    def test_engines_single_quoted_values(self, temp_dir, engine, row, expected):
+        """Test that quotes and '>' inside single-quoted values do not end the row."""
+        source_file = os.path.join(temp_dir, "Quoted.xml")
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write(f'<posts>\n  {row}\n  <row Id="2" />\n</posts>')
+        
+        assert list(parse_xml_rows(source_file, ['Id', 'A', 'B'], engine=engine)) == [expected, ['2', None, None]]
+    
+    @pytest.mark.parametrize("engine", list(PARSER_ENGINES))
+    def test_engines_match_untransformed(self, tricky_xml, engine):
+        """Test that engines give the same raw values, before line breaks are escaped."""
+        expected = list(parse_xml_batches(tricky_xml, self.COLUMNS, engine="lxml", transform=False))
+        
+        assert expected[0][2][0] == 'a\nb\r\nc\nd\te'
+        assert list(parse_xml_batches(tricky_xml, self.COLUMNS, engine=engine, transform=False)) == expected
+    
+    @pytest.mark.parametrize("engine", list(PARSER_ENGINES))
+    def test_engines_match_on_byte_ranges(self, tricky_xml, engine):
+        """Test that engines parse byte ranges like whole files."""
+        expected = list(parse_xml_rows(tricky_xml, self.COLUMNS))
+        
+        rows = []
+        for byte_range in split_xml_file(tricky_xml, 3):
+            rows.extend(parse_xml_rows(tricky_xml, self.COLUMNS, byte_range=byte_range, engine=engine))
+        
+        assert rows == expected
+    
+    def test_engine_values(self, tricky_xml):
+        """Test the values every engine must produce."""
+        rows = list(parse_xml_rows(tricky_xml, self.COLUMNS, engine="scanner"))
+        
+        assert rows[0] == ['1', '<b> &amp; "x" \'y\'', 'a&#xA;b&#xD;&#xA;c&#xA;d\te', 1, None]
+        assert rows[1][1:4] == ['café 中 \U0001F600', 'literal tab and newline', 0]
+        assert rows[2][1:3] == ['single "quoted"', '<row Id="9" />']
+        assert rows[3] == ['4', '', None, None, None]
+    
+    @pytest.mark.parametrize("engine", list(PARSER_ENGINES))
+    def test_engines_reject_invalid_xml(self, temp_dir, engine):
+        """Test that malformed rows raise a validation error with every engine."""
+        source_file = os.path.join(temp_dir, "Invalid.xml")
+        with open(source_file, 'w') as f:
+            f.write('<posts>\n  <row Id="1" Title="Unclosed\n  <row Id="2" />\n</posts>')
+        
+        with pytest.raises(ValidationError, match="Invalid XML"):
+            list(parse_xml_rows(source_file, ['Id'], engine=engine))
+    
+    @pytest.mark.parametrize("entity", ["&foo;", "a & b"])
+    def test_scanner_rejects_bad_references(self, temp_dir, entity):
+        """Test that the scanner validates references like an XML parser."""
+        source_file = os.path.join(temp_dir, "Invalid.xml")
+        with open(source_file, 'w') as f:
+            f.write(f'<posts><row Id="{entity}" /></posts>')
+        
+        with pytest.raises(ValidationError, match="Invalid XML"):
+            list(parse_xml_rows(source_file, ['Id'], engine="scanner"))
+    
+    def test_scanner_rejects_other_encodings(self, temp_dir):
+        """Test that the scanner refuses dumps that are not UTF-8."""
+        source_file = os.path.join(temp_dir, "Latin1.xml")
+        with open(source_file, 'wb') as f:
+            f.write('<?xml version="1.0" encoding="iso-8859-1"?><posts><row Id="é" /></posts>'.encode('latin-1'))
+        
+        assert list(parse_xml_rows(source_file, ['Id'], engine="expat")) == [['é']]
+        with pytest.raises(ValidationError, match="UTF-8"):
+            list(parse_xml_rows(source_file, ['Id'], engine="scanner"))
+    
+    def test_unknown_engine(self, tricky_xml):
+        """Test that an unknown engine name is rejected."""
+        with pytest.raises(ConfigurationError, match="Unknown parsing engine"):
+            list(parse_xml_rows(tricky_xml, ['Id'], engine="sax"))
+
+
+class TestBatchParsing:
+    """Test the columnar batch parsing API."""
+    
+    COLUMNS = ['Id', 'Title', 'Body', 'Flag']
+    
+    @pytest.fixture
+    def posts_xml(self, temp_dir):
+        source_file = os.path.join(temp_dir, "Posts.xml")
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0" encoding="utf-8"?>\n<posts>\n')
+            for i in range(1, 11):
+                flag = ' Flag="True"' if i % 3 else ''
+                f.write(f'  <row Id="{i}" Title="Title {i}" Body="Line&#xA;{i}&#xD;&#xA;end"{flag} />\n')
+            f.write('</posts>\n')
+        return source_file
+    
+    @pytest.mark.parametrize("values", [
+        ["a", "b", None],
+        ["True", "False", None, "x\ny", "True"],
+        ["a\r\nb", "c\rd", None, "e\n"],
+        [None, None],
+        [],
+    ])
+    def test_transform_values_matches_transform_column(self, values):
+        """Test that the column kernel gives the same values as the per-cell transform."""
+        expected = [None if value is None else transform_column(value) for value in values]
+        
+        assert transform_values(values) == expected
+    
+    @pytest.mark.parametrize("engine", list(PARSER_ENGINES))
+    @pytest.mark.parametrize("batch_size", [1, 3, 10, 100])
+    def test_batches_match_rows(self, posts_xml, engine, batch_size):
+        """Test that batches hold the same values as parse_xml_rows, split into columns."""
+        expected = list(parse_xml_rows(posts_xml, self.COLUMNS, engine=engine))
+        
+        batches = list(parse_xml_batches(posts_xml, self.COLUMNS, batch_size, engine=engine))
+        
+        assert [len(batch[0]) for batch in batches[:-1]] == [batch_size] * (len(batches) - 1)
+        assert [list(row) for batch in batches for row in zip(*batch)] == expected
+    
+    def test_raw_values(self, posts_xml):
+        """Test that transform=False returns the attribute values unchanged."""
+        batch = next(parse_xml_batches(posts_xml, self.COLUMNS, 2, transform=False))
+        
+        assert batch == [['1', '2'], ['Title 1', 'Title 2'], ['Line\n1\r\nend', 'Line\n2\r\nend'], ['True', 'True']]
+    
+    def test_progress_per_batch(self, posts_xml):
+        """Test that progress is reported with the running row count and bytes read after each batch."""
+        calls = []
+        list(parse_xml_batches(posts_xml, ['Id'], 4, progress_callback=lambda *args: calls.append(args)))
+        
+        assert [rows for rows, position, size in calls] == [4, 8, 10]
+        assert all(size == os.path.getsize(posts_xml) for rows, position, size in calls)
+        assert 0 < calls[0][1] <= calls[-1][1] == os.path.getsize(posts_xml)
+    
+    def test_progress_of_range_and_stream(self, posts_xml):
+        """Test that byte ranges report their length and streams no size."""
+        byte_range = split_xml_file(posts_xml, 2)[1]
+        calls = []
+        list(parse_xml_batches(posts_xml, ['Id'], 100, byte_range=byte_range, progress_callback=lambda *args: calls.append(args)))
+        with open(posts_xml, 'rb') as f:
+            list(parse_xml_batches(f, ['Id'], 100, progress_callback=lambda *args: calls.append(args)))
+        
+        assert calls[0][2] == byte_range[1] - byte_range[0]
+        assert calls[1][1:] == (os.path.getsize(posts_xml), None)
+    
+    def test_invalid_batch_size(self, posts_xml):
+        """Test that the batch size must be positive."""
+        with pytest.raises(ValidationError, match="Batch size"):
+            list(parse_xml_batches(posts_xml, ['Id'], 0))
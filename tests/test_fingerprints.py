@@ -0,0 +1,207 @@
+"""
+Tests for stackexchange_parser.fingerprints module.
+"""
+
+import os
+import json
+import logging
+import pytest
+import yaml
+from unittest.mock import patch
+
+from stackexchange_parser import process_stackexchange_data, CSVWriter, ParquetWriter
+from stackexchange_parser import fingerprints
+from stackexchange_parser.archives import ArchiveMember
+from stackexchange_parser.fingerprints import (
+    FingerprintStore,
+    FINGERPRINT_FILENAME,
+    sample_hash,
+    same_source,
+    source_fingerprint
+)
+
+
+@pytest.fixture
+def converted_site(stackexchange_site_structure, sample_config_file, temp_dir):
+    """Convert the sample site once and return the paths involved."""
+    input_dir = stackexchange_site_structure['input_dir']
+    output_dir = os.path.join(temp_dir, "output")
+    process_stackexchange_data(input_dir, output_dir, CSVWriter(), False, sample_config_file)
+    return {
+        'input_dir': input_dir,
+        'site_input': stackexchange_site_structure['main_site'],
+        'output_dir': output_dir,
+        'site_output': os.path.join(output_dir, "stackoverflow.com"),
+        'config': sample_config_file
+    }
+
+
+def output_mtimes(site_output):
+    return {name: os.stat(os.path.join(site_output, name)).st_mtime_ns for name in os.listdir(site_output)}
+
+
+def touch_later(filename):
+    """Move a file's modification time forward without changing its content."""
+    stat = os.stat(filename)
+    os.utime(filename, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+class TestSourceFingerprints:
+    """Test fingerprinting source files."""
+
+    def test_sample_hash_ignores_mtime(self, temp_dir):
+        """Test that the content hash only depends on the content."""
+        filename = os.path.join(temp_dir, "Posts.xml")
+        with open(filename, 'wb') as f:
+            f.write(b"<posts></posts>")
+        before = sample_hash(filename)
+        touch_later(filename)
+
+        assert sample_hash(filename) == before
+
+    def test_sample_hash_large_file(self, temp_dir):
+        """Test that a sampled block change alters the hash of a large file."""
+        filename = os.path.join(temp_dir, "Posts.xml")
+        with open(filename, 'wb') as f:
+            f.write(b"a" * 1000)
+        with patch.object(fingerprints, "SAMPLE_BLOCK_SIZE", 10), patch.object(fingerprints, "SAMPLE_BLOCKS", 4):
+            before = sample_hash(filename)
+            with open(filename, 'r+b') as f:
+                f.seek(995)
+                f.write(b"b")
+            assert sample_hash(filename) != before
+
+    def test_archive_member(self, temp_dir):
+        """Test that archive members are fingerprinted by their archive and name."""
+        archive = os.path.join(temp_dir, "site.com.7z")
+        with open(archive, 'wb') as f:
+            f.write(b"7z")
+
+        fingerprint = source_fingerprint(ArchiveMember(archive, "Posts.xml"))
+
+        assert fingerprint['member'] == "Posts.xml"
+        assert fingerprint['size'] == 2
+
+    def test_same_source(self):
+        """Test that a matching content hash outweighs a new modification time."""
+        stored = {'size': 10, 'mtime_ns': 1, 'hash': 'abc'}
+
+        assert same_source(stored, {'size': 10, 'mtime_ns': 2, 'hash': 'abc'})
+        assert not same_source(stored, {'size': 10, 'mtime_ns': 1, 'hash': 'def'})
+        assert not same_source(stored, {'size': 10, 'mtime_ns': 2})
+        assert not same_source(stored, {'size': 11, 'mtime_ns': 1, 'hash': 'abc'})
+
+
+class TestFingerprintStore:
+    """Test the fingerprint store kept in the output folder."""
+
+    def test_written_after_conversion(self, converted_site):
+        """Test that every converted table is recorded."""
+        with open(os.path.join(converted_site['output_dir'], FINGERPRINT_FILENAME), encoding='utf-8') as f:
+            entries = json.load(f)
+
+        assert sorted(entries) == [
+            "stackoverflow.com/Comments", "stackoverflow.com/Posts", "stackoverflow.com/Users"
+        ]
+        assert entries["stackoverflow.com/Posts"]["settings"] == {"writer": "CSVWriter"}
+
+    def test_unreadable_store(self, temp_dir):
+        """Test that a corrupt store is treated as empty."""
+        with open(os.path.join(temp_dir, FINGERPRINT_FILENAME), 'w') as f:
+            f.write("{not json")
+
+        assert FingerprintStore(temp_dir).entries == {}
+
+
+class TestRefresh:
+    """Test incremental refresh runs."""
+
+    def test_nothing_changed(self, converted_site, caplog):
+        """Test that an unchanged dump is not converted again and the skips are reported."""
+        before = output_mtimes(converted_site['site_output'])
+
+        with caplog.at_level(logging.INFO):
+            assert process_stackexchange_data(
+                converted_site['input_dir'], converted_site['output_dir'], CSVWriter(), False,
+                converted_site['config'], refresh=True
+            ) == 0
+
+        assert output_mtimes(converted_site['site_output']) == before
+        assert "Skipped 3 tables" in caplog.text
+
+    def test_changed_source(self, converted_site):
+        """Test that only the table whose source changed is converted again."""
+        posts = os.path.join(converted_site['site_input'], "Posts.xml")
+        with open(posts, 'a', encoding='utf-8') as f:
+            f.write("\n")
+        before = output_mtimes(converted_site['site_output'])
+
+        process_stackexchange_data(
+            converted_site['input_dir'], converted_site['output_dir'], CSVWriter(), False,
+            converted_site['config'], refresh=True
+        )
+
+        after = output_mtimes(converted_site['site_output'])
+        assert [name for name in after if after[name] != before[name]] == ["Posts.csv"]
+
+    def test_changed_columns(self, converted_site, sample_config, temp_dir):
+        """Test that a table is converted again when its columns change."""
+        sample_config['tables']['Users'] = ['Id', 'DisplayName']
+        config_file = os.path.join(temp_dir, "changed.yaml")
+        with open(config_file, 'w') as f:
+            yaml.dump(sample_config, f)
+        before = output_mtimes(converted_site['site_output'])
+
+        process_stackexchange_data(
+            converted_site['input_dir'], converted_site['output_dir'], CSVWriter(), False,
+            config_file, refresh=True
+        )
+
+        after = output_mtimes(converted_site['site_output'])
+        assert [name for name in after if after[name] != before[name]] == ["Users.csv"]
+
+    def test_changed_writer_settings(self, stackexchange_site_structure, sample_config_file, temp_dir):
+        """Test that tables are converted again when the writer settings change."""
+        pytest.importorskip("pyarrow")
+        input_dir = stackexchange_site_structure['input_dir']
+        output_dir = os.path.join(temp_dir, "output")
+        site_output = os.path.join(output_dir, "stackoverflow.com")
+        process_stackexchange_data(input_dir, output_dir, ParquetWriter(), False, sample_config_file)
+        before = output_mtimes(site_output)
+
+        process_stackexchange_data(input_dir, output_dir, ParquetWriter(), False, sample_config_file, refresh=True)
+        assert output_mtimes(site_output) == before
+
+        process_stackexchange_data(
+            input_dir, output_dir, ParquetWriter(single_file=True), False, sample_config_file, refresh=True
+        )
+        after = output_mtimes(site_output)
+        assert all(after[name] != before[name] for name in before)
+
+    def test_missing_output(self, converted_site):
+        """Test that a table whose output was deleted is converted again."""
+        os.remove(os.path.join(converted_site['site_output'], "Comments.csv"))
+
+        process_stackexchange_data(
+            converted_site['input_dir'], converted_site['output_dir'], CSVWriter(), False,
+            converted_site['config'], refresh=True
+        )
+
+        assert os.path.exists(os.path.join(converted_site['site_output'], "Comments.csv"))
+
+    def test_content_hash(self, stackexchange_site_structure, sample_config_file, temp_dir):
+        """Test that a content hash skips sources that were only touched."""
+        input_dir = stackexchange_site_structure['input_dir']
+        output_dir = os.path.join(temp_dir, "output")
+        site_output = os.path.join(output_dir, "stackoverflow.com")
+        process_stackexchange_data(input_dir, output_dir, CSVWriter(), False, sample_config_file, content_hash=True)
+        touch_later(os.path.join(stackexchange_site_structure['main_site'], "Posts.xml"))
+        before = output_mtimes(site_output)
+
+        process_stackexchange_data(
+            input_dir, output_dir, CSVWriter(), False, sample_config_file, refresh=True, content_hash=True
+        )
+        assert output_mtimes(site_output) == before
+
+        process_stackexchange_data(input_dir, output_dir, CSVWriter(), False, sample_config_file, refresh=True)
+        assert output_mtimes(site_output)["Posts.csv"] != before["Posts.csv"]
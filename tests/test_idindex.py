@@ -0,0 +1,175 @@
+"""
+Tests for stackexchange_parser.idindex module.
+"""
+
+import os
+import pytest
+import yaml
+from unittest.mock import patch
+
+from stackexchange_parser import (
+    CSVWriter, ParquetWriter, ArrowWriter, IdIndex, IndexEntry, ValidationError, process_stackexchange_data, lookup_rows
+)
+from stackexchange_parser import idindex
+from stackexchange_parser.idindex import IdIndexBuilder, index_columns, index_filename
+from stackexchange_parser.parallel import ConversionUnit, run_units
+from stackexchange_parser.writers import PYARROW_AVAILABLE, SQLiteWriter
+
+
+def write_table(folder, table, rows):
+    os.makedirs(folder, exist_ok=True)
+    filename = os.path.join(folder, f"{table}.xml")
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(f'<{table.lower()}>\n')
+        for row_id, post_id, text in rows:
+            f.write(f'  <row Id="{row_id}" PostId="{post_id}" Text="{text}" />\n')
+        f.write(f'</{table.lower()}>\n')
+    return filename
+
+
+def requires_pyarrow(writer_class):
+    return pytest.param(
+        writer_class, marks=pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+    )
+
+
+WRITERS = [CSVWriter, requires_pyarrow(ParquetWriter), requires_pyarrow(ArrowWriter)]
+
+
+class TestIdIndexBuilder:
+    """Test writing and reading index files."""
+
+    def test_sorted_lookup(self, temp_dir):
+        """Test that unsorted keys are sorted, with duplicates in output order."""
+        builder = IdIndexBuilder("Comments", "PostId")
+        first = builder.add_file(os.path.join(temp_dir, "a.csv"))
+        second = builder.add_file(os.path.join(temp_dir, "b.csv"))
+        builder.add(first, 0, ["5", "3", None, "5"], [10, 20, 30, 40])
+        builder.add(second, 2, [3, 1], [0, 1])
+        for name in ("a.csv", "b.csv"):
+            open(os.path.join(temp_dir, name), 'w').close()
+        filename = os.path.join(temp_dir, "Comments.PostId.idx")
+
+        builder.write(filename, "bytes")
+
+        with IdIndex(filename) as index:
+            assert len(index) == 5
+            assert (index.table, index.column, index.positions) == ("Comments", "PostId", "bytes")
+            assert index.lookup(5) == [
+                IndexEntry(os.path.join(temp_dir, "a.csv"), 0, 10), IndexEntry(os.path.join(temp_dir, "a.csv"), 0, 40)
+            ]
+            assert [entry.offset for entry in index.lookup(3)] == [20, 0]
+            assert index.lookup(1) == [IndexEntry(os.path.join(temp_dir, "b.csv"), 2, 1)]
+            assert index.lookup(4) == []
+            assert index.stale_files() == []
+        assert sorted(os.listdir(temp_dir)) == ["Comments.PostId.idx", "a.csv", "b.csv"]
+
+    def test_sort_without_numpy(self, temp_dir):
+        """Test that keys are also sorted without numpy."""
+        builder = IdIndexBuilder("Posts", "Id")
+        builder.add(builder.add_file(os.path.join(temp_dir, "Posts.csv")), 0, [9, 2, 7], [1, 2, 3])
+        open(os.path.join(temp_dir, "Posts.csv"), 'w').close()
+
+        with patch.object(idindex, "NUMPY_AVAILABLE", False):
+            builder.write(os.path.join(temp_dir, "Posts.Id.idx"), "bytes")
+
+        with IdIndex(os.path.join(temp_dir, "Posts.Id.idx")) as index:
+            assert [index.lookup(key)[0].offset for key in (2, 7, 9)] == [2, 3, 1]
+
+    def test_invalid(self, temp_dir):
+        """Test that non-integer keys and other files are rejected."""
+        with pytest.raises(ValidationError, match="Cannot index column Id"):
+            IdIndexBuilder("Posts", "Id").add(0, 0, ["abc"], [0])
+        not_index = os.path.join(temp_dir, "Posts.Id.idx")
+        with open(not_index, 'wb') as f:
+            f.write(b"Id,Title\r\n")
+        with pytest.raises(ValidationError, match="not an index"):
+            IdIndex(not_index)
+
+    def test_names(self):
+        """Test which columns are indexed and where indexes go."""
+        assert index_columns("Posts", ["Id", "PostId"]) == ["Id"]
+        assert index_columns("Votes", ["Id", "PostId", "UserId"]) == ["Id", "PostId"]
+        assert index_columns("Tags", ["TagName"]) == []
+        assert index_filename(os.path.join("out", "Posts.parquet"), "Id") == os.path.join("out", "Posts.Id.idx")
+
+
+class TestWriterIndexes:
+    """Test indexes written along converted tables."""
+
+    @pytest.mark.parametrize("writer_class", WRITERS)
+    def test_lookup_rows(self, temp_dir, writer_class):
+        """Test that Id and PostId lookups find their rows in every format."""
+        source = write_table(temp_dir, "Comments", [(i, 100 - i % 10, f"comment {i}") for i in range(1, 251)])
+        destination = os.path.join(temp_dir, "out", "Comments" + writer_class.file_extension)
+        os.makedirs(os.path.dirname(destination))
+        writer = writer_class(id_index=True)
+        writer.PARSE_BATCH_ROWS = 64
+        writer.ARROW_CHUNK_ROWS = 64
+        unit = ConversionUnit(source, "Comments", ["Id", "PostId", "Text"], destination, "site", column_types={"Id": "int"})
+
+        result, = run_units(writer, [unit])
+
+        assert result.ok
+        folder = os.path.dirname(destination)
+        assert sorted(name for name in os.listdir(folder) if name.endswith(".idx")) == [
+            "Comments.Id.idx", "Comments.PostId.idx"
+        ]
+        row, = lookup_rows(folder, "Comments", 123)
+        assert str(row["Id"]) == "123" and row["Text"] == "comment 123"
+        rows = lookup_rows(folder, "Comments", 97, "PostId")
+        assert [str(row["Id"]) for row in rows] == [str(i) for i in range(3, 251, 10)]
+        assert lookup_rows(folder, "Comments", 1000) == []
+
+    @pytest.mark.parametrize("writer_class", WRITERS)
+    def test_split_ranges(self, temp_dir, writer_class):
+        """Test that split tables are indexed once their ranges are merged."""
+        source = write_table(temp_dir, "Posts", [(i, 0, f"post {i}") for i in range(1, 301)])
+        destination = os.path.join(temp_dir, "out", "Posts" + writer_class.file_extension)
+        os.makedirs(os.path.dirname(destination))
+        unit = ConversionUnit(source, "Posts", ["Id", "Text"], destination, "site")
+
+        result, = run_units(writer_class(id_index=True), [unit], jobs=2, split_parts=3, split_min_bytes=0)
+
+        assert result.ok
+        folder = os.path.dirname(destination)
+        with IdIndex(os.path.join(folder, "Posts.Id.idx")) as index:
+            assert len(index) == 300
+        assert [lookup_rows(folder, "Posts", key)[0]["Text"] for key in (1, 150, 300)] == ["post 1", "post 150", "post 300"]
+
+    def test_stale_index(self, temp_dir):
+        """Test that a table converted again without its index is not looked up through the old one."""
+        source = write_table(temp_dir, "Posts", [(i, 0, f"post {i}") for i in range(1, 11)])
+        destination = os.path.join(temp_dir, "Posts.csv")
+        unit = ConversionUnit(source, "Posts", ["Id", "Text"], destination, "site")
+        run_units(CSVWriter(id_index=True), [unit])
+        run_units(CSVWriter(), [unit._replace(columns=["Id"])])
+
+        with pytest.raises(ValidationError, match="out of date"):
+            lookup_rows(temp_dir, "Posts", 1)
+        with pytest.raises(ValidationError, match="No PostId index"):
+            lookup_rows(temp_dir, "Posts", 1, "PostId")
+
+    def test_process_and_refresh(self, temp_dir):
+        """Test that a full conversion indexes every site, and enabling indexes counts as a change for refresh."""
+        config_file = os.path.join(temp_dir, "config.yaml")
+        with open(config_file, 'w') as f:
+            yaml.dump({'tables': {'Comments': ['Id', 'PostId', 'Text']}}, f)
+        input_dir = os.path.join(temp_dir, "input")
+        write_table(os.path.join(input_dir, "a.com"), "Comments", [(1, 7, "x"), (2, 7, "y")])
+        output_dir = os.path.join(temp_dir, "output")
+        process_stackexchange_data(input_dir, output_dir, CSVWriter(), False, config_file)
+
+        process_stackexchange_data(input_dir, output_dir, CSVWriter(id_index=True), False, config_file, refresh=True)
+
+        rows = lookup_rows(os.path.join(output_dir, "a.com"), "Comments", 7, "PostId")
+        assert [row["Text"] for row in rows] == ["x", "y"]
+
+    def test_unsupported(self):
+        """Test the outputs that cannot be indexed."""
+        with pytest.raises(ValueError, match="uncompressed"):
+            CSVWriter(compression="gzip", id_index=True)
+        if PYARROW_AVAILABLE:
+            with pytest.raises(ValueError, match="Id indexes"):
+                ParquetWriter(partition_by="year", id_index=True)
+        assert not SQLiteWriter().id_index
@@ -0,0 +1,261 @@
+"""
+Tests for stackexchange_parser.metrics module.
+"""
+
+import os
+import json
+import pstats
+import pytest
+
+from stackexchange_parser import (
+    process_stackexchange_data,
+    convert_dump,
+    CSVWriter,
+    ParquetWriter,
+    RunResult,
+    TableMetrics,
+    StackExchangeParserError
+)
+from stackexchange_parser.metrics import ConversionStats, STAGES, peak_rss_bytes, reset_peak_rss
+from stackexchange_parser.parallel import ConversionUnit, run_units
+from stackexchange_parser.writers import PYARROW_AVAILABLE
+
+
+def table_metrics(**kwargs):
+    values = dict(
+        site="stackoverflow.com", table="Posts", rows=100, input_bytes=5000, output_bytes=2000,
+        seconds=2.0, parse_seconds=1.5, peak_rss_bytes=10 ** 8,
+        stage_seconds={"parse": 1.5, "transform": 0.1, "encode": 0.2, "write": 0.1}
+    )
+    values.update(kwargs)
+    return TableMetrics(**values)
+
+
+class TestConversionStats:
+    """Test counting parsed rows and parse time."""
+
+    def test_timed(self):
+        """Test that rows of every batch are counted and the source is closed early."""
+        closed = []
+
+        def batches():
+            try:
+                for _ in range(3):
+                    yield [['1', '2'], ['a', 'b']]
+            finally:
+                closed.append(True)
+
+        stats = ConversionStats()
+        for count, _ in enumerate(stats.timed(batches())):
+            if count == 1:
+                break
+
+        assert stats.rows == 4
+        assert stats.parse_seconds >= 0
+        assert closed == [True]
+
+    def test_stage(self):
+        """Test that time spent in a stage adds up, also when the block raises."""
+        stats = ConversionStats()
+        with stats.stage("write"):
+            pass
+        with pytest.raises(OSError), stats.stage("write"):
+            raise OSError("disk full")
+
+        assert list(stats.stage_seconds) == list(STAGES)
+        assert stats.stage_seconds["write"] > 0
+        assert stats.stage_seconds["encode"] == 0
+
+
+def write_posts(temp_dir, rows=200):
+    source_file = os.path.join(temp_dir, "Posts.xml")
+    with open(source_file, 'w', encoding='utf-8') as f:
+        f.write('<posts>\n' + "".join(f'  <row Id="{i}" Body="a&#xA;b" />\n' for i in range(1, rows + 1)) + '</posts>\n')
+    return source_file
+
+
+class TestStageTimings:
+    """Test the stages timed by the writers."""
+
+    @pytest.mark.parametrize("writer,stages", [
+        (CSVWriter(), {"parse", "transform", "encode"}),
+        pytest.param(
+            CSVWriter(encoder="arrow") if PYARROW_AVAILABLE else None, set(STAGES),
+            marks=pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+        ),
+        pytest.param(
+            ParquetWriter() if PYARROW_AVAILABLE else None, {"parse", "transform", "write"},
+            marks=pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+        ),
+    ])
+    def test_writer_stages(self, temp_dir, writer, stages):
+        """Test that every stage a writer can tell apart is timed."""
+        destination = os.path.join(temp_dir, "Posts" + writer.file_extension)
+
+        stats = writer.write_from_xml(write_posts(temp_dir), "Posts", ['Id', 'Body'], destination, "site")
+
+        assert {stage for stage, seconds in stats.stage_seconds.items() if seconds > 0} >= stages
+        assert stats.parse_seconds == stats.stage_seconds["parse"]
+
+
+class TestProfile:
+    """Test profiling conversions."""
+
+    def test_profile_dumps(self, temp_dir):
+        """Test that every range of a split unit saves a cProfile dump and stage totals add up."""
+        unit = ConversionUnit(write_posts(temp_dir), 'Posts', ['Id', 'Body'], os.path.join(temp_dir, "Posts.csv"), "site")
+        profile_dir = os.path.join(temp_dir, "profiles")
+
+        result, = run_units(CSVWriter(), [unit], split_parts=2, split_min_bytes=0, profile_dir=profile_dir)
+
+        dumps = sorted(os.listdir(profile_dir))
+        assert len(dumps) == 2
+        assert all(dump.startswith("site_Posts_") and dump.endswith(".prof") for dump in dumps)
+        assert pstats.Stats(os.path.join(profile_dir, dumps[0])).total_calls > 0
+        assert set(result.stage_seconds) == set(STAGES)
+        assert result.stage_seconds["parse"] == result.parse_seconds
+
+    def test_profile_report(self):
+        """Test the per-stage report of a run."""
+        result = RunResult(directories=1, tables=[table_metrics()], skipped=[], seconds=2.0)
+
+        header, row = result.profile_report().splitlines()
+
+        assert header.split() == ["table", "rows", *STAGES, "other", "total"]
+        assert row.split() == ["stackoverflow.com/Posts", "100", "1.500", "0.100", "0.200", "0.100", "0.100", "2.000"]
+
+    def test_process_with_profile(self, stackexchange_site_structure, sample_config_file, temp_dir, caplog):
+        """Test that a profiled run logs its stage report and saves a dump per table."""
+        output_dir = os.path.join(temp_dir, "output")
+        profile_dir = os.path.join(temp_dir, "profiles")
+
+        with caplog.at_level("INFO"):
+            process_stackexchange_data(
+                stackexchange_site_structure['input_dir'], output_dir, CSVWriter(), False, sample_config_file,
+                profile_dir=profile_dir
+            )
+
+        assert sorted(os.listdir(profile_dir)) == [
+            "stackoverflow.com_Comments.prof", "stackoverflow.com_Posts.prof", "stackoverflow.com_Users.prof"
+        ]
+        assert "Time per stage in seconds:" in caplog.messages
+        assert any("stackoverflow.com/Posts" in message for message in caplog.messages)
+
+
+class TestTableMetrics:
+    """Test derived per-table metrics."""
+
+    def test_derived_values(self):
+        """Test write seconds and throughput."""
+        metrics = table_metrics()
+
+        assert metrics.write_seconds == 0.5
+        assert metrics.rows_per_second == 50
+        assert metrics.to_dict()["rows_per_second"] == 50
+        assert table_metrics(seconds=0.0, parse_seconds=0.0).rows_per_second == 0
+
+
+class TestRunResult:
+    """Test the run result and its reports."""
+
+    def test_prometheus_text(self):
+        """Test the Prometheus exposition format with escaped labels."""
+        result = RunResult(
+            directories=1,
+            tables=[table_metrics(), table_metrics(site='we"ird', input_bytes=None, error="ValidationError: bad")],
+            skipped=["stackoverflow.com/Users"],
+            seconds=3.5
+        )
+
+        lines = result.prometheus_text().splitlines()
+
+        assert "# TYPE stackexchange_parser_table_rows gauge" in lines
+        assert 'stackexchange_parser_table_rows{site="stackoverflow.com",table="Posts"} 100' in lines
+        assert not [line for line in lines if line.startswith('stackexchange_parser_table_input_bytes{site="we\\"ird"')]
+        assert 'stackexchange_parser_table_success{site="we\\"ird",table="Posts"} 0' in lines
+        assert 'stackexchange_parser_table_write_seconds{site="stackoverflow.com",table="Posts"} 0.5' in lines
+        assert 'stackexchange_parser_table_stage_seconds{site="stackoverflow.com",table="Posts",stage="encode"} 0.2' in lines
+        assert "stackexchange_parser_run_tables_failed 1" in lines
+        assert "stackexchange_parser_run_tables_skipped 1" in lines
+
+    def test_write_reports(self, temp_dir):
+        """Test that reports are written completely under their final names."""
+        result = RunResult(directories=2, tables=[table_metrics()], skipped=[], seconds=1.0)
+        json_file = os.path.join(temp_dir, "metrics.json")
+        prom_file = os.path.join(temp_dir, "metrics.prom")
+
+        result.write_json(json_file)
+        result.write_prometheus(prom_file)
+
+        with open(json_file, encoding="utf-8") as f:
+            report = json.load(f)
+        assert report["directories"] == 2
+        assert report["rows"] == 100
+        assert report["tables"][0]["write_seconds"] == 0.5
+        assert sorted(os.listdir(temp_dir)) == ["metrics.json", "metrics.prom"]
+
+
+class TestRunMetrics:
+    """Test metrics collected by converting a dump."""
+
+    def test_convert_dump(self, stackexchange_site_structure, sample_config_file, temp_dir):
+        """Test that every converted table reports its rows and sizes."""
+        output_dir = os.path.join(temp_dir, "output")
+
+        result = convert_dump(stackexchange_site_structure['input_dir'], output_dir, CSVWriter(), False, sample_config_file)
+
+        assert result.directories == 1
+        by_table = {metrics.table: metrics for metrics in result.tables}
+        assert sorted(by_table) == ["Comments", "Posts", "Users"]
+        posts = by_table["Posts"]
+        assert posts.site == "stackoverflow.com"
+        assert posts.rows == 3
+        assert posts.input_bytes == os.path.getsize(os.path.join(stackexchange_site_structure['main_site'], "Posts.xml"))
+        assert posts.output_bytes == os.path.getsize(os.path.join(output_dir, "stackoverflow.com", "Posts.csv"))
+        assert 0 <= posts.parse_seconds <= posts.seconds
+        assert posts.stage_seconds["parse"] == posts.parse_seconds
+        assert sum(posts.stage_seconds.values()) + posts.other_seconds == pytest.approx(posts.seconds)
+        if os.name == 'posix':
+            assert posts.peak_rss_bytes > 0
+
+    def test_reports_on_failure(self, stackexchange_site_structure, sample_config_file, temp_dir, invalid_xml):
+        """Test that reports are written before failed tables are raised."""
+        with open(os.path.join(stackexchange_site_structure['main_site'], "Users.xml"), 'w') as f:
+            f.write(invalid_xml)
+        output_dir = os.path.join(temp_dir, "output")
+        json_file = os.path.join(temp_dir, "metrics.json")
+
+        with pytest.raises(StackExchangeParserError, match="stackoverflow.com/Users"):
+            process_stackexchange_data(
+                stackexchange_site_structure['input_dir'], output_dir, CSVWriter(), False, sample_config_file,
+                jobs=2, metrics_json=json_file
+            )
+
+        with open(json_file, encoding="utf-8") as f:
+            tables = {entry["table"]: entry for entry in json.load(f)["tables"]}
+        assert tables["Users"]["error"]
+        assert tables["Posts"]["error"] is None
+        assert tables["Posts"]["rows"] == 3
+
+    def test_split_units_sum_rows(self, temp_dir):
+        """Test that the ranges of a split table add up to its rows."""
+        source_file = os.path.join(temp_dir, "Posts.xml")
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write('<posts>\n' + "".join(f'  <row Id="{i}" />\n' for i in range(1, 201)) + '</posts>\n')
+        unit = ConversionUnit(source_file, 'Posts', ['Id'], os.path.join(temp_dir, "Posts.csv"), "site")
+
+        result, = run_units(CSVWriter(), [unit], split_parts=3, split_min_bytes=0)
+
+        assert result.rows == 200
+
+    @pytest.mark.skipif(not reset_peak_rss(), reason="the peak resident set size cannot be reset here")
+    def test_peak_rss_per_unit(self, temp_dir):
+        """Test that a table converted in the same process does not report an earlier, larger peak."""
+        large = bytearray(256 * 1024 * 1024)
+        earlier_peak = peak_rss_bytes()
+        del large
+        unit = ConversionUnit(write_posts(temp_dir), 'Posts', ['Id', 'Body'], os.path.join(temp_dir, "Posts.csv"), "site")
+
+        result, = run_units(CSVWriter(), [unit])
+
+        assert 0 < result.peak_rss_bytes < earlier_peak - 128 * 1024 * 1024
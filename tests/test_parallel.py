@@ -0,0 +1,209 @@
+"""
+Tests for stackexchange_parser.parallel module.
+"""
+
+import os
+import csv
+import pytest
+
+from stackexchange_parser import process_stackexchange_data, CSVWriter, ParquetWriter, StackExchangeParserError
+from stackexchange_parser.core import split_xml_file, parse_xml_rows
+from stackexchange_parser.parallel import ConversionUnit, run_units
+
+
+@pytest.fixture
+def large_posts_file(temp_dir):
+    """Create a Posts.xml with enough rows to split into several ranges."""
+    source_file = os.path.join(temp_dir, "Posts.xml")
+    with open(source_file, 'w', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="utf-8"?>\n<posts>\n')
+        for i in range(1, 501):
+            f.write(f'  <row Id="{i}" Title="Question &lt;{i}&gt; caf\u00e9" Body="Line 1&#xA;Line 2" />\n')
+        f.write('</posts>\n')
+    return source_file
+
+
+class TestSplitXmlFile:
+    """Test byte-range splitting of XML dumps."""
+
+    def test_ranges_are_contiguous_and_aligned(self, large_posts_file):
+        """Test that ranges start on row elements and cover all rows."""
+        ranges = split_xml_file(large_posts_file, 4)
+
+        assert len(ranges) == 4
+        with open(large_posts_file, 'rb') as f:
+            data = f.read()
+        for (start, end), (next_start, _) in zip(ranges, ranges[1:]):
+            assert end == next_start
+        for start, _ in ranges:
+            assert data[start:start + 5] == b'<row '
+        assert data[ranges[-1][1]:].startswith(b'</posts>')
+
+    def test_ranges_parse_to_same_rows(self, large_posts_file):
+        """Test that parsing every range yields exactly the rows of the whole file."""
+        columns = ['Id', 'Title', 'Body']
+        expected = list(parse_xml_rows(large_posts_file, columns))
+
+        rows = []
+        for byte_range in split_xml_file(large_posts_file, 7):
+            rows.extend(parse_xml_rows(large_posts_file, columns, byte_range=byte_range))
+
+        assert rows == expected
+
+    def test_split_empty_file(self, temp_dir):
+        """Test that a dump without rows yields no ranges."""
+        source_file = os.path.join(temp_dir, "Empty.xml")
+        with open(source_file, 'w') as f:
+            f.write('<?xml version="1.0"?><posts></posts>')
+
+        assert split_xml_file(source_file, 4) == []
+
+
+class TestRunUnits:
+    """Test running conversion units serially and on a process pool."""
+
+    def _units(self, site_dir, output_dir):
+        units = []
+        for table, columns in [('Posts', ['Id', 'Title']), ('Users', ['Id', 'DisplayName'])]:
+            units.append(ConversionUnit(
+                os.path.join(site_dir, f"{table}.xml"),
+                table,
+                columns,
+                os.path.join(output_dir, f"{table}.csv"),
+                "stackoverflow.com"
+            ))
+        return units
+
+    def test_run_units_pool_results_in_order(self, stackexchange_site_structure, temp_dir):
+        """Test that pool results are returned in submission order."""
+        output_dir = os.path.join(temp_dir, "out")
+        os.makedirs(output_dir)
+        units = self._units(stackexchange_site_structure['main_site'], output_dir)
+
+        results = run_units(CSVWriter(), units, jobs=2)
+
+        assert [r.unit.table_name for r in results] == ['Posts', 'Users']
+        assert all(r.ok for r in results)
+        assert all(os.path.exists(u.destination_file) for u in units)
+
+    def test_run_units_pool_replays_worker_logs(self, stackexchange_site_structure, temp_dir, caplog):
+        """Test that worker log messages are replayed by the parent in unit order."""
+        output_dir = os.path.join(temp_dir, "out")
+        os.makedirs(output_dir)
+        units = self._units(stackexchange_site_structure['main_site'], output_dir)
+
+        with caplog.at_level('INFO'):
+            results = run_units(CSVWriter(), units, jobs=2)
+
+        assert results[0].log_records
+        exports = [r.message for r in caplog.records if r.message.startswith("Exporting:")]
+        assert exports == [
+            "Exporting:  stackoverflow.com - Posts.csv",
+            "Exporting:  stackoverflow.com - Users.csv"
+        ]
+
+    def test_run_units_pool_reports_errors(self, stackexchange_site_structure, temp_dir):
+        """Test that a failing unit is reported without stopping the others."""
+        output_dir = os.path.join(temp_dir, "out")
+        os.makedirs(output_dir)
+        units = self._units(stackexchange_site_structure['main_site'], output_dir)
+        units[0] = units[0]._replace(source_file=os.path.join(temp_dir, "missing.xml"))
+
+        results = run_units(CSVWriter(), units, jobs=2)
+
+        assert not results[0].ok
+        assert "missing.xml" in results[0].error
+        assert results[1].ok
+
+    def test_run_units_invalid_jobs(self):
+        """Test that a non-positive job count is rejected."""
+        with pytest.raises(ValueError):
+            run_units(CSVWriter(), [], jobs=0)
+
+
+class TestParallelWorkflow:
+    """Test process_stackexchange_data with multiple jobs."""
+
+    def test_parallel_output_matches_serial(self, stackexchange_site_structure, sample_config_file):
+        """Test that parallel conversion produces the same files as serial conversion."""
+        input_dir = stackexchange_site_structure['input_dir']
+        serial_dir = os.path.join(input_dir, "serial_output")
+        parallel_dir = os.path.join(input_dir, "parallel_output")
+
+        process_stackexchange_data(input_dir, serial_dir, CSVWriter(), True, sample_config_file)
+        result = process_stackexchange_data(
+            input_dir, parallel_dir, CSVWriter(), True, sample_config_file, jobs=4
+        )
+
+        assert result == 2
+        for site in ['stackoverflow.com', 'meta.stackoverflow.com']:
+            serial_files = sorted(os.listdir(os.path.join(serial_dir, site)))
+            assert serial_files == sorted(os.listdir(os.path.join(parallel_dir, site)))
+            for name in serial_files:
+                with open(os.path.join(serial_dir, site, name), 'rb') as f1, \
+                        open(os.path.join(parallel_dir, site, name), 'rb') as f2:
+                    assert f1.read() == f2.read()
+
+    def test_parallel_failure_raises(self, stackexchange_site_structure, sample_config_file, invalid_xml):
+        """Test that failed units are collected and raised after the run."""
+        with open(os.path.join(stackexchange_site_structure['main_site'], "Users.xml"), 'w') as f:
+            f.write(invalid_xml)
+
+        input_dir = stackexchange_site_structure['input_dir']
+        output_dir = os.path.join(input_dir, "output")
+
+        with pytest.raises(StackExchangeParserError, match="stackoverflow.com/Users"):
+            process_stackexchange_data(input_dir, output_dir, CSVWriter(), False, sample_config_file, jobs=2)
+
+        # The other tables of the site are still converted
+        posts_csv = os.path.join(output_dir, "stackoverflow.com", "Posts.csv")
+        with open(posts_csv, 'r', newline='', encoding='utf-8') as f:
+            assert len(list(csv.DictReader(f))) == 3
+
+    @pytest.mark.parametrize("jobs", [1, 3])
+    def test_split_csv_matches_unsplit(self, large_posts_file, temp_dir, jobs):
+        """Test that a split table merges into the same CSV as an unsplit one."""
+        columns = ['Id', 'Title', 'Body']
+        unit = ConversionUnit(large_posts_file, 'Posts', columns, os.path.join(temp_dir, "Posts.csv"), "site")
+        whole = unit._replace(destination_file=os.path.join(temp_dir, "Whole.csv"))
+
+        run_units(CSVWriter(), [whole])
+        results = run_units(CSVWriter(), [unit], jobs=jobs, split_parts=3, split_min_bytes=0)
+
+        assert results[0].ok
+        with open(whole.destination_file, 'rb') as f1, open(unit.destination_file, 'rb') as f2:
+            assert f1.read() == f2.read()
+        assert not [f for f in os.listdir(temp_dir) if '_range' in f]
+
+    @pytest.mark.parametrize("batch_size", [150, 1000])
+    def test_split_parquet_matches_unsplit(self, large_posts_file, temp_dir, batch_size):
+        """Test that split Parquet output is batched again into the files of an unsplit conversion."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        columns = ['Id', 'Title']
+        unit = ConversionUnit(large_posts_file, 'Posts', columns, os.path.join(temp_dir, "split", "Posts.parquet"), "site")
+        whole = unit._replace(destination_file=os.path.join(temp_dir, "whole", "Posts.parquet"))
+        os.makedirs(os.path.dirname(unit.destination_file))
+        os.makedirs(os.path.dirname(whole.destination_file))
+
+        run_units(ParquetWriter(batch_size=batch_size), [whole])
+        run_units(ParquetWriter(batch_size=batch_size), [unit], jobs=2, split_parts=3, split_min_bytes=0)
+
+        def read_files(destination):
+            folder = os.path.dirname(destination)
+            return {
+                f: pq.read_table(os.path.join(folder, f)).column('Id').to_pylist() for f in sorted(os.listdir(folder))
+            }
+        assert read_files(unit.destination_file) == read_files(whole.destination_file)
+        expected = ['Posts.parquet'] if batch_size > 500 else [f'Posts_part{n:04d}.parquet' for n in range(1, 5)]
+        assert list(read_files(unit.destination_file)) == expected
+
+    def test_split_parquet_single_file_merges_row_groups(self, large_posts_file, temp_dir):
+        """Test that split ranges are merged into one file in single-file mode."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        destination = os.path.join(temp_dir, "Posts.parquet")
+        unit = ConversionUnit(large_posts_file, 'Posts', ['Id', 'Title'], destination, "site")
+
+        run_units(ParquetWriter(batch_size=100, single_file=True), [unit], jobs=2, split_parts=3, split_min_bytes=0)
+
+        assert sorted(f for f in os.listdir(temp_dir) if f.endswith('.parquet')) == ['Posts.parquet']
+        assert pq.read_table(destination).column('Id').to_pylist() == [str(i) for i in range(1, 501)]
@@ -0,0 +1,113 @@
+"""
+Tests for stackexchange_parser.progress module.
+"""
+
+import os
+import logging
+import pytest
+from unittest.mock import patch
+
+from stackexchange_parser import CSVWriter
+from stackexchange_parser import parallel
+from stackexchange_parser.parallel import ConversionUnit, run_units
+from stackexchange_parser.progress import RunProgress, TableProgress, format_bytes, progress_message
+
+
+def write_posts(temp_dir, name, rows):
+    source_file = os.path.join(temp_dir, name)
+    with open(source_file, 'w', encoding='utf-8') as f:
+        f.write('<posts>\n' + "".join(f'  <row Id="{i}" Title="Title {i}" />\n' for i in range(1, rows + 1)) + '</posts>\n')
+    return source_file
+
+
+class TestProgressMessage:
+    """Test describing progress."""
+
+    def test_with_total(self):
+        """Test percent, rate and ETA of a source with a known size."""
+        assert progress_message(25 * 10 ** 6, 100 * 10 ** 6, 5.0) == "25.0% of 100.0 MB at 5.0 MB/s, ETA 0:00:15"
+
+    def test_without_total(self):
+        """Test that streams only report bytes read and rate."""
+        assert progress_message(1500, None, 1.0) == "1.5 KB at 0.0 MB/s"
+
+    def test_nothing_read(self):
+        """Test that no ETA is guessed before anything was read."""
+        assert progress_message(0, 1000, 0.0) == "0.0% of 1.0 KB at 0.0 MB/s, ETA unknown"
+
+    def test_format_bytes(self):
+        """Test the units of sizes."""
+        assert [format_bytes(size) for size in (999, 97_600_000, 2.5e12)] == ["999 B", "97.6 MB", "2.5 TB"]
+
+
+class TestTableProgress:
+    """Test logging the progress of one table."""
+
+    def test_logs_on_interval_and_milestones(self, caplog):
+        """Test that progress is logged on row milestones, not on every batch."""
+        progress = TableProgress("Posts", "site", interval=3600, row_interval=100)
+
+        with caplog.at_level(logging.INFO):
+            for rows in (40, 80, 120, 160, 200):
+                progress(rows, rows * 10, 2000)
+
+        assert [message.split(",")[0] for message in caplog.messages] == [
+            "            Exported 120 rows for Posts in site", "            Exported 200 rows for Posts in site"
+        ]
+        assert "100.0% of 2.0 KB" in caplog.messages[-1]
+
+    def test_adds_to_run(self):
+        """Test that bytes parsed from files count towards the run, and those of streams do not."""
+        run = RunProgress(3000, interval=3600)
+        with patch("stackexchange_parser.progress._run_progress", run):
+            table = TableProgress("Posts", "site", interval=3600, row_interval=10 ** 6)
+            table(10, 1000, 2000)
+            table(20, 2000, 2000)
+            TableProgress("Users", "site", interval=3600, row_interval=10 ** 6)(10, 500, None)
+
+        assert run.parsed_bytes == 2000
+
+
+class TestRunProgress:
+    """Test the progress of a whole run."""
+
+    def test_run_units_reports(self, temp_dir, caplog):
+        """Test that the run reports the share of all input bytes parsed."""
+        units = [
+            ConversionUnit(write_posts(temp_dir, f"{table}.xml", 50), table, ['Id'], os.path.join(temp_dir, f"{table}.csv"), "site")
+            for table in ("Posts", "Comments")
+        ]
+
+        with caplog.at_level(logging.INFO):
+            run_units(CSVWriter(progress_interval=1e-9), units)
+
+        reports = [message for message in caplog.messages if message.startswith("Progress:")]
+        assert reports[-1].startswith("Progress:   100.0% of")
+
+    @pytest.mark.parametrize("jobs,split_parts", [(1, 1), (2, 1), (2, 3)])
+    def test_bytes_counted_in_workers(self, temp_dir, jobs, split_parts):
+        """Test that workers and byte ranges add up to the input size."""
+        sources = [write_posts(temp_dir, f"{table}.xml", 300) for table in ("Posts", "Comments")]
+        units = [
+            ConversionUnit(source, table, ['Id', 'Title'], os.path.join(temp_dir, f"{table}.csv"), "site")
+            for source, table in zip(sources, ("Posts", "Comments"))
+        ]
+        created = []
+
+        def run_progress(*args):
+            created.append(RunProgress(*args))
+            return created[-1]
+
+        with patch.object(parallel, "RunProgress", side_effect=run_progress):
+            run_units(CSVWriter(), units, jobs=jobs, split_parts=split_parts, split_min_bytes=0)
+
+        total = sum(os.path.getsize(source) for source in sources)
+        run, = created
+        assert run.total_bytes <= total
+        # Every byte range is read as a document of its own, with a root element around it
+        assert run.total_bytes <= run.parsed_bytes <= total + 16 * split_parts * len(units)
+
+    def test_invalid_interval(self):
+        """Test that the progress interval must be positive."""
+        with pytest.raises(ValueError, match="Progress interval"):
+            CSVWriter(progress_interval=0)
@@ -0,0 +1,79 @@
+"""
+Tests for stackexchange_parser.readers module.
+"""
+
+import os
+import pytest
+
+from stackexchange_parser import ArrowWriter, ValidationError, process_stackexchange_data, read_arrow, read_arrow_site
+
+pa = pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def arrow_site(stackexchange_site_structure, sample_config_file, temp_dir):
+    """The stackoverflow.com site converted to uncompressed Arrow files."""
+    output_dir = os.path.join(temp_dir, "output")
+    process_stackexchange_data(stackexchange_site_structure['input_dir'], output_dir, ArrowWriter(), False, sample_config_file)
+    return os.path.join(output_dir, "stackoverflow.com")
+
+
+class TestReadArrow:
+    """Test reading Arrow files memory-mapped."""
+
+    def test_zero_copy(self, arrow_site):
+        """Test that columns of uncompressed files are not copied into memory."""
+        allocated = pa.total_allocated_bytes()
+
+        table = read_arrow(os.path.join(arrow_site, "Posts.arrow"))
+
+        assert table.num_rows == 3
+        assert pa.total_allocated_bytes() == allocated
+
+    def test_columns(self, arrow_site):
+        """Test selecting columns."""
+        table = read_arrow(os.path.join(arrow_site, "Posts.arrow"), columns=["Title", "Id"])
+
+        assert table.column_names == ["Title", "Id"]
+        assert table.column("Title").to_pylist() == ["How to use Git?", None, "Python basics"]
+
+    def test_compressed(self, temp_dir, sample_xml_posts):
+        """Test that compressed files are read too."""
+        source = os.path.join(temp_dir, "Posts.xml")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write(sample_xml_posts)
+        destination = os.path.join(temp_dir, "Posts.arrow")
+        ArrowWriter(compression="lz4").write_from_xml(source, "Posts", ['Id', 'Title'], destination, "site")
+
+        assert read_arrow(destination).num_rows == 3
+
+    def test_errors(self, arrow_site, temp_dir):
+        """Test that missing files, unknown columns and other files are reported."""
+        with pytest.raises(ValidationError):
+            read_arrow(os.path.join(arrow_site, "Tags.arrow"))
+        with pytest.raises(ValidationError):
+            read_arrow(os.path.join(arrow_site, "Posts.arrow"), columns=["Nope"])
+        not_arrow = os.path.join(temp_dir, "Posts.xml.arrow")
+        with open(not_arrow, 'wb') as f:
+            f.write(b"<posts />")
+        with pytest.raises(ValidationError):
+            read_arrow(not_arrow)
+
+
+class TestReadArrowSite:
+    """Test reading the tables of a site folder."""
+
+    def test_all_tables(self, arrow_site):
+        """Test that every table of the site is read by name."""
+        tables = read_arrow_site(arrow_site)
+
+        assert sorted(tables) == ["Comments", "Posts", "Users"]
+        assert tables["Users"].num_rows > 0
+
+    def test_selected_tables(self, arrow_site):
+        """Test reading some tables and reporting missing ones."""
+        assert list(read_arrow_site(arrow_site, ["Posts"])) == ["Posts"]
+        with pytest.raises(ValidationError, match="Badges"):
+            read_arrow_site(arrow_site, ["Posts", "Badges"])
+        with pytest.raises(ValidationError):
+            read_arrow_site(os.path.join(arrow_site, "missing"))
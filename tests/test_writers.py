@@ -2,13 +2,20 @@
 Tests for stackexchange_parser.writers module.
 """
 
+import io
 import os
 import csv
 import tempfile
 import pytest
 from unittest.mock import patch, MagicMock
 
-from stackexchange_parser.writers import BaseWriter, CSVWriter, ParquetWriter
+from stackexchange_parser.writers import (
+    BaseWriter, CSVWriter, ParquetWriter, SQLiteWriter, PGCopyWriter, postgres_table_definition, encode_pgcopy_rows,
+    PGCOPY_HEADER
+)
+from stackexchange_parser.core import ValidationError, ConfigurationError, PARSER_ENGINES
+from stackexchange_parser.checkpoint import temp_filename
+from stackexchange_parser import process_stackexchange_data
 
 
 class TestBaseWriter:
@@ -162,12 +169,10 @@ class TestParquetWriter:
         assert writer.batch_size == 500000
         assert writer.progress_indicator_value == 100000
     
-    @patch('stackexchange_parser.writers.pd')
-    def test_parquet_dependencies_missing(self, mock_pd):
-        """Test error handling when pandas/pyarrow dependencies are missing."""
-        mock_pd.side_effect = ImportError("No module named 'pandas'")
-        
-        with pytest.raises(ImportError, match="pandas and pyarrow are required"):
+    @patch('stackexchange_parser.writers.PYARROW_AVAILABLE', False)
+    def test_parquet_dependencies_missing(self):
+        """Test error handling when the pyarrow dependency is missing."""
+        with pytest.raises(ImportError, match="pyarrow is required"):
             ParquetWriter()
     
     @pytest.mark.skipif(
@@ -204,28 +209,79 @@ class TestParquetWriter:
         writer = ParquetWriter()
         assert writer.batch_size == 1000000
     
-    @patch('stackexchange_parser.writers.pd')
-    @patch('stackexchange_parser.writers.etree')
-    def test_parquet_writer_large_file_batching(self, mock_etree, mock_pd):
+    @patch('stackexchange_parser.writers.pq')
+    @patch('stackexchange_parser.writers.parse_xml_batches')
+    def test_parquet_writer_large_file_batching(self, mock_parse, mock_pq, temp_dir):
         """Test that large files are processed in batches."""
-        # Mock pandas to avoid actual dependency
-        mock_df = MagicMock()
-        mock_pd.DataFrame.return_value = mock_df
+        mock_parse.return_value = iter([[["1"] * n, ["Test"] * n] for n in [300] * 8 + [100]])
         
-        # Mock XML parsing to return multiple rows
-        mock_element = MagicMock()
-        mock_element.get.side_effect = lambda key, default="": {"Id": "1", "Title": "Test"}[key]
-        mock_etree.iterparse.return_value = [("start", mock_element)] * 2500000  # Large number
+        writer = ParquetWriter(batch_size=1000)
+        writer.ARROW_CHUNK_ROWS = 300
+        destination_file = os.path.join(temp_dir, "output.parquet")
+        writer.write_from_xml("test.xml", "Posts", ["Id", "Title"], destination_file, "site")
+        
+        # Two full batches and a final partial one
+        assert mock_pq.write_table.call_count == 3
+        written = [call.args[0].num_rows for call in mock_pq.write_table.call_args_list]
+        assert written == [1000, 1000, 500]
+        assert mock_pq.write_table.call_args_list[-1].args[1].name.endswith("output_part0003.parquet.partial")
+        assert os.path.exists(os.path.join(temp_dir, "output_part0003.parquet"))
+    
+    def test_parquet_writer_arrow_types(self, temp_dir):
+        """Test that the Arrow path keeps strings, nulls and boolean columns intact."""
+        import pyarrow.parquet as pq
         
-        writer = ParquetWriter(batch_size=1000000)
+        source_file = os.path.join(temp_dir, "Badges.xml")
+        with open(source_file, 'w') as f:
+            f.write('''<?xml version="1.0" encoding="utf-8"?>
+<badges>
+  <row Id="1" Name="Teacher" TagBased="False" />
+  <row Id="2" Name="Student" UserId="7" TagBased="True" />
+</badges>''')
+        
+        destination_file = os.path.join(temp_dir, "Badges.parquet")
+        ParquetWriter().write_from_xml(source_file, "Badges", ["Id", "UserId", "Name", "TagBased"], destination_file, "site")
+        
+        table = pq.read_table(destination_file)
+        assert table.column("Id").to_pylist() == ["1", "2"]
+        assert table.column("UserId").to_pylist() == [None, "7"]
+        assert table.column("TagBased").to_pylist() == [0, 1]
+    
+    def test_parquet_writer_matches_row_transforms(self, temp_dir):
+        """Test that the Arrow column transforms give the values parse_xml_rows gives."""
+        import pyarrow.parquet as pq
+        from stackexchange_parser.core import parse_xml_rows
         
-        # Mock file operations
-        with patch('builtins.open', mock_open()):
-            with patch('os.path.exists', return_value=True):
-                writer.write_from_xml("test.xml", "Posts", ["Id", "Title"], "output.parquet", "site")
+        source_file = os.path.join(temp_dir, "Posts.xml")
+        with open(source_file, 'w') as f:
+            f.write('''<?xml version="1.0" encoding="utf-8"?>
+<posts>
+  <row Id="1" Body="a&#xA;b&#xD;&#xA;c&#xD;d" Closed="True" Note="True" />
+  <row Id="2" Body="plain" Closed="False" Note="maybe" />
+  <row Id="3" />
+</posts>''')
+        columns = ["Id", "Body", "Closed", "Note"]
+        destination_file = os.path.join(temp_dir, "Posts.parquet")
+        ParquetWriter().write_from_xml(
+            source_file, "Posts", columns, destination_file, "site",
+            column_types={"Id": "int", "Closed": "bit", "Note": "nvarchar(50)"}
+        )
         
-        # Should have called to_parquet multiple times for batching
-        assert mock_df.to_parquet.call_count >= 2
+        table = pq.read_table(destination_file)
+        rows = list(parse_xml_rows(source_file, columns))
+        assert table.column("Body").to_pylist() == [row[1] for row in rows]
+        assert table.column("Id").to_pylist() == [1, 2, 3]
+        assert table.column("Closed").to_pylist() == [True, False, None]
+        assert table.column("Note").to_pylist() == ["1", "maybe", None]
+    
+    def test_parquet_writer_rejects_mixed_untyped_booleans(self, temp_dir):
+        """Test that an untyped column mixing booleans and strings is an error."""
+        source_file = os.path.join(temp_dir, "Posts.xml")
+        with open(source_file, 'w') as f:
+            f.write('<posts><row Note="True" /><row Note="maybe" /></posts>')
+        
+        with pytest.raises(ValidationError, match="Cannot convert column Note"):
+            ParquetWriter().write_from_xml(source_file, "Posts", ["Note"], os.path.join(temp_dir, "Posts.parquet"), "site")
 
 
 class TestWriterIntegration:
@@ -277,4 +333,328 @@ class TestWriterIntegration:
         
         # Check that appropriate log messages were generated
         assert any("Posts" in record.message for record in caplog.records)
-        assert any("test_site" in record.message for record in caplog.records)
\ No newline at end of file
+        assert any("test_site" in record.message for record in caplog.records)
+
+class TestStreamDestinations:
+    """Test writing to and reading from open binary streams."""
+    
+    def test_csv_stream_round_trip(self, sample_xml_posts):
+        """Test that CSV can be written to a stream without closing it."""
+        source = io.BytesIO(sample_xml_posts.encode('utf-8'))
+        destination = io.BytesIO()
+        
+        CSVWriter().write_from_xml(source, 'Posts', ['Id', 'Title'], destination, 'stdin')
+        
+        assert not destination.closed
+        assert destination.getvalue().decode('utf-8').splitlines() == [
+            'Id,Title', '1,How to use Git?', '2,', '3,Python basics'
+        ]
+    
+    def test_parquet_stream_ignores_rollover(self, sample_xml_posts):
+        """Test that a Parquet stream is always one file of row groups."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        source = io.BytesIO(sample_xml_posts.encode('utf-8'))
+        destination = io.BytesIO()
+        
+        ParquetWriter(batch_size=1, max_file_bytes=1).write_from_xml(
+            source, 'Posts', ['Id', 'Title'], destination, 'stdin'
+        )
+        
+        parquet_file = pq.ParquetFile(io.BytesIO(destination.getvalue()))
+        assert parquet_file.num_row_groups == 3
+
+
+class TestParserEngineOption:
+    """Test selecting the XML parsing engine on writers."""
+    
+    @pytest.mark.parametrize("engine", ["expat", "scanner"])
+    def test_csv_output_identical(self, stackexchange_site_structure, temp_dir, engine):
+        """Test that every engine writes byte-identical CSV files."""
+        source_file = os.path.join(stackexchange_site_structure['main_site'], "Posts.xml")
+        columns = ['Id', 'PostTypeId', 'CreationDate', 'Score', 'Title', 'Body', 'Tags']
+        expected_file = os.path.join(temp_dir, "lxml.csv")
+        engine_file = os.path.join(temp_dir, f"{engine}.csv")
+        
+        CSVWriter().write_from_xml(source_file, "Posts", columns, expected_file, "site")
+        CSVWriter(engine=engine).write_from_xml(source_file, "Posts", columns, engine_file, "site")
+        
+        with open(expected_file, 'rb') as f1, open(engine_file, 'rb') as f2:
+            assert f1.read() == f2.read()
+    
+    @pytest.mark.parametrize("engine", list(PARSER_ENGINES))
+    def test_pgcopy_raw_values(self, temp_dir, engine):
+        """Test that every engine writes the same raw strings to PGCOPY, which does not escape line breaks."""
+        source_file = os.path.join(temp_dir, "Posts.xml")
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write('<posts>\n'
+                    '  <row Id="1" Body="b &amp; 1&#xA;line&#xD;&#xA;end" />\n'
+                    '  <row Id="2" Body="typed &amp;#xA; and\n  wrapped" />\n'
+                    '</posts>\n')
+        destination = os.path.join(temp_dir, f"{engine}.pgcopy")
+        
+        PGCopyWriter(engine=engine).write_from_xml(source_file, "Posts", ['Id', 'Body'], destination, "site")
+        
+        with open(destination, 'rb') as f:
+            _, rows = read_pgcopy(f.read())
+        assert rows == [[b"1", b"b & 1\nline\r\nend"], [b"2", b"typed &#xA; and   wrapped"]]
+    
+    def test_unknown_engine(self):
+        """Test that writers reject unknown engines."""
+        with pytest.raises(ConfigurationError):
+            CSVWriter(engine="sax")
+
+
+class TestSQLiteWriter:
+    """Test loading tables into SQLite databases."""
+    
+    @pytest.fixture
+    def dump(self, site_dump):
+        """Two sites with Posts and Comments tables, and a config of both."""
+        return site_dump([("a.com", 30), ("b.com", 5)])
+    
+    @staticmethod
+    def query(filename, sql, *parameters):
+        import sqlite3
+        connection = sqlite3.connect(filename)
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+    
+    def test_site_database(self, dump):
+        """Test that every site gets one database holding all of its tables with their indexes."""
+        input_dir, output_dir, config_file = dump
+        
+        process_stackexchange_data(input_dir, output_dir, SQLiteWriter(), False, config_file)
+        
+        database = os.path.join(output_dir, "a.com", "a.com.sqlite")
+        assert os.listdir(os.path.join(output_dir, "a.com")) == ["a.com.sqlite"]
+        assert self.query(database, "SELECT count(*) FROM Posts") == [(30,)]
+        assert self.query(database, "SELECT count(*) FROM Comments") == [(30,)]
+        assert self.query(database, "SELECT Id, OwnerUserId, Body FROM Posts WHERE Id = 2") == [(2, 2, 'a.com, "2"&#xA;')]
+        indexes = self.query(database, "SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL ORDER BY name")
+        assert indexes == [("Comments_PostId",), ("Posts_OwnerUserId",)]
+        assert "PRIMARY KEY" in self.query(database, "SELECT sql FROM sqlite_master WHERE name = 'Posts'")[0][0]
+    
+    def test_typed_columns(self, temp_dir, sample_xml_posts):
+        """Test that typed columns get SQLite types and values are stored as such."""
+        source = os.path.join(temp_dir, "Posts.xml")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write(sample_xml_posts)
+        destination = os.path.join(temp_dir, "Posts.sqlite")
+        
+        stats = SQLiteWriter(transaction_rows=1).write_from_xml(
+            source, "Posts", ['Id', 'Score', 'Title'], destination, "site", column_types={'Id': 'int', 'Score': 'int'}
+        )
+        
+        assert stats.rows == 3
+        assert [column[2] for column in self.query(destination, "PRAGMA table_info(Posts)")] == ["INTEGER", "INTEGER", "TEXT"]
+        assert self.query(destination, "SELECT typeof(Score), Title FROM Posts WHERE Id = 2") == [("integer", None)]
+        assert not os.path.exists(destination + ".tmp")
+    
+    def test_split_ranges_merged(self, temp_dir):
+        """Test that byte ranges are loaded separately and merged in order."""
+        from stackexchange_parser.parallel import ConversionUnit, run_units
+        source = os.path.join(temp_dir, "Posts.xml")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write('<posts>\n' + "".join(f'  <row Id="{i}" ParentId="{i // 2}" />\n' for i in range(1, 301)) + '</posts>\n')
+        destination = os.path.join(temp_dir, "Posts.sqlite")
+        unit = ConversionUnit(source, 'Posts', ['Id', 'ParentId'], destination, "site")
+        
+        result, = run_units(SQLiteWriter(), [unit], jobs=2, split_parts=3, split_min_bytes=0)
+        
+        assert result.rows == 300
+        assert sorted(os.listdir(temp_dir)) == ["Posts.sqlite", "Posts.xml"]
+        assert [row[0] for row in self.query(destination, "SELECT Id FROM Posts")] == [str(i) for i in range(1, 301)]
+        assert self.query(destination, "SELECT name FROM sqlite_master WHERE type = 'index'") == [("Posts_ParentId",)]
+    
+    def test_resume_skips_combined_tables(self, dump):
+        """Test that resuming finds tables already moved into the site database."""
+        input_dir, output_dir, config_file = dump
+        process_stackexchange_data(input_dir, output_dir, SQLiteWriter(), False, config_file)
+        
+        with patch.object(SQLiteWriter, "write_from_xml") as write_from_xml:
+            process_stackexchange_data(input_dir, output_dir, SQLiteWriter(), False, config_file, resume=True)
+        
+        write_from_xml.assert_not_called()
+    
+    def test_later_run_replaces_table(self, dump):
+        """Test that converting a site again replaces its tables in the site database."""
+        input_dir, output_dir, config_file = dump
+        process_stackexchange_data(input_dir, output_dir, SQLiteWriter(), False, config_file)
+        os.remove(os.path.join(input_dir, "b.com", "Posts.xml"))
+        os.remove(os.path.join(input_dir, "b.com", "Comments.xml"))
+        os.rmdir(os.path.join(input_dir, "b.com"))
+        dump.add_site("b.com", 8)
+        
+        process_stackexchange_data(input_dir, output_dir, SQLiteWriter(), False, config_file, refresh=True)
+        
+        database = os.path.join(output_dir, "b.com", "b.com.sqlite")
+        assert self.query(database, "SELECT count(*) FROM Posts") == [(8,)]
+        assert self.query(database, "SELECT count(*) FROM Comments") == [(8,)]
+        assert len(self.query(database, "SELECT name FROM sqlite_master WHERE type = 'index'")) == 2
+    
+    def test_unified(self, dump):
+        """Test that unified output holds every site in one database, and a later run replaces sites."""
+        input_dir, output_dir, config_file = dump
+        writer = SQLiteWriter(unified=True)
+        process_stackexchange_data(input_dir, output_dir, writer, False, config_file)
+        dump.add_site("c.com", 7)
+        
+        process_stackexchange_data(input_dir, output_dir, writer, False, config_file)
+        
+        database = os.path.join(output_dir, "stackexchange.sqlite")
+        assert self.query(database, "SELECT site, count(*) FROM Posts GROUP BY site ORDER BY site") == [
+            ("a.com", 30), ("b.com", 5), ("c.com", 7)
+        ]
+        assert self.query(database, "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'Posts' ORDER BY name") == [
+            ("Posts_OwnerUserId",), ("Posts_site_Id",)
+        ]
+        assert os.listdir(os.path.join(output_dir, "a.com")) == []
+    
+    def test_invalid_options(self, temp_dir):
+        """Test that bad page sizes and stream destinations are rejected."""
+        with pytest.raises(ValueError, match="Page size"):
+            SQLiteWriter(page_size=1000)
+        with pytest.raises(ValueError):
+            SQLiteWriter(transaction_rows=0)
+        with pytest.raises(ValidationError, match="stream"):
+            SQLiteWriter().write_from_xml(io.BytesIO(b"<posts />"), "Posts", ["Id"], io.BytesIO(), "stdin")
+
+
+def read_pgcopy(data):
+    """Decode binary COPY data into its header flags and rows of raw field bytes, checking the framing."""
+    import struct
+    assert data[:11] == b"PGCOPY\n\xff\r\n\x00"
+    flags, extension = struct.unpack(">ii", data[11:19])
+    offset = 19 + extension
+    rows = []
+    while True:
+        field_count, = struct.unpack(">h", data[offset:offset + 2])
+        offset += 2
+        if field_count == -1:
+            assert offset == len(data)
+            return flags, rows
+        row = []
+        for _ in range(field_count):
+            length, = struct.unpack(">i", data[offset:offset + 4])
+            offset += 4
+            if length == -1:
+                row.append(None)
+            else:
+                row.append(data[offset:offset + length])
+                offset += length
+        rows.append(row)
+
+
+class TestPGCopyWriter:
+    """Test writing the PostgreSQL binary COPY format."""
+    
+    def test_typed_fields(self, temp_dir):
+        """Test that every type is encoded as PostgreSQL's binary send format."""
+        import struct
+        source = os.path.join(temp_dir, "Badges.xml")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write('<badges>\n'
+                    '  <row Id="1" UserId="-7" Class="3" Date="2000-01-01T00:00:01.5" TagBased="True" Score="1.25" Name="café&#xA;x" />\n'
+                    '  <row Id="9000000000" Date="1999-12-31T23:59:59.000" TagBased="False" />\n'
+                    '</badges>\n')
+        destination = os.path.join(temp_dir, "Badges.pgcopy")
+        columns = ['Id', 'UserId', 'Class', 'Date', 'TagBased', 'Score', 'Name']
+        column_types = {
+            'Id': 'bigint', 'UserId': 'int', 'Class': 'tinyint', 'Date': 'datetime', 'TagBased': 'bit', 'Score': 'float'
+        }
+        
+        stats = PGCopyWriter().write_from_xml(source, "Badges", columns, destination, "site", column_types=column_types)
+        
+        with open(destination, 'rb') as f:
+            flags, rows = read_pgcopy(f.read())
+        assert stats.rows == 2
+        assert flags == 0
+        assert rows[0] == [
+            struct.pack(">q", 1), struct.pack(">i", -7), struct.pack(">h", 3), struct.pack(">q", 1500000),
+            b"\x01", struct.pack(">d", 1.25), "café\nx".encode("utf-8")
+        ]
+        assert rows[1] == [struct.pack(">q", 9000000000), None, None, struct.pack(">q", -1000000), b"\x00", None, None]
+    
+    def test_table_definition(self):
+        """Test the PostgreSQL table matching the written fields."""
+        assert postgres_table_definition("Badges", ["Id", "TagBased", "Name"], {"Id": "int", "TagBased": "bit"}) == \
+            'CREATE TABLE "Badges" ("Id" integer, "TagBased" boolean, "Name" text)'
+    
+    def test_invalid_value(self, temp_dir):
+        """Test that values that do not fit their type name the column."""
+        source = os.path.join(temp_dir, "Posts.xml")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write('<posts>\n  <row Id="1" Score="70000" />\n</posts>\n')
+        
+        with pytest.raises(ValidationError, match="Score"):
+            PGCopyWriter().write_from_xml(
+                source, "Posts", ['Id', 'Score'], os.path.join(temp_dir, "Posts.pgcopy"), "site", column_types={'Score': 'smallint'}
+            )
+        assert not os.path.exists(os.path.join(temp_dir, "Posts.pgcopy"))
+    
+    def test_stream(self, sample_xml_posts):
+        """Test that a stream receives a complete file and stays open."""
+        destination = io.BytesIO()
+        
+        PGCopyWriter().write_from_xml(io.BytesIO(sample_xml_posts.encode('utf-8')), 'Posts', ['Id', 'Title'], destination, 'stdin')
+        
+        assert not destination.closed
+        _, rows = read_pgcopy(destination.getvalue())
+        assert rows == [[b"1", b"How to use Git?"], [b"2", None], [b"3", b"Python basics"]]
+    
+    def test_split_ranges_merged(self, temp_dir):
+        """Test that byte ranges are merged into one file with one header and trailer."""
+        import struct
+        from stackexchange_parser.parallel import ConversionUnit, run_units
+        source = os.path.join(temp_dir, "Posts.xml")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write('<posts>\n' + "".join(f'  <row Id="{i}" />\n' for i in range(1, 301)) + '</posts>\n')
+        destination = os.path.join(temp_dir, "Posts.pgcopy")
+        unit = ConversionUnit(source, 'Posts', ['Id'], destination, "site", column_types={'Id': 'int'})
+        
+        result, = run_units(PGCopyWriter(), [unit], jobs=2, split_parts=3, split_min_bytes=0)
+        
+        assert result.rows == 300
+        assert sorted(os.listdir(temp_dir)) == ["Posts.pgcopy", "Posts.xml"]
+        with open(destination, 'rb') as f:
+            _, rows = read_pgcopy(f.read())
+        assert [struct.unpack(">i", row[0])[0] for row in rows] == list(range(1, 301))
+    
+    def test_resume_from_checkpoint(self, temp_dir):
+        """Test that an interrupted file continues after its last checkpoint without a second header."""
+        source = os.path.join(temp_dir, "Posts.xml")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write('<posts>\n' + "".join(f'  <row Id="{i}" />\n' for i in range(1, 101)) + '</posts>\n')
+        destination = os.path.join(temp_dir, "Posts.pgcopy")
+        writer = PGCopyWriter(checkpoint_rows=30)
+        
+        writer.PARSE_BATCH_ROWS = 10
+        encoded = []
+        
+        def interrupt_after_40_rows(batch, columns, encoders):
+            if len(encoded) == 4:
+                raise KeyboardInterrupt()
+            encoded.append(encode_pgcopy_rows(batch, columns, encoders))
+            return encoded[-1]
+        
+        with patch("stackexchange_parser.writers.encode_pgcopy_rows", side_effect=interrupt_after_40_rows):
+            with pytest.raises(KeyboardInterrupt):
+                writer.write_from_xml(source, "Posts", ['Id'], destination, "site")
+        assert os.path.exists(temp_filename(destination))
+        
+        stats = PGCopyWriter(checkpoint_rows=30).write_from_xml(source, "Posts", ['Id'], destination, "site", resume=True)
+        
+        assert stats.rows == 70
+        with open(destination, 'rb') as f:
+            data = f.read()
+        assert data.count(PGCOPY_HEADER) == 1
+        assert [int(row[0]) for row in read_pgcopy(data)[1]] == list(range(1, 101))
+    
+    def test_invalid_options(self):
+        """Test that empty buffers and checkpoint intervals are rejected."""
+        with pytest.raises(ValueError):
+            PGCopyWriter(buffer_size=0)
+        with pytest.raises(ValueError):
+            PGCopyWriter(checkpoint_rows=0)
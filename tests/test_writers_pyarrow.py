@@ -0,0 +1,553 @@
+"""
+Tests for the pyarrow-based output of stackexchange_parser.writers: Parquet,
+Arrow IPC and the arrow CSV encoder.
+"""
+
+import io
+import os
+import shutil
+import pytest
+from unittest.mock import patch
+
+from stackexchange_parser.writers import CSVWriter, ParquetWriter, ArrowWriter, parquet_write_options
+from stackexchange_parser.core import ValidationError, ConfigurationError, ParquetOptions
+from stackexchange_parser.checkpoint import temp_filename
+from stackexchange_parser import process_stackexchange_data
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+ds = pytest.importorskip("pyarrow.dataset")
+
+
+class TestParquetSingleFile:
+    """Test single-file Parquet output with streamed row groups."""
+    
+    @pytest.fixture
+    def posts_file(self, posts_xml_file):
+        return posts_xml_file(1000, lambda i: f' Title="Question {i}" Body="{"x" * 200}"')
+    
+    def test_single_file_row_groups(self, temp_dir, posts_file):
+        """Test that batches are streamed into one file as row groups."""
+        
+        writer = ParquetWriter(batch_size=300, single_file=True, row_group_size=100)
+        destination_file = os.path.join(temp_dir, "Posts.parquet")
+        writer.write_from_xml(posts_file, "Posts", ["Id", "Title"], destination_file, "site")
+        
+        assert [f for f in os.listdir(temp_dir) if f.endswith('.parquet')] == ["Posts.parquet"]
+        parquet_file = pq.ParquetFile(destination_file)
+        assert parquet_file.num_row_groups == 10
+        assert parquet_file.read().column("Id").to_pylist() == [str(i) for i in range(1, 1001)]
+    
+    def test_single_file_rollover(self, temp_dir, posts_file):
+        """Test that a new part file is started once the size target is exceeded."""
+        
+        writer = ParquetWriter(batch_size=200, single_file=True, max_file_bytes=1)
+        destination_file = os.path.join(temp_dir, "Posts.parquet")
+        writer.write_from_xml(posts_file, "Posts", ["Id", "Body"], destination_file, "site")
+        
+        files = writer.output_files(destination_file)
+        assert [os.path.basename(f) for f in files] == [f"Posts_part{n:04d}.parquet" for n in range(1, 6)]
+        ids = [i for f in files for i in pq.read_table(f).column("Id").to_pylist()]
+        assert ids == [str(i) for i in range(1, 1001)]
+    
+    def test_part_names_in_parquet_folder(self, temp_dir, posts_file):
+        """Test that part names only change the file name, not a folder named like a Parquet file."""
+        output_dir = os.path.join(temp_dir, "x.parquet_out")
+        os.makedirs(output_dir)
+        destination_file = os.path.join(output_dir, "Posts.parquet")
+        
+        for writer in (ParquetWriter(batch_size=400), ParquetWriter(batch_size=200, single_file=True, max_file_bytes=1)):
+            writer.write_from_xml(posts_file, "Posts", ["Id", "Body"], destination_file, "site")
+            files = writer.output_files(destination_file)
+            assert files and all(os.path.dirname(f) == output_dir for f in files)
+            assert sorted(os.listdir(output_dir)) == [os.path.basename(f) for f in files]
+            ids = [i for f in files for i in pq.read_table(f).column("Id").to_pylist()]
+            assert ids == [str(i) for i in range(1, 1001)]
+            for filename in files:
+                os.remove(filename)
+    
+    def test_single_file_invalid_sizes(self):
+        """Test validation of row group and file size options."""
+        with pytest.raises(ValueError):
+            ParquetWriter(single_file=True, row_group_size=0)
+        with pytest.raises(ValueError):
+            ParquetWriter(single_file=True, max_file_bytes=0)
+
+
+class TestParquetBatchBytes:
+    """Test bounding Parquet batches by their size in bytes."""
+    
+    @pytest.fixture
+    def posts_file(self, posts_xml_file):
+        return posts_xml_file(1000, lambda i: f' Body="{"x" * (1000 if i <= 100 else 10)}"')
+    
+    def read_batches(self, writer, destination_file):
+        return [pq.read_table(f).column("Id").to_pylist() for f in writer.output_files(destination_file)]
+    
+    def test_wide_rows_flush_early(self, temp_dir, posts_file):
+        """Test that batches of wide rows are written once they reach the byte target."""
+        writer = ParquetWriter(batch_size=500, batch_bytes=25000)
+        destination_file = os.path.join(temp_dir, "Posts.parquet")
+        
+        with patch.object(ParquetWriter, "ARROW_CHUNK_ROWS", 50):
+            writer.write_from_xml(posts_file, "Posts", ["Id", "Body"], destination_file, "site")
+        
+        batches = self.read_batches(writer, destination_file)
+        # The first 100 rows hold about 1 KB each, the rest are bounded by the row count
+        assert [len(batch) for batch in batches[:4]] == [25, 25, 25, 25]
+        assert max(len(batch) for batch in batches) == 500
+        assert [i for batch in batches for i in batch] == [str(i) for i in range(1, 1001)]
+    
+    def test_row_count_bound(self, temp_dir, posts_file):
+        """Test that batch_size still bounds batches below the byte target."""
+        writer = ParquetWriter(batch_size=300, batch_bytes=10 ** 9)
+        destination_file = os.path.join(temp_dir, "Posts.parquet")
+        
+        writer.write_from_xml(posts_file, "Posts", ["Id", "Body"], destination_file, "site")
+        
+        assert [len(batch) for batch in self.read_batches(writer, destination_file)] == [300, 300, 300, 100]
+        assert writer.output_settings()["batch_bytes"] == 10 ** 9
+    
+    def test_invalid_batch_bytes(self):
+        """Test that the byte target must be positive."""
+        with pytest.raises(ValueError):
+            ParquetWriter(batch_bytes=0)
+
+
+class TestParquetTypedColumns:
+    """Test typed Parquet columns derived from SQL Server column types."""
+    
+    def test_typed_columns(self, temp_dir):
+        """Test that typed columns are written with their Arrow types."""
+        
+        source_file = os.path.join(temp_dir, "Badges.xml")
+        with open(source_file, 'w') as f:
+            f.write('''<?xml version="1.0" encoding="utf-8"?>
+<badges>
+  <row Id="1" UserId="5" Name="Teacher" Date="2008-07-31T21:42:52.667" Class="3" TagBased="False" />
+  <row Id="2" Name="Student" Date="2008-08-01T00:00:00.000" Class="2" TagBased="True" />
+</badges>''')
+        
+        columns = ["Id", "UserId", "Name", "Date", "Class", "TagBased"]
+        column_types = {"Id": "int", "UserId": "int", "Name": "nvarchar(100)", "Date": "datetime", "Class": "tinyint", "TagBased": "bit"}
+        destination_file = os.path.join(temp_dir, "Badges.parquet")
+        ParquetWriter().write_from_xml(source_file, "Badges", columns, destination_file, "site", column_types=column_types)
+        
+        table = pq.read_table(destination_file)
+        assert table.schema.field("Id").type == pa.int32()
+        assert table.schema.field("Name").type == pa.string()
+        assert table.schema.field("Date").type == pa.timestamp("ms")
+        assert table.schema.field("Class").type == pa.int8()
+        assert table.schema.field("TagBased").type == pa.bool_()
+        assert table.column("UserId").to_pylist() == [5, None]
+        assert table.column("TagBased").to_pylist() == [False, True]
+    
+    def test_typed_column_invalid_value(self, temp_dir):
+        """Test that values that do not match the column type are reported."""
+        source_file = os.path.join(temp_dir, "Posts.xml")
+        with open(source_file, 'w') as f:
+            f.write('<?xml version="1.0"?><posts><row Id="abc" /></posts>')
+        
+        destination_file = os.path.join(temp_dir, "Posts.parquet")
+        with pytest.raises(ValidationError, match="Id"):
+            ParquetWriter().write_from_xml(source_file, "Posts", ["Id"], destination_file, "site", column_types={"Id": "int"})
+
+
+class TestParquetTableOptions:
+    """Test per-table and per-column Parquet options."""
+    
+    OPTIONS = {"Posts": ParquetOptions(
+        {"compression": "zstd", "row_group_size": 100},
+        {"Body": {"dictionary": False, "compression": "gzip", "statistics": False}}
+    )}
+    
+    @pytest.fixture
+    def posts_file(self, posts_xml_file):
+        return posts_xml_file(300, lambda i: f' Body="Body {i % 3}"')
+    
+    def test_write_options(self):
+        """Test mapping options to pyarrow.parquet keyword arguments."""
+        kwargs = parquet_write_options(self.OPTIONS["Posts"], ["Id", "Body"])
+        
+        assert kwargs["compression"] == {"Id": "zstd", "Body": "gzip"}
+        assert kwargs["use_dictionary"] == ["Id"]
+        assert kwargs["write_statistics"] == ["Id"]
+    
+    @pytest.mark.parametrize("single_file", [False, True])
+    def test_column_metadata(self, temp_dir, posts_file, single_file):
+        """Test that the written column chunks use the configured codecs, encodings and row groups."""
+        
+        writer = ParquetWriter(single_file=single_file, table_options=self.OPTIONS)
+        destination_file = os.path.join(temp_dir, "Posts.parquet")
+        writer.write_from_xml(posts_file, "Posts", ["Id", "Body"], destination_file, "site")
+        
+        metadata = pq.ParquetFile(destination_file).metadata
+        assert metadata.num_row_groups == 3
+        row_group = metadata.row_group(0)
+        assert row_group.column(0).compression == "ZSTD"
+        assert row_group.column(1).compression == "GZIP"
+        assert "RLE_DICTIONARY" in row_group.column(0).encodings
+        assert "RLE_DICTIONARY" not in row_group.column(1).encodings
+        assert row_group.column(0).is_stats_set and not row_group.column(1).is_stats_set
+        assert pq.read_table(destination_file).column("Id").to_pylist() == [str(i) for i in range(1, 301)]
+    
+    def test_output_settings(self):
+        """Test that table options are part of the settings of their table only."""
+        writer = ParquetWriter(table_options=self.OPTIONS)
+        
+        assert writer.output_settings("Posts")["table_options"] == {
+            "table": {"compression": "zstd", "row_group_size": 100},
+            "columns": {"Body": {"dictionary": False, "compression": "gzip", "statistics": False}}
+        }
+        assert "table_options" not in writer.output_settings("Votes")
+
+
+class TestParquetPartitioned:
+    """Test Hive-style partitioned Parquet output."""
+    
+    COLUMNS = ["Id", "CreationDate", "Body"]
+    
+    @pytest.fixture
+    def posts_file(self, posts_xml_file):
+        """Posts alternating between months of 2008 and 2009, and one without a date."""
+        return posts_xml_file(41, lambda i: (
+            f' CreationDate="{2008 + i % 2}-0{1 + i % 4}-15T10:00:00.000" Body="b{i}"' if i <= 40 else ' Body="no date"'
+        ))
+    
+    def read_dataset(self, directory, **kwargs):
+        return ds.dataset(directory, format="parquet", partitioning="hive").to_table(**kwargs)
+    
+    def test_partition_folders(self, temp_dir, posts_file):
+        """Test that rows are written to year and month folders, and rows without a date to the default partition."""
+        destination = os.path.join(temp_dir, "Posts", "site=site.com")
+        writer = ParquetWriter(partition_by="month")
+        
+        writer.write_from_xml(posts_file, "Posts", self.COLUMNS, destination, "site.com")
+        
+        folders = sorted(os.path.relpath(os.path.dirname(f), destination) for f in writer.output_files(destination))
+        assert folders == [
+            os.path.join("year=2008", "month=01"), os.path.join("year=2008", "month=03"),
+            os.path.join("year=2009", "month=02"), os.path.join("year=2009", "month=04"),
+            os.path.join("year=__HIVE_DEFAULT_PARTITION__", "month=__HIVE_DEFAULT_PARTITION__")
+        ]
+        table = self.read_dataset(os.path.join(temp_dir, "Posts"))
+        assert sorted(table.column("Id").to_pylist(), key=int) == [str(i) for i in range(1, 42)]
+        assert set(table.column("site").to_pylist()) == {"site.com"}
+    
+    def test_partition_pruning(self, temp_dir, posts_file):
+        """Test that a filter on the year only reads the matching folders."""
+        destination = os.path.join(temp_dir, "Posts", "site=site.com")
+        ParquetWriter(partition_by="year").write_from_xml(posts_file, "Posts", self.COLUMNS, destination, "site.com")
+        
+        dataset = ds.dataset(os.path.join(temp_dir, "Posts"), format="parquet", partitioning="hive")
+        
+        assert len(list(dataset.get_fragments(filter=ds.field("year") == 2009))) == 1
+        assert dataset.to_table(filter=ds.field("year") == 2009).num_rows == 20
+    
+    def test_bounded_open_partitions(self, temp_dir, posts_file):
+        """Test that a partition continues in a new file after its file was closed to stay within the limit."""
+        destination = os.path.join(temp_dir, "Posts", "site=site.com")
+        writer = ParquetWriter(partition_by="year", max_open_partitions=1)
+        
+        with patch.object(ParquetWriter, "ARROW_CHUNK_ROWS", 4):
+            writer.write_from_xml(posts_file, "Posts", self.COLUMNS, destination, "site.com")
+        
+        files = [f for f in writer.output_files(destination) if "year=2008" in f]
+        assert len(files) == 10
+        ids = sorted((os.path.basename(f), pq.read_table(f).column("Id").to_pylist()) for f in files)
+        assert [i for _, values in ids for i in values] == [str(i) for i in range(2, 41, 2)]
+    
+    def test_one_file_per_partition(self, temp_dir, posts_file):
+        """Test that partitions are only split into more files once the open files reach the checkpoint size."""
+        destination = os.path.join(temp_dir, "Posts", "site=site.com")
+        writer = ParquetWriter(batch_size=4, partition_by="year")
+        
+        with patch.object(ParquetWriter, "ARROW_CHUNK_ROWS", 4):
+            writer.write_from_xml(posts_file, "Posts", self.COLUMNS, destination, "site.com")
+        assert len(writer.output_files(destination)) == 3
+        
+        writer.PARTITION_CHECKPOINT_BYTES = 1
+        with patch.object(ParquetWriter, "ARROW_CHUNK_ROWS", 4):
+            writer.write_from_xml(posts_file, "Posts", self.COLUMNS, destination, "site.com")
+        assert len(writer.output_files(destination)) == 21
+        assert self.read_dataset(os.path.join(temp_dir, "Posts")).num_rows == 41
+    
+    def test_table_without_date(self, temp_dir):
+        """Test that tables without a date column are written into the site folder itself."""
+        source_file = os.path.join(temp_dir, "Tags.xml")
+        with open(source_file, 'w') as f:
+            f.write('<tags><row Id="1" TagName="git" /><row Id="2" TagName="python" /></tags>')
+        destination = os.path.join(temp_dir, "Tags", "site=site.com")
+        writer = ParquetWriter(partition_by="month")
+        
+        writer.write_from_xml(source_file, "Tags", ["Id", "TagName"], destination, "site.com")
+        
+        assert writer.output_files(destination) == [os.path.join(destination, "part-00001.parquet")]
+    
+    def test_merge_ranges(self, temp_dir, posts_file):
+        """Test that partitions written for byte ranges are merged into the files of a sequential conversion."""
+        from stackexchange_parser.core import split_xml_file
+        writer = ParquetWriter(partition_by="year")
+        sequential = os.path.join(temp_dir, "Sequential", "site=site.com")
+        writer.write_from_xml(posts_file, "Posts", self.COLUMNS, sequential, "site.com")
+        parts = []
+        for number, byte_range in enumerate(split_xml_file(posts_file, 3), start=1):
+            parts.append(os.path.join(temp_dir, "Posts", f"site=site.com_range{number:04d}"))
+            writer.write_from_xml(posts_file, "Posts", self.COLUMNS, parts[-1], "site.com", byte_range=byte_range)
+        destination = os.path.join(temp_dir, "Posts", "site=site.com")
+        
+        writer.merge_parts(parts, destination)
+        
+        assert os.listdir(os.path.join(temp_dir, "Posts")) == ["site=site.com"]
+        def read_files(directory):
+            return {
+                os.path.relpath(f, directory): pq.read_table(f).column("Id").to_pylist()
+                for f in writer.output_files(directory)
+            }
+        assert read_files(destination) == read_files(sequential)
+        assert len(read_files(destination)) == 3
+    
+    def test_site_conversion(self, stackexchange_site_structure, sample_config_file, temp_dir):
+        """Test that a full conversion writes one dataset per table with a folder per site."""
+        output_dir = os.path.join(temp_dir, "output")
+        writer = ParquetWriter(partition_by="year")
+        
+        process_stackexchange_data(stackexchange_site_structure['input_dir'], output_dir, writer, False, sample_config_file)
+        
+        assert {"Posts", "Users", "Comments"} <= set(os.listdir(output_dir))
+        assert os.listdir(os.path.join(output_dir, "Posts")) == ["site=stackoverflow.com"]
+        table = self.read_dataset(os.path.join(output_dir, "Posts"))
+        assert table.num_rows == 3
+        assert set(table.column("year").to_pylist()) == {2008}
+        assert writer.output_settings("Posts")["partition_by"] == "year"
+    
+    def test_invalid_options(self, temp_dir):
+        """Test validation of the partitioning options and destinations."""
+        with pytest.raises(ConfigurationError, match="Unknown partitioning"):
+            ParquetWriter(partition_by="day")
+        with pytest.raises(ValueError):
+            ParquetWriter(partition_by="year", single_file=True)
+        with pytest.raises(ValueError):
+            ParquetWriter(partition_by="year", max_open_partitions=0)
+        with pytest.raises(ValidationError, match="stream"):
+            ParquetWriter(partition_by="year").write_from_xml(
+                io.BytesIO(b"<posts />"), "Posts", ["Id"], io.BytesIO(), "site"
+            )
+
+
+class TestParquetUnified:
+    """Test combining every site into one dataset per table."""
+    
+    @pytest.fixture
+    def dump(self, site_dump):
+        """Three sites of 30, 5 and 250 posts, and a config of the Posts table."""
+        return site_dump([("a.com", 30), ("b.com", 5), ("c.com", 250)], tables=["Posts"])
+    
+    @staticmethod
+    def site_counts(output_dir):
+        files = ParquetWriter().output_files(os.path.join(output_dir, "Posts.parquet"))
+        table = pa.concat_tables([pq.read_table(filename) for filename in files]).unify_dictionaries()
+        return {row["site"]: row["Id_count"] for row in table.group_by("site").aggregate([("Id", "count")]).to_pylist()}
+    
+    def test_coalesced_row_groups(self, dump):
+        """Test that small sites share row groups and the site column is dictionary-encoded."""
+        input_dir, output_dir, config_file = dump
+        
+        process_stackexchange_data(input_dir, output_dir, ParquetWriter(unified=True, row_group_size=100), False, config_file)
+        
+        destination = os.path.join(output_dir, "Posts.parquet")
+        parquet_file = pq.ParquetFile(destination)
+        assert parquet_file.schema_arrow.field("site").type == pa.dictionary(pa.int32(), pa.string())
+        assert [parquet_file.metadata.row_group(i).num_rows for i in range(parquet_file.num_row_groups)] == [100, 100, 85]
+        assert self.site_counts(output_dir) == {"a.com": 30, "b.com": 5, "c.com": 250}
+        assert os.listdir(os.path.join(output_dir, "a.com")) == []
+    
+    def test_later_run_adds_sites(self, dump):
+        """Test that a later run appends new sites as a new file and keeps the earlier file as it is."""
+        input_dir, output_dir, config_file = dump
+        writer = ParquetWriter(unified=True)
+        process_stackexchange_data(input_dir, output_dir, writer, False, config_file)
+        first_run = os.stat(os.path.join(output_dir, "Posts.parquet"))
+        shutil.rmtree(input_dir)
+        dump.add_site("d.com", 7)
+        
+        process_stackexchange_data(input_dir, output_dir, writer, False, config_file)
+        
+        files = writer.output_files(os.path.join(output_dir, "Posts.parquet"))
+        assert [os.path.basename(f) for f in files] == ["Posts_part0001.parquet", "Posts_part0002.parquet"]
+        assert os.stat(files[0]).st_ino == first_run.st_ino
+        assert self.site_counts(output_dir) == {"a.com": 30, "b.com": 5, "c.com": 250, "d.com": 7}
+    
+    def test_rewrites_only_files_of_replaced_sites(self, dump):
+        """Test that only the files holding a site converted again are rewritten."""
+        input_dir, output_dir, config_file = dump
+        writer = ParquetWriter(unified=True)
+        for sites in (["a.com", "b.com"], ["c.com"], ["a.com"]):
+            run_dir = os.path.join(os.path.dirname(input_dir), "run")
+            shutil.rmtree(run_dir, ignore_errors=True)
+            for site in sites:
+                shutil.copytree(os.path.join(input_dir, site), os.path.join(run_dir, site))
+                shutil.rmtree(os.path.join(output_dir, site), ignore_errors=True)
+            before = {f: os.stat(f).st_ino for f in writer.output_files(os.path.join(output_dir, "Posts.parquet"))}
+            process_stackexchange_data(run_dir, output_dir, writer, False, config_file)
+        
+        files = writer.output_files(os.path.join(output_dir, "Posts.parquet"))
+        assert len(files) == 2
+        assert os.stat(files[0]).st_ino == before[os.path.join(output_dir, "Posts_part0002.parquet")]
+        assert self.site_counts(output_dir) == {"a.com": 30, "b.com": 5, "c.com": 250}
+    
+    def test_replaces_converted_sites(self, temp_dir):
+        """Test that a site combined again replaces its earlier rows."""
+        output_dir = os.path.join(temp_dir, "output")
+        source_file = os.path.join(temp_dir, "Posts.xml")
+        with open(source_file, 'w') as f:
+            f.write('<posts><row Id="1" /><row Id="2" /></posts>')
+        writer = ParquetWriter(unified=True)
+        for _ in range(2):
+            destination = writer.destination(output_dir, "a.com", "Posts")
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            writer.write_from_xml(source_file, "Posts", ["Id"], destination, "a.com")
+            writer.combine_sites(output_dir, "Posts", [("a.com", destination)])
+        
+        assert self.site_counts(output_dir) == {"a.com": 2}
+    
+    def test_file_rollover(self, dump):
+        """Test that the dataset rolls over to part files once they exceed the size limit."""
+        input_dir, output_dir, config_file = dump
+        writer = ParquetWriter(unified=True, row_group_size=100, max_file_bytes=1)
+        
+        process_stackexchange_data(input_dir, output_dir, writer, False, config_file)
+        
+        files = writer.output_files(os.path.join(output_dir, "Posts.parquet"))
+        assert [os.path.basename(f) for f in files] == [f"Posts_part{n:04d}.parquet" for n in range(1, 4)]
+    
+    def test_invalid_combinations(self, dump):
+        """Test that unified output rejects partitioning, resume and refresh."""
+        input_dir, output_dir, config_file = dump
+        with pytest.raises(ValueError):
+            ParquetWriter(unified=True, partition_by="year")
+        with pytest.raises(ConfigurationError, match="Unified"):
+            process_stackexchange_data(input_dir, output_dir, ParquetWriter(unified=True), False, config_file, resume=True)
+
+
+class TestCSVEncoders:
+    """Test that the CSV encoders write identical bytes."""
+    
+    @pytest.mark.parametrize("columns", [
+        ['Id', 'Title', 'Body', 'Flag', 'Missing'],
+        ['Title'],
+        ['Missing'],
+    ])
+    def test_encoders_match(self, temp_dir, columns):
+        """Test that the arrow encoder writes what the csv module writes, quoting included."""
+        source_file = os.path.join(temp_dir, "Posts.xml")
+        with open(source_file, 'w', encoding='utf-8') as f:
+            f.write('''<?xml version="1.0" encoding="utf-8"?>
+<posts>
+  <row Id="1" Title="a, &quot;quoted&quot; title" Body="x&#xA;y&#xD;&#xA;z" Flag="True" />
+  <row Id="2" Title="" Body="café 中, &#x1F600;" Flag="False" />
+  <row Id="3" Title=" spaced " Body="tab&#x9;here" Flag="maybe" />
+  <row Id="4" Body="&quot;" />
+</posts>''')
+        python_file = os.path.join(temp_dir, "python.csv")
+        arrow_file = os.path.join(temp_dir, "arrow.csv")
+        
+        CSVWriter().write_from_xml(source_file, "Posts", columns, python_file, "site")
+        CSVWriter(encoder="arrow").write_from_xml(source_file, "Posts", columns, arrow_file, "site")
+        
+        with open(python_file, 'rb') as f1, open(arrow_file, 'rb') as f2:
+            assert f1.read() == f2.read()
+    
+    def test_arrow_encoder_batches_and_stream(self, sample_xml_posts):
+        """Test that the arrow encoder writes every batch to a stream after the header."""
+        destination = io.BytesIO()
+        writer = CSVWriter(encoder="arrow")
+        writer.PARSE_BATCH_ROWS = 2
+        
+        writer.write_from_xml(io.BytesIO(sample_xml_posts.encode('utf-8')), 'Posts', ['Id', 'Title'], destination, 'stdin')
+        
+        assert destination.getvalue() == b'Id,Title\r\n1,How to use Git?\r\n2,\r\n3,Python basics\r\n'
+    
+    def test_invalid_options(self):
+        """Test that unknown encoders and empty buffers are rejected."""
+        with pytest.raises(ConfigurationError, match="Unknown CSV encoder"):
+            CSVWriter(encoder="pandas")
+        with pytest.raises(ValueError):
+            CSVWriter(buffer_size=0)
+
+
+class TestArrowWriter:
+    """Test writing Arrow IPC files."""
+    
+    @staticmethod
+    def post(i):
+        return f' Score="{i % 7}" Body="line&#xA;{i}"'
+    
+    def test_same_table_as_parquet(self, temp_dir, posts_xml_file):
+        """Test that Arrow files hold the types and values of Parquet output, one record batch per parsed batch."""
+        source = posts_xml_file(250, self.post)
+        columns = ['Id', 'Score', 'Body']
+        column_types = {'Id': 'int', 'Score': 'smallint'}
+        writer = ArrowWriter()
+        writer.PARSE_BATCH_ROWS = 100
+        
+        writer.write_from_xml(source, "Posts", columns, os.path.join(temp_dir, "Posts.arrow"), "site", column_types=column_types)
+        ParquetWriter().write_from_xml(source, "Posts", columns, os.path.join(temp_dir, "Posts.parquet"), "site", column_types=column_types)
+        
+        reader = pa.ipc.open_file(os.path.join(temp_dir, "Posts.arrow"))
+        assert reader.num_record_batches == 3
+        assert reader.read_all().equals(pq.read_table(os.path.join(temp_dir, "Posts.parquet")))
+        assert not os.path.exists(temp_filename(os.path.join(temp_dir, "Posts.arrow")))
+    
+    def test_compressed_stream(self, sample_xml_posts):
+        """Test that a stream receives a complete compressed file and stays open."""
+        destination = io.BytesIO()
+        
+        ArrowWriter(compression="zstd").write_from_xml(
+            io.BytesIO(sample_xml_posts.encode('utf-8')), 'Posts', ['Id', 'Title'], destination, 'stdin'
+        )
+        
+        assert not destination.closed
+        table = pa.ipc.open_file(pa.BufferReader(destination.getvalue())).read_all()
+        assert table.column("Title").to_pylist() == ["How to use Git?", None, "Python basics"]
+    
+    def test_empty_table(self, temp_dir):
+        """Test that a table without rows still gets a file with its schema."""
+        source = os.path.join(temp_dir, "Posts.xml")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write('<posts>\n</posts>\n')
+        destination = os.path.join(temp_dir, "Posts.arrow")
+        
+        ArrowWriter().write_from_xml(source, "Posts", ['Id', 'Title'], destination, "site", column_types={'Id': 'int'})
+        
+        table = pa.ipc.open_file(destination).read_all()
+        assert table.num_rows == 0
+        assert table.schema.field("Id").type == pa.int32()
+    
+    def test_split_ranges_merged(self, temp_dir, posts_xml_file):
+        """Test that byte ranges are merged into one file in order."""
+        from stackexchange_parser.parallel import ConversionUnit, run_units
+        destination = os.path.join(temp_dir, "Posts.arrow")
+        unit = ConversionUnit(posts_xml_file(300, self.post), 'Posts', ['Id'], destination, "site", column_types={'Id': 'int'})
+        
+        result, = run_units(ArrowWriter(compression="lz4"), [unit], jobs=2, split_parts=3, split_min_bytes=0)
+        
+        assert result.rows == 300
+        assert sorted(os.listdir(temp_dir)) == ["Posts.arrow", "Posts.xml"]
+        assert pa.ipc.open_file(destination).read_all().column("Id").to_pylist() == list(range(1, 301))
+    
+    def test_failure_removes_partial_file(self, temp_dir):
+        """Test that a failed conversion leaves no file behind."""
+        source = os.path.join(temp_dir, "Posts.xml")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write('<posts>\n  <row Id="x" />\n</posts>\n')
+        
+        with pytest.raises(ValidationError, match="Cannot convert column Id"):
+            ArrowWriter().write_from_xml(source, "Posts", ['Id'], os.path.join(temp_dir, "Posts.arrow"), "site", column_types={'Id': 'int'})
+        
+        assert os.listdir(temp_dir) == ["Posts.xml"]
+    
+    def test_unknown_compression(self):
+        """Test that only Arrow's buffer codecs are accepted."""
+        with pytest.raises(ConfigurationError, match="Arrow compression"):
+            ArrowWriter(compression="gzip")